@@ -0,0 +1,89 @@
+"""
+GIF encoding benchmark, comparing the per-frame palette encoding of GifModule with the global palette encoding.
+
+Usage (from the idotmatrix-api-client directory):
+
+    python -m benchmarks.gif_encoding_benchmark --iterations 20
+    python -m benchmarks.gif_encoding_benchmark --file some.gif --canvas-size 32
+
+For every GIF and canvas size, the time to load, adapt and encode the GIF and the size of the encoded GIF are
+reported for both encodings.
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import List
+from unittest.mock import MagicMock
+
+from idotmatrix.modules.gif import GifModule
+from idotmatrix.screensize import ScreenSize
+from idotmatrix.util.image_utils import ResizeMode
+
+PROJECT_FOLDER = Path(__file__).parent.parent
+TEST_DATA_FOLDER = PROJECT_FOLDER / "tests" / "data"
+
+CANVAS_SIZES = [16, 32, 64]
+
+
+def run_encoding(file_path: Path, canvas_size: int, global_palette: bool, iterations: int) -> dict:
+    gif_module = GifModule(connection_manager=MagicMock(), screen_size=ScreenSize.SIZE_64x64)
+
+    def encode() -> bytes:
+        return gif_module._load_gif_and_adapt_to_canvas(
+            file_path=file_path,
+            canvas_size=canvas_size,
+            resize_mode=ResizeMode.FIT,
+            global_palette=global_palette,
+        )
+
+    # warm up, e.g. to load the Pillow plugins once
+    gif_data = encode()
+
+    cpu_start = time.process_time()
+    for _ in range(iterations):
+        encode()
+    cpu_seconds = time.process_time() - cpu_start
+
+    return {
+        "file": file_path.name,
+        "canvas_size": canvas_size,
+        "encoding": "global" if global_palette else "per-frame",
+        "bytes": len(gif_data),
+        "cpu_ms_per_encoding": cpu_seconds * 1000 / iterations,
+    }
+
+
+def print_results(results: List[dict]):
+    print(f"{'file':<20} {'canvas':>6} {'encoding':<10} {'bytes':>8} {'cpu ms':>8}")
+    for result in results:
+        print(
+            f"{result['file']:<20} {result['canvas_size']:>6} {result['encoding']:<10} "
+            f"{result['bytes']:>8} {result['cpu_ms_per_encoding']:>8.2f}"
+        )
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Compare the per-frame and the global palette GIF encoding.")
+    parser.add_argument("--file", type=Path, action="append",
+                        help="GIF file to encode, can be given multiple times (default: the GIFs of the tests)")
+    parser.add_argument("--canvas-size", type=int, choices=CANVAS_SIZES, action="append",
+                        help="canvas size to encode for, can be given multiple times (default: all)")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    files = args.file or sorted(TEST_DATA_FOLDER.glob("*.gif"))
+    results = [
+        run_encoding(file_path, canvas_size, global_palette, args.iterations)
+        for file_path in files
+        for canvas_size in args.canvas_size or CANVAS_SIZES
+        for global_palette in (False, True)
+    ]
+    print_results(results)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main(sys.argv[1:]))
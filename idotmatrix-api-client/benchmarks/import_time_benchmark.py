@@ -0,0 +1,103 @@
+"""
+Import time benchmark, measuring how long it takes to import the library and to create a client in a fresh
+interpreter, e.g. for CLI tools and short-lived cron jobs.
+
+Usage (from the idotmatrix-api-client directory):
+
+    python -m benchmarks.import_time_benchmark --iterations 20
+
+Every scenario runs in a new Python process. The time of the scenario is reported without the startup time of
+the interpreter itself, together with the heavy optional dependencies that were imported by it.
+"""
+import argparse
+import json
+import logging
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+PROJECT_FOLDER = Path(__file__).parent.parent
+
+# dependencies that are only needed by some features, and should only be imported when those are used
+HEAVY_MODULES = ["PIL", "matplotlib", "watchdog", "cryptography"]
+
+SCENARIOS = {
+    "import idotmatrix": "import idotmatrix",
+    "import client": "from idotmatrix.client import IDotMatrixClient",
+    "create client": "from idotmatrix.client import IDotMatrixClient\n"
+                     "from idotmatrix.screensize import ScreenSize\n"
+                     "IDotMatrixClient(screen_size=ScreenSize.SIZE_32x32)",
+    "use common module": "from idotmatrix.client import IDotMatrixClient\n"
+                         "from idotmatrix.screensize import ScreenSize\n"
+                         "IDotMatrixClient(screen_size=ScreenSize.SIZE_32x32).common",
+    "use gif module": "from idotmatrix.client import IDotMatrixClient\n"
+                      "from idotmatrix.screensize import ScreenSize\n"
+                      "IDotMatrixClient(screen_size=ScreenSize.SIZE_32x32).gif",
+    "import picture frame": "import idotmatrix.digital_picture_frame",
+}
+
+MEASUREMENT = """
+import json, sys, time
+start = time.perf_counter()
+exec(compile({code!r}, "<scenario>", "exec"))
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": seconds,
+    "heavy_modules": [name for name in {heavy_modules!r} if name in sys.modules],
+}}))
+"""
+
+
+def run_scenario(name: str, code: str, iterations: int) -> dict:
+    script = MEASUREMENT.format(code=code, heavy_modules=HEAVY_MODULES)
+    durations = []
+    heavy_modules = []
+    for _ in range(iterations):
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=PROJECT_FOLDER,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        durations.append(result["seconds"])
+        heavy_modules = result["heavy_modules"]
+
+    return {
+        "scenario": name,
+        "median_ms": statistics.median(durations) * 1000,
+        "min_ms": min(durations) * 1000,
+        "heavy_modules": heavy_modules,
+    }
+
+
+def print_results(results: List[dict]):
+    print(f"{'scenario':<22} {'median ms':>10} {'min ms':>8}  heavy modules")
+    for result in results:
+        print(
+            f"{result['scenario']:<22} {result['median_ms']:>10.1f} {result['min_ms']:>8.1f}  "
+            f"{', '.join(result['heavy_modules']) or '-'}"
+        )
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Measure the import time of the library in fresh interpreters.")
+    parser.add_argument("--scenario", choices=list(SCENARIOS), action="append",
+                        help="scenario to measure, can be given multiple times (default: all)")
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    results = [
+        run_scenario(name, SCENARIOS[name], args.iterations)
+        for name in args.scenario or SCENARIOS
+    ]
+    print_results(results)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,118 @@
+"""
+Packet builder benchmark, comparing the zero-copy packet construction of GifModule with the previous construction,
+which copied the payload for every chunking step.
+
+Usage (from the idotmatrix-api-client directory):
+
+    python -m benchmarks.packet_builder_benchmark --iterations 200
+    python -m benchmarks.packet_builder_benchmark --size 102400 --size 1048576
+
+For every payload size, the time to build the packets of a GIF upload is reported for both constructions, together
+with the number of memory blocks allocated and the peak memory allocated while building them (as traced by
+tracemalloc, including the packets themselves).
+"""
+import argparse
+import logging
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, List
+from unittest.mock import MagicMock
+
+from idotmatrix.modules.gif import GifModule, CHUNK_SIZE_4096, HEADER_SIZE_GIF
+from idotmatrix.screensize import ScreenSize
+
+PAYLOAD_SIZES = [16 * 1024, 100 * 1024, 1024 * 1024]
+BLE_PACKET_SIZE = 509
+
+
+def build_packets_by_copying(gif_module: GifModule, gif_data: bytes) -> List[List[bytearray]]:
+    """
+    The previous construction: every 4K chunk, every chunk with its header and every BLE packet was a copy.
+    """
+    crc32_bytes = gif_module.calculate_crc32_java_equivalent(gif_data).to_bytes(4, byteorder="little")
+    total_length_bytes = len(gif_data).to_bytes(4, byteorder="little")
+    chunks = [bytearray(gif_data[i:i + CHUNK_SIZE_4096]) for i in range(0, len(gif_data), CHUNK_SIZE_4096)]
+    large_packets = []
+    for i, chunk in enumerate(chunks):
+        header = bytearray(HEADER_SIZE_GIF)
+        header[0:2] = (len(chunk) + HEADER_SIZE_GIF).to_bytes(2, byteorder="little")
+        header[2] = 1
+        header[4] = 2 if i > 0 else 0
+        header[5:9] = total_length_bytes
+        header[9:13] = crc32_bytes
+        header[15] = 12
+        large_packets.append(bytes(header) + chunk)
+    return [
+        [bytearray(large_packet[i:i + BLE_PACKET_SIZE]) for i in range(0, len(large_packet), BLE_PACKET_SIZE)]
+        for large_packet in large_packets
+    ]
+
+
+def measure(build: Callable[[], list], iterations: int) -> dict:
+    # warm up
+    build()
+
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    packets = build()
+    snapshot_after = tracemalloc.take_snapshot()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated_blocks = sum(stat.count_diff for stat in snapshot_after.compare_to(snapshot_before, "filename"))
+    del packets
+
+    cpu_start = time.process_time()
+    for _ in range(iterations):
+        build()
+    cpu_seconds = time.process_time() - cpu_start
+
+    return {
+        "allocated_blocks": allocated_blocks,
+        "peak_kb": peak_bytes / 1024,
+        "cpu_ms_per_build": cpu_seconds * 1000 / iterations,
+    }
+
+
+def run_size(size: int, iterations: int) -> List[dict]:
+    gif_module = GifModule(connection_manager=MagicMock(), screen_size=ScreenSize.SIZE_64x64)
+    gif_data = random.Random(size).randbytes(size)
+    builders = {
+        "copying": lambda: build_packets_by_copying(gif_module, gif_data),
+        "zero-copy": lambda: gif_module.create_gif_data_packets(gif_data, gif_type=12, time_sign=1),
+    }
+    return [
+        {"size": size, "construction": name, **measure(build, iterations)}
+        for name, build in builders.items()
+    ]
+
+
+def print_results(results: List[dict]):
+    print(f"{'payload':>10} {'construction':<12} {'blocks':>8} {'peak kB':>9} {'cpu ms':>8}")
+    for result in results:
+        print(
+            f"{result['size']:>10} {result['construction']:<12} {result['allocated_blocks']:>8} "
+            f"{result['peak_kb']:>9.1f} {result['cpu_ms_per_build']:>8.3f}"
+        )
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Compare the copying and the zero-copy packet construction.")
+    parser.add_argument("--size", type=int, action="append",
+                        help="payload size in bytes, can be given multiple times (default: 16 kB, 100 kB, 1 MB)")
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    results = [
+        result
+        for size in args.size or PAYLOAD_SIZES
+        for result in run_size(size, args.iterations)
+    ]
+    print_results(results)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,192 @@
+"""
+Transport benchmark for the ConnectionManager, running typical workloads against a simulated device.
+
+Usage (from the idotmatrix-api-client directory):
+
+    python -m benchmarks.transport_benchmark --iterations 20 --latency-ms 2 --output results.json
+    python -m benchmarks.transport_benchmark --baseline results.json
+
+With --baseline, the CPU time per operation of every workload is compared to a previous run and the
+benchmark exits with a non-zero code if any workload got slower than the given tolerance.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+from PIL import Image as PILImage
+
+from idotmatrix.connection_manager import ConnectionManager
+from idotmatrix.modules.gif import GifModule
+from idotmatrix.modules.graffiti import GraffitiModule, MAX_PIXEL_LIST_LENGTH
+from idotmatrix.modules.image import ImageModule
+from idotmatrix.modules.text import TextModule
+from idotmatrix.screensize import ScreenSize
+from idotmatrix.simulator import SimulatedPeripheral, DEFAULT_MTU
+
+PROJECT_FOLDER = Path(__file__).parent.parent
+TEST_DATA_FOLDER = PROJECT_FOLDER / "tests" / "data"
+FONT_PATH = PROJECT_FOLDER / "fonts" / "Rain-DRM3.otf"
+
+Operation = Callable[[ConnectionManager], Awaitable[None]]
+
+
+def _create_image_operation(connection_manager: ConnectionManager) -> tuple[Operation, int]:
+    image_module = ImageModule(connection_manager=connection_manager, screen_size=ScreenSize.SIZE_64x64)
+    with PILImage.open(TEST_DATA_FOLDER / "demo_64.png") as image:
+        pixel_data = image.convert("RGB").tobytes()
+    packets = image_module._create_diy_image_data_packets(pixel_data)
+    return lambda cm: cm.send_packets(packets=packets, response=True), _packets_size(packets)
+
+
+def _create_gif_operation(connection_manager: ConnectionManager) -> tuple[Operation, int]:
+    gif_module = GifModule(connection_manager=connection_manager, screen_size=ScreenSize.SIZE_64x64)
+    packets = gif_module.create_gif_file_packets(file_path=TEST_DATA_FOLDER / "demo.gif")
+    return lambda cm: cm.send_packets(packets=packets, response=True), _packets_size(packets)
+
+
+def _create_text_operation(connection_manager: ConnectionManager) -> tuple[Operation, int]:
+    text_module = TextModule(connection_manager=connection_manager)
+    data = text_module._build_string_packet(
+        text_bitmaps=text_module._string_to_bitmaps(text="HELLO WORLD!", font_path=str(FONT_PATH), font_size=16),
+        text_mode=1,
+    )
+    return lambda cm: cm.send_bytes(data=data, response=False), len(data)
+
+
+def _create_graffiti_operation(connection_manager: ConnectionManager) -> tuple[Operation, int]:
+    xys = [(i % 64, i // 64) for i in range(MAX_PIXEL_LIST_LENGTH)]
+    data = GraffitiModule._create_payload(r=255, g=0, b=0, xys=xys)
+    return lambda cm: cm.send_bytes(data=data, response=True), len(data)
+
+
+WORKLOADS: Dict[str, Callable[[ConnectionManager], tuple[Operation, int]]] = {
+    "image": _create_image_operation,
+    "gif": _create_gif_operation,
+    "text": _create_text_operation,
+    "graffiti": _create_graffiti_operation,
+}
+
+
+def _packets_size(packets: List[List[bytes | bytearray]]) -> int:
+    return sum(len(chunk) for packet in packets for chunk in packet)
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+async def run_workload(name: str, args: argparse.Namespace) -> dict:
+    peripheral = SimulatedPeripheral(
+        mtu=args.mtu,
+        write_latency_seconds=args.latency_ms / 1000,
+        jitter_seconds=args.jitter_ms / 1000,
+        drop_rate=args.drop_rate,
+        seed=args.seed,
+    )
+    connection_manager = peripheral.attach(ConnectionManager())
+    connection_manager.set_pipelined_transfer(args.pipelined)
+    await connection_manager.connect()
+
+    operation, payload_size = WORKLOADS[name](connection_manager)
+    # warm up, e.g. to look up the characteristics once
+    await operation(connection_manager)
+
+    latencies = []
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        await operation(connection_manager)
+        latencies.append(time.perf_counter() - start)
+    wall_seconds = time.perf_counter() - wall_start
+    cpu_seconds = time.process_time() - cpu_start
+
+    await connection_manager.disconnect()
+
+    latencies.sort()
+    return {
+        "workload": name,
+        "operations": args.iterations,
+        "bytes_per_operation": payload_size,
+        "throughput_bytes_per_second": payload_size * args.iterations / wall_seconds if wall_seconds > 0 else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "cpu_ms_per_operation": cpu_seconds * 1000 / args.iterations,
+        "writes": peripheral.write_count,
+        "dropped_writes": peripheral.dropped_write_count,
+    }
+
+
+def print_results(results: List[dict]):
+    print(f"{'workload':<10} {'bytes/op':>9} {'KiB/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'cpu ms/op':>10} {'writes':>7}")
+    for result in results:
+        print(
+            f"{result['workload']:<10} {result['bytes_per_operation']:>9} "
+            f"{result['throughput_bytes_per_second'] / 1024:>10.1f} {result['p50_ms']:>9.2f} "
+            f"{result['p99_ms']:>9.2f} {result['cpu_ms_per_operation']:>10.3f} {result['writes']:>7}"
+        )
+
+
+def compare_to_baseline(results: List[dict], baseline_file: Path, tolerance: float) -> List[str]:
+    """
+    Returns:
+        List[str]: A description of every workload whose CPU time per operation exceeds the baseline by more
+            than the given tolerance factor.
+    """
+    baseline = {result["workload"]: result for result in json.loads(baseline_file.read_text())}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["workload"])
+        if previous is None:
+            continue
+        limit = previous["cpu_ms_per_operation"] * tolerance
+        if result["cpu_ms_per_operation"] > limit:
+            regressions.append(
+                f"{result['workload']}: {result['cpu_ms_per_operation']:.3f} cpu ms/op, "
+                f"baseline {previous['cpu_ms_per_operation']:.3f} (limit {limit:.3f})"
+            )
+    return regressions
+
+
+async def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the BLE transport against a simulated device.")
+    parser.add_argument("--workload", choices=list(WORKLOADS), action="append",
+                        help="workload to run, can be given multiple times (default: all)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--mtu", type=int, default=DEFAULT_MTU)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latency of every BLE write")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="maximum random deviation of the latency")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="probability of losing a write-without-response")
+    parser.add_argument("--pipelined", action="store_true", help="enable pipelined transfers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the results as JSON to this file")
+    parser.add_argument("--baseline", type=Path, help="JSON results of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="allowed factor of the CPU time per operation compared to the baseline")
+    args = parser.parse_args(argv)
+
+    results = [await run_workload(name, args) for name in args.workload or WORKLOADS]
+    print_results(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(asyncio.run(main(sys.argv[1:])))
@@ -8,3 +8,19 @@ __author__ = "Kalle Minkner, Jon-Mailes Graeffe"
 __credits__ = (
     "everyone who thankfully helped with the reverse-engineering. You are awesome!"
 )
+
+__all__ = [
+    "IDotMatrixClient",
+    "ScreenSize",
+]
+
+
+def __getattr__(name: str):
+    # the client is only imported when it is used, so importing the package itself stays cheap
+    if name == "IDotMatrixClient":
+        from idotmatrix.client import IDotMatrixClient
+        return IDotMatrixClient
+    if name == "ScreenSize":
+        from idotmatrix.screensize import ScreenSize
+        return ScreenSize
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
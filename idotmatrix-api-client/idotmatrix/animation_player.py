@@ -0,0 +1,199 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterable
+from typing import Any, Optional, Tuple
+
+from PIL import Image as PILImage
+
+from idotmatrix.client import IDotMatrixClient
+from idotmatrix.framebuffer import FrameBuffer
+from idotmatrix.modules.image import ImageMode
+
+DEFAULT_FPS = 10.0
+
+Frame = PILImage.Image | bytes | bytearray | memoryview | Any
+
+
+class AnimationStats:
+    def __init__(self):
+        """
+        Statistics about an animation played by the AnimationPlayer.
+        """
+        self.frames_received = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.total_latency_seconds = 0.0
+        self.last_latency_seconds = 0.0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def achieved_fps(self) -> float:
+        """
+        Returns:
+            float: The number of frames per second that were actually sent to the device.
+        """
+        if self.started_at is None or self.finished_at is None or self.finished_at <= self.started_at:
+            return 0.0
+        return self.frames_sent / (self.finished_at - self.started_at)
+
+    @property
+    def average_latency_ms(self) -> float:
+        """
+        Returns:
+            float: The average time between receiving a frame and having sent it to the device, in milliseconds.
+        """
+        if self.frames_sent == 0:
+            return 0.0
+        return self.total_latency_seconds * 1000 / self.frames_sent
+
+    @property
+    def last_latency_ms(self) -> float:
+        """
+        Returns:
+            float: The latency of the last frame sent to the device, in milliseconds.
+        """
+        return self.last_latency_seconds * 1000
+
+    def __str__(self):
+        return (
+            f"AnimationStats(frames_received={self.frames_received}, frames_sent={self.frames_sent}, "
+            f"frames_dropped={self.frames_dropped}, achieved_fps={self.achieved_fps:.1f}, "
+            f"average_latency_ms={self.average_latency_ms:.1f})"
+        )
+
+
+class AnimationPlayer:
+    """
+    Plays a stream of frames on the device in DIY mode, at a target frame rate.
+
+    If the device can not keep up with the incoming frames, only the most recent frame is sent and
+    older ones are dropped, so the animation never lags behind its source.
+    """
+    logging = logging.getLogger(__name__)
+
+    def __init__(
+        self,
+        device_client: IDotMatrixClient,
+        fps: float = DEFAULT_FPS,
+        partial_updates: bool = False,
+    ):
+        """
+        Initializes the AnimationPlayer.
+        Args:
+            device_client (IDotMatrixClient): The client to communicate with the device.
+            fps (float): The target number of frames per second. Defaults to 10.
+            partial_updates (bool): If True, only the pixels that changed since the previous frame are sent,
+                if that is cheaper than sending the full frame (see FrameBuffer). Defaults to False.
+        """
+        if fps <= 0:
+            raise ValueError("fps must be greater than 0")
+        self.device_client = device_client
+        self.fps = fps
+        self._frame_buffer: Optional[FrameBuffer] = FrameBuffer(device_client) if partial_updates else None
+        self._stop_requested = False
+        self.stats = AnimationStats()
+
+    def stop(self):
+        """
+        Stops the animation that is currently played after the frame that is currently being sent.
+        """
+        self._stop_requested = True
+
+    async def play(self, frames: AsyncIterable[Frame]) -> AnimationStats:
+        """
+        Plays the given frames on the device until the iterator is exhausted or stop() is called.
+        Args:
+            frames (AsyncIterable[Frame]): The frames to play, either PIL images of the screen size or raw RGB pixel
+                data (3 bytes per pixel, row by row), e.g. NumPy arrays of shape (height, width, 3).
+        Returns:
+            AnimationStats: Statistics about the played animation.
+        """
+        loop = asyncio.get_running_loop()
+        frame_interval = 1 / self.fps
+        self.stats = stats = AnimationStats()
+        self._stop_requested = False
+
+        pending_frame: Optional[Tuple[Frame, float]] = None
+        is_source_exhausted = False
+        frame_available = asyncio.Event()
+
+        async def consume_frames():
+            nonlocal pending_frame, is_source_exhausted
+            try:
+                async for frame in frames:
+                    stats.frames_received += 1
+                    if pending_frame is not None:
+                        # the previous frame has not been sent yet, so it is replaced by the more recent one
+                        stats.frames_dropped += 1
+                    pending_frame = (frame, loop.time())
+                    frame_available.set()
+            finally:
+                is_source_exhausted = True
+                frame_available.set()
+
+        if self._frame_buffer is not None:
+            # the frame buffer enables DIY mode itself before uploading the first full frame
+            self._frame_buffer.invalidate()
+        else:
+            await self.device_client.image.set_mode(ImageMode.EnableDIY)
+
+        consumer_task = asyncio.create_task(consume_frames())
+        try:
+            next_frame_at = loop.time()
+            while not self._stop_requested:
+                # check the state before waiting, as the source may have produced its last frame
+                # or finished while the previous frame was being sent
+                if pending_frame is None:
+                    if is_source_exhausted:
+                        break
+                    frame_available.clear()
+                    await frame_available.wait()
+                    continue
+
+                delay = next_frame_at - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                # take the most recent frame, which might have been replaced while waiting
+                frame, received_at = pending_frame
+                pending_frame = None
+
+                sending_started_at = loop.time()
+                if stats.started_at is None:
+                    stats.started_at = sending_started_at
+                await self._send_frame(frame)
+                stats.finished_at = loop.time()
+
+                stats.frames_sent += 1
+                stats.last_latency_seconds = stats.finished_at - received_at
+                stats.total_latency_seconds += stats.last_latency_seconds
+
+                # if sending took longer than the frame interval, continue right away instead of catching up
+                next_frame_at = max(sending_started_at + frame_interval, stats.finished_at)
+        finally:
+            if not consumer_task.done():
+                consumer_task.cancel()
+            try:
+                await consumer_task
+            except asyncio.CancelledError:
+                pass
+
+        if pending_frame is not None:
+            stats.frames_dropped += 1
+
+        self.logging.info(f"animation finished: {stats}")
+        return stats
+
+    async def _send_frame(self, frame: Frame):
+        if self._frame_buffer is not None:
+            await self._frame_buffer.show(frame)
+            return
+
+        if isinstance(frame, PILImage.Image):
+            if frame.size != self.device_client.screen_size.value:
+                raise ValueError(f"frame must be of size {self.device_client.screen_size.value}, got: {frame.size}")
+            if frame.mode != "RGB":
+                frame = frame.convert("RGB")
+            frame = frame.tobytes()
+        await self.device_client.image.upload_image_rgb_data(frame)
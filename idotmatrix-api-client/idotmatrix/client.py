@@ -1,32 +1,48 @@
-from typing import Optional
-
-from idotmatrix.connection_manager import ConnectionManager, ConnectionListener
-from idotmatrix.modules.chronograph import ChronographModule
-from idotmatrix.modules.clock import ClockModule
-from idotmatrix.modules.common import CommonModule
-from idotmatrix.modules.countdown import CountdownModule
-from idotmatrix.modules.eco import EcoModule
-from idotmatrix.modules.effect import EffectModule
-from idotmatrix.modules.fullscreen_color import FullscreenColorModule
-from idotmatrix.modules.gif import GifModule
-from idotmatrix.modules.graffiti import GraffitiModule
-from idotmatrix.modules.image import ImageModule
-from idotmatrix.modules.music_sync import MusicSyncModule
-from idotmatrix.modules.scoreboard import ScoreboardModule
-from idotmatrix.modules.system import SystemModule
-from idotmatrix.modules.text import TextModule
+from functools import cached_property
+from typing import List, Optional, TYPE_CHECKING
+
+from idotmatrix.connection_manager import ConnectionManager, ConnectionListener, TransferStats, \
+    DEFAULT_PIPELINE_WINDOW
+from idotmatrix.metrics import MetricsRecorder
+from idotmatrix.pacer import AdaptivePacer
 from idotmatrix.screensize import ScreenSize
+from idotmatrix.transaction import Transaction, StepTiming
+from idotmatrix.util.gif_slots import GifSlotManager
+from idotmatrix.util.payload_cache import PayloadCache
+
+if TYPE_CHECKING:
+    from idotmatrix.commands import CommandBatch
+    # the modules are only imported when they are first used, see the properties below
+    from idotmatrix.modules.chronograph import ChronographModule
+    from idotmatrix.modules.clock import ClockModule
+    from idotmatrix.modules.common import CommonModule
+    from idotmatrix.modules.countdown import CountdownModule
+    from idotmatrix.modules.eco import EcoModule
+    from idotmatrix.modules.effect import EffectModule
+    from idotmatrix.modules.fullscreen_color import FullscreenColorModule
+    from idotmatrix.modules.gif import GifModule
+    from idotmatrix.modules.graffiti import GraffitiModule
+    from idotmatrix.modules.image import ImageModule
+    from idotmatrix.modules.music_sync import MusicSyncModule
+    from idotmatrix.modules.scoreboard import ScoreboardModule
+    from idotmatrix.modules.system import SystemModule
+    from idotmatrix.modules.text import TextModule
 
 
 class IDotMatrixClient:
     """
     Client for interacting with the iDotMatrix device.
+
+    The modules (image, gif, text, ...) are imported and created when they are first used, and then reused.
     """
 
     def __init__(
         self,
         screen_size: ScreenSize,
         mac_address: Optional[str] = None,
+        payload_cache: Optional[PayloadCache] = None,
+        gif_slot_manager: Optional[GifSlotManager] = None,
+        metrics: Optional[MetricsRecorder] = None,
     ):
         """
         Initializes the IDotMatrix client with the specified screen size and optional MAC address.
@@ -35,96 +51,139 @@ class IDotMatrixClient:
             screen_size (ScreenSize): The size of the screen, e.g., ScreenSize.SIZE_64x64.
             mac_address (Optional[str]): The Bluetooth MAC address of the iDotMatrix device. If not provided,
                                          the client will attempt to discover devices.
+            payload_cache (Optional[PayloadCache]): Cache for the encoded packets of uploaded image and GIF files.
+                                         If not provided, an in-memory cache is used. Pass a PayloadCache with
+                                         a cache_dir to persist encoded packets across restarts.
+            gif_slot_manager (Optional[GifSlotManager]): Tracks the GIFs stored in the slots of the device, to skip
+                                         uploads of GIFs that are still shown. If not provided, the slots are only
+                                         tracked in memory. Pass a GifSlotManager with a state_file to persist them.
+            metrics (Optional[MetricsRecorder]): Receives metrics about transfers and connections, e.g. an
+                                         InMemoryMetrics instance. If not provided, no metrics are recorded.
         """
         self._connection_manager = ConnectionManager(
             address=mac_address,
+            metrics=metrics,
         )
         self._connection_manager.address = mac_address
         self.screen_size = screen_size
         self.mac_address = mac_address
+        self.payload_cache = payload_cache if payload_cache is not None else PayloadCache()
+        self.gif_slot_manager = gif_slot_manager if gif_slot_manager is not None else GifSlotManager()
 
     @property
-    def chronograph(self) -> ChronographModule:
+    def screen_size(self) -> ScreenSize:
+        return self._screen_size
+
+    @screen_size.setter
+    def screen_size(self, screen_size: ScreenSize):
+        self._screen_size = screen_size
+        # modules are created once per client, the ones that already exist have to use the new screen size
+        for module_name in ("gif", "image"):
+            module = self.__dict__.get(module_name)
+            if module is not None:
+                module.screen_size = screen_size
+
+    @cached_property
+    def chronograph(self) -> "ChronographModule":
+        from idotmatrix.modules.chronograph import ChronographModule
         return ChronographModule(
             connection_manager=self._connection_manager,
         )
 
-    @property
-    def clock(self) -> ClockModule:
+    @cached_property
+    def clock(self) -> "ClockModule":
+        from idotmatrix.modules.clock import ClockModule
         return ClockModule(
             connection_manager=self._connection_manager,
         )
 
-    @property
-    def common(self) -> CommonModule:
+    @cached_property
+    def common(self) -> "CommonModule":
+        from idotmatrix.modules.common import CommonModule
         return CommonModule(
             connection_manager=self._connection_manager,
+            gif_slot_manager=self.gif_slot_manager,
         )
 
-    @property
-    def countdown(self) -> CountdownModule:
+    @cached_property
+    def countdown(self) -> "CountdownModule":
+        from idotmatrix.modules.countdown import CountdownModule
         return CountdownModule(
             connection_manager=self._connection_manager,
         )
 
-    @property
-    def eco(self) -> EcoModule:
+    @cached_property
+    def eco(self) -> "EcoModule":
+        from idotmatrix.modules.eco import EcoModule
         return EcoModule(
             connection_manager=self._connection_manager,
         )
 
-    @property
-    def effect(self) -> EffectModule:
+    @cached_property
+    def effect(self) -> "EffectModule":
+        from idotmatrix.modules.effect import EffectModule
         return EffectModule(
             connection_manager=self._connection_manager,
         )
 
-    @property
-    def color(self) -> FullscreenColorModule:
+    @cached_property
+    def color(self) -> "FullscreenColorModule":
+        from idotmatrix.modules.fullscreen_color import FullscreenColorModule
         return FullscreenColorModule(
             connection_manager=self._connection_manager,
         )
 
-    @property
-    def gif(self) -> GifModule:
+    @cached_property
+    def gif(self) -> "GifModule":
+        from idotmatrix.modules.gif import GifModule
         return GifModule(
             connection_manager=self._connection_manager,
-            screen_size=self.screen_size
+            screen_size=self.screen_size,
+            payload_cache=self.payload_cache,
+            slot_manager=self.gif_slot_manager,
         )
 
-    @property
-    def graffiti(self) -> GraffitiModule:
+    @cached_property
+    def graffiti(self) -> "GraffitiModule":
+        from idotmatrix.modules.graffiti import GraffitiModule
         return GraffitiModule(
             connection_manager=self._connection_manager,
         )
 
-    @property
-    def image(self) -> ImageModule:
+    @cached_property
+    def image(self) -> "ImageModule":
+        from idotmatrix.modules.image import ImageModule
         return ImageModule(
             connection_manager=self._connection_manager,
-            screen_size=self.screen_size
+            screen_size=self.screen_size,
+            payload_cache=self.payload_cache,
         )
 
-    @property
-    def music_sync(self) -> MusicSyncModule:
+    @cached_property
+    def music_sync(self) -> "MusicSyncModule":
+        from idotmatrix.modules.music_sync import MusicSyncModule
         return MusicSyncModule(
             connection_manager=self._connection_manager,
         )
 
-    @property
-    def scoreboard(self) -> ScoreboardModule:
+    @cached_property
+    def scoreboard(self) -> "ScoreboardModule":
+        from idotmatrix.modules.scoreboard import ScoreboardModule
         return ScoreboardModule(
             connection_manager=self._connection_manager,
         )
 
-    @property
-    def system(self) -> SystemModule:
+    @cached_property
+    def system(self) -> "SystemModule":
+        from idotmatrix.modules.system import SystemModule
         return SystemModule(
             connection_manager=self._connection_manager,
+            gif_slot_manager=self.gif_slot_manager,
         )
 
-    @property
-    def text(self) -> TextModule:
+    @cached_property
+    def text(self) -> "TextModule":
+        from idotmatrix.modules.text import TextModule
         return TextModule(
             connection_manager=self._connection_manager,
         )
@@ -165,11 +224,38 @@ class IDotMatrixClient:
         """
         await self.common.set_brightness(brightness_percent=brightness_percent)
 
-    async def reset(self):
+    async def reset(self, transaction: Optional[Transaction] = None):
         """
         Reset the IDotMatrix device.
+
+        Args:
+            transaction (Optional[Transaction]): Commands to send right before the reset, see CommonModule.reset.
+        """
+        await self.common.reset(transaction=transaction)
+
+    async def send_commands(self, batch: "CommandBatch", single_write: bool = False):
+        """
+        Send a batch of commands to the IDotMatrix device, see CommonModule.send_commands.
+
+        Args:
+            batch (CommandBatch): The commands to send, e.g. CommandBatch().add(commands.BRIGHTNESS, 50).
+            single_write (bool): If True, all commands are sent with a single write, which requires a device that
+                accepts multiple commands in one write. Defaults to False.
         """
-        await self.common.reset()
+        await self.common.send_commands(batch=batch, single_write=single_write)
+
+    async def run_transaction(self, transaction: Transaction) -> List[StepTiming]:
+        """
+        Run an ordered list of commands without any other command in between, waiting only as long as each
+        command requires, see ConnectionManager.run_transaction.
+
+        Args:
+            transaction (Transaction): The commands to run, e.g.
+                Transaction().add_command(commands.IMAGE_MODE.encode(1), wait=WAIT_PACED, gap=0.3).add_packets(packets).
+        Returns:
+            List[StepTiming]: The timing of every command.
+        """
+        return await self._connection_manager.run_transaction(transaction)
 
     def add_connection_listener(
         self,
@@ -190,3 +276,80 @@ class IDotMatrixClient:
             auto_reconnect (bool): True to enable auto-reconnect, False to disable.
         """
         self._connection_manager.set_auto_reconnect(auto_reconnect=auto_reconnect)
+
+    def set_pipelined_transfer(self, enabled: bool, window: int = DEFAULT_PIPELINE_WINDOW):
+        """
+        Set whether large uploads (images, GIFs) should be pipelined, using the notifications of the device
+        as acknowledgements instead of waiting for a response after each packet.
+        Falls back to the regular transfer mode automatically if the device does not acknowledge the packets.
+        Args:
+            enabled (bool): True to enable pipelined transfers, False to disable.
+            window (int): The maximum number of packets that may be in flight without an acknowledgement.
+        """
+        self._connection_manager.set_pipelined_transfer(enabled=enabled, window=window)
+
+    def set_command_coalescing(self, enabled: bool):
+        """
+        Set whether commands should be queued, so that idempotent "set state" commands (brightness, color,
+        screen on/off, flip, effect, clock) which are superseded by a newer one before being sent are dropped.
+        Uploads and other commands keep their order. Useful if commands are sent concurrently, e.g. from a web UI.
+        Args:
+            enabled (bool): True to queue and coalesce commands, False to send every command directly.
+        """
+        self._connection_manager.set_command_coalescing(enabled=enabled)
+
+    def set_bulk_preemption(self, enabled: bool):
+        """
+        Set whether control commands (brightness, screen on/off, flip) may be sent between two packets of a long
+        upload, instead of waiting for the whole upload. Requires command coalescing, see set_command_coalescing.
+        Args:
+            enabled (bool): True to let control commands preempt uploads.
+        """
+        self._connection_manager.set_bulk_preemption(enabled=enabled)
+
+    def set_adaptive_pacing(self, enabled: bool):
+        """
+        Set whether the gap the device needs between two commands should be learned from its acknowledgements.
+        If disabled, or if the device does not acknowledge a command, the conservative default gap of the command is used.
+        Args:
+            enabled (bool): True to learn the gaps, False to always use the default gaps.
+        """
+        self._connection_manager.set_adaptive_pacing(enabled=enabled)
+
+    @property
+    def pacer(self) -> AdaptivePacer:
+        """
+        Paces the commands sent to the device, see AdaptivePacer.learned_gaps for the gaps learned per command type.
+        """
+        return self._connection_manager.pacer
+
+    def defer_next_command(self, seconds: float):
+        """
+        Delay the next command sent to the device, e.g. to give it time to process an uploaded GIF.
+        Unlike sleeping, this does not block the caller.
+        Args:
+            seconds (float): The time the device needs before it can receive the next command.
+        """
+        self._connection_manager.pacer.defer(seconds)
+
+    @property
+    def last_transfer_stats(self) -> Optional[TransferStats]:
+        """
+        Statistics (e.g. the achieved bytes per second) of the last multi-packet transfer to the device.
+        """
+        return self._connection_manager.last_transfer_stats
+
+    @property
+    def metrics(self) -> Optional[MetricsRecorder]:
+        """
+        The recorder that receives metrics about transfers and connections, or None if metrics are disabled.
+        """
+        return self._connection_manager.metrics
+
+    def set_metrics(self, metrics: Optional[MetricsRecorder]):
+        """
+        Set the recorder that receives metrics about transfers and connections.
+        Args:
+            metrics (Optional[MetricsRecorder]): The recorder, e.g. an InMemoryMetrics instance, or None to disable metrics.
+        """
+        self._connection_manager.set_metrics(metrics)
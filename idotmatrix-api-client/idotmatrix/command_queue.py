@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from .metrics import command_type
+
+# command type (see idotmatrix.metrics.command_type) -> coalescing key of the idempotent "set state" commands.
+# A pending command is superseded by a newer command with the same key, only the newer one is sent.
+COALESCING_KEYS: Dict[str, str] = {
+    "0480": "brightness",
+    "0701": "screen",
+    "0680": "flip",
+    "0780": "time_indicator",
+    "0301": "speed",
+    # the following commands all replace what is shown on the screen
+    "0202": "display",  # fullscreen color
+    "0302": "display",  # effect
+    "0601": "display",  # clock
+}
+# coalescing keys of the small control commands, which are sent before all other pending commands
+CONTROL_KEYS: Set[str] = {"brightness", "screen", "flip", "speed", "time_indicator"}
+
+PRIORITY_CONTROL = 0
+PRIORITY_NORMAL = 1
+
+
+class WaitStats:
+    """Time that commands of one priority spent in the queue before being sent."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    @property
+    def average_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+
+class _QueuedCommand:
+    def __init__(
+        self,
+        key: Optional[str],
+        priority: int,
+        send: Callable[[], Awaitable[None]],
+        future: asyncio.Future,
+    ):
+        self.key = key
+        self.priority = priority
+        self.send = send
+        self.futures: List[asyncio.Future] = [future]
+        self.enqueued_at = time.perf_counter()
+
+
+class CommandQueue:
+    """
+    Queue in front of the connection to a device, which sends the submitted commands one after another.
+
+    Idempotent "set state" commands (brightness, color, screen on/off, ...) are coalesced: if a command with the
+    same coalescing key is still pending, it is dropped and only the newer command is sent. The callers of both
+    commands are released once the newer command has been sent. All other commands, e.g. uploads, are sent
+    in the order they have been submitted.
+
+    Control commands (brightness, screen on/off, ...) are sent before all other pending commands. A running bulk
+    transfer can let them through between two of its packets, see send_control_commands.
+    """
+    logging = logging.getLogger(__name__)
+
+    def __init__(
+        self,
+        coalescing_keys: Optional[Dict[str, str]] = None,
+        control_keys: Optional[Set[str]] = None,
+    ):
+        """
+        Initializes the CommandQueue.
+        Args:
+            coalescing_keys (Optional[Dict[str, str]]): Coalescing key per command type. Defaults to COALESCING_KEYS.
+            control_keys (Optional[Set[str]]): Coalescing keys of the commands with control priority.
+                Defaults to CONTROL_KEYS.
+        """
+        self.coalescing_keys = coalescing_keys if coalescing_keys is not None else COALESCING_KEYS
+        self.control_keys = control_keys if control_keys is not None else CONTROL_KEYS
+        self._pending: List[_QueuedCommand] = []
+        self._worker: Optional[asyncio.Task] = None
+        self.sent_count = 0
+        self.coalesced_count = 0
+        # number of control commands sent between the packets of a bulk transfer
+        self.preempted_count = 0
+        self.wait_stats: Dict[int, WaitStats] = {PRIORITY_CONTROL: WaitStats(), PRIORITY_NORMAL: WaitStats()}
+
+    def get_coalescing_key(self, data: bytearray | bytes) -> Optional[str]:
+        """
+        Returns:
+            Optional[str]: The coalescing key of the command, or None if the command must not be coalesced.
+        """
+        return self.coalescing_keys.get(command_type(data))
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def get_pending_count(self, priority: int) -> int:
+        """
+        Returns:
+            int: The number of pending commands of the given priority, e.g. PRIORITY_CONTROL.
+        """
+        return sum(1 for command in self._pending if command.priority == priority)
+
+    async def submit(self, key: Optional[str], send: Callable[[], Awaitable[None]]) -> None:
+        """
+        Queues a command and waits until it (or a newer command superseding it) has been sent.
+        Args:
+            key (Optional[str]): Coalescing key of the command, None for commands that must always be sent.
+            send (Callable[[], Awaitable[None]]): Sends the command.
+        Raises:
+            Exception: Any exception raised while sending the command.
+        """
+        future = asyncio.get_running_loop().create_future()
+        priority = PRIORITY_CONTROL if key in self.control_keys else PRIORITY_NORMAL
+        command = _QueuedCommand(key, priority, send, future)
+        if key is not None:
+            for pending in self._pending:
+                if pending.key == key:
+                    # the superseded command is removed instead of updated in place, so the newer command
+                    # is still sent after all commands submitted in between
+                    self._pending.remove(pending)
+                    command.futures = pending.futures + command.futures
+                    command.enqueued_at = pending.enqueued_at
+                    self.coalesced_count += 1
+                    self.logging.debug(f"coalesced pending {key} command")
+                    break
+        self._pending.append(command)
+
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._process())
+        await future
+
+    async def _process(self):
+        while self._pending:
+            index = next(
+                (i for i, command in enumerate(self._pending) if command.priority == PRIORITY_CONTROL), 0,
+            )
+            await self._send(self._pending.pop(index))
+            # let the callers continue before the next command is sent, e.g. to pace the command they just sent
+            await asyncio.sleep(0)
+
+    async def _send(self, command: _QueuedCommand):
+        if all(future.done() for future in command.futures):
+            # all callers have been cancelled
+            return
+        self.wait_stats[command.priority].record(time.perf_counter() - command.enqueued_at)
+        try:
+            await command.send()
+            self.sent_count += 1
+            for future in command.futures:
+                if not future.done():
+                    future.set_result(None)
+        except asyncio.CancelledError:
+            # e.g. a cancelled transfer, the callers must not wait forever for it
+            for future in command.futures:
+                future.cancel()
+            if asyncio.current_task().cancelling():
+                # the worker itself has been cancelled
+                raise
+        except Exception as e:
+            for future in command.futures:
+                if not future.done():
+                    future.set_exception(e)
+
+    def has_pending_control_commands(self) -> bool:
+        return any(command.priority == PRIORITY_CONTROL for command in self._pending)
+
+    async def send_control_commands(self) -> int:
+        """
+        Sends all pending control commands right away. Called by a bulk transfer between two of its packets,
+        so that small control commands don't have to wait for the whole transfer.
+        Returns:
+            int: The number of control commands that have been sent.
+        """
+        control_commands = [command for command in self._pending if command.priority == PRIORITY_CONTROL]
+        for command in control_commands:
+            self._pending.remove(command)
+            self.logging.debug(f"sending {command.key} command during a bulk transfer")
+            await self._send(command)
+        self.preempted_count += len(control_commands)
+        return len(control_commands)
+
+    def clear(self):
+        """
+        Drops all pending commands, their callers receive a CancelledError.
+        """
+        pending, self._pending = self._pending, []
+        for command in pending:
+            for future in command.futures:
+                future.cancel()
@@ -0,0 +1,187 @@
+import struct
+from functools import partial
+from typing import Dict, List, Tuple
+
+# parameters are packed little endian, without padding
+_BYTE_ORDER = "<"
+
+
+class CommandTemplate:
+    """
+    A command of fixed shape: a constant prefix (length, command and sub-command bytes) followed by parameters,
+    which are packed with a precompiled struct. Commands without parameters are encoded once, as a static frame.
+    """
+
+    def __init__(self, name: str, prefix: bytes, parameter_format: str = ""):
+        """
+        Args:
+            name (str): Name of the command in the registry, e.g. "brightness".
+            prefix (bytes): The constant bytes at the start of the command.
+            parameter_format (str): struct format of the parameters, e.g. "B" for a single byte.
+        """
+        self.name = name
+        self._struct = struct.Struct(f"{_BYTE_ORDER}{len(prefix)}s{parameter_format}")
+        self._prefix = bytes(prefix)
+        self._pack = partial(self._struct.pack, self._prefix)
+        self.parameter_count = len(self._struct.unpack(bytes(self._struct.size))) - 1
+        # the encoded command, if it has no parameters
+        self.frame = self._prefix if self.parameter_count == 0 else None
+
+    @property
+    def size(self) -> int:
+        """
+        Returns:
+            int: The size of the encoded command in bytes.
+        """
+        return self._struct.size
+
+    def encode(self, *parameters) -> bytes:
+        """
+        Encodes the command with the given parameters.
+        Raises:
+            ValueError: If the parameters don't fit the parameter format, e.g. a byte value that is out of range.
+        """
+        if self.frame is not None and not parameters:
+            return self.frame
+        try:
+            return self._pack(*parameters)
+        except struct.error as e:
+            raise ValueError(f"invalid parameters for command {self.name}: {e}") from e
+
+    def encode_into(self, buffer: bytearray, offset: int, *parameters):
+        """
+        Encodes the command with the given parameters into a buffer, at the given offset.
+        Raises:
+            ValueError: If the parameters don't fit the parameter format, e.g. a byte value that is out of range.
+        """
+        try:
+            self._struct.pack_into(buffer, offset, self._prefix, *parameters)
+        except struct.error as e:
+            raise ValueError(f"invalid parameters for command {self.name}: {e}") from e
+
+    def __str__(self):
+        return f"CommandTemplate({self.name}, {self.size} bytes)"
+
+
+# all command templates, by name
+COMMANDS: Dict[str, CommandTemplate] = {}
+
+
+def register(template: CommandTemplate) -> CommandTemplate:
+    """
+    Adds a command template to the registry.
+    Raises:
+        ValueError: If a template with the same name has already been registered.
+    """
+    if template.name in COMMANDS:
+        raise ValueError(f"command {template.name} is already registered")
+    COMMANDS[template.name] = template
+    return template
+
+
+# CommonModule
+FREEZE_SCREEN = register(CommandTemplate("freeze_screen", b"\x04\x00\x03\x00"))
+SCREEN_OFF = register(CommandTemplate("screen_off", b"\x05\x00\x07\x01\x00"))
+SCREEN_ON = register(CommandTemplate("screen_on", b"\x05\x00\x07\x01\x01"))
+SCREEN_NOT_FLIPPED = register(CommandTemplate("screen_not_flipped", b"\x05\x00\x06\x80\x00"))
+SCREEN_FLIPPED = register(CommandTemplate("screen_flipped", b"\x05\x00\x06\x80\x01"))
+BRIGHTNESS = register(CommandTemplate("brightness", b"\x05\x00\x04\x80", "B"))
+SPEED = register(CommandTemplate("speed", b"\x05\x00\x03\x01", "B"))
+# year (2 digits), month, day, weekday (1 = monday), hour, minute, second
+TIME = register(CommandTemplate("time", b"\x0b\x00\x01\x80", "7B"))
+JOINT = register(CommandTemplate("joint", b"\x05\x00\x0c\x80", "B"))
+# the 6 digits of the password, in pairs of two
+PASSWORD = register(CommandTemplate("password", b"\x08\x00\x04\x02\x01", "3B"))
+RESET = register(CommandTemplate("reset", b"\x04\x00\x03\x80"))
+
+# FullscreenColorModule: r, g, b
+FULLSCREEN_COLOR = register(CommandTemplate("fullscreen_color", b"\x07\x00\x02\x02", "3B"))
+
+# ImageModule: mode, see ImageMode
+IMAGE_MODE = register(CommandTemplate("image_mode", b"\x05\x00\x04\x01", "B"))
+
+# ClockModule: style and flags, r, g, b
+CLOCK = register(CommandTemplate("clock", b"\x08\x00\x06\x01", "4B"))
+CLOCK_TIME_INDICATOR_OFF = register(CommandTemplate("clock_time_indicator_off", b"\x05\x00\x07\x80\x00"))
+CLOCK_TIME_INDICATOR_ON = register(CommandTemplate("clock_time_indicator_on", b"\x05\x00\x07\x80\x01"))
+
+# CountdownModule: mode, minutes, seconds
+COUNTDOWN = register(CommandTemplate("countdown", b"\x07\x00\x08\x80", "3B"))
+COUNTDOWN_STOP = register(CommandTemplate("countdown_stop", b"\x07\x00\x08\x80\x00\x00\x00"))
+COUNTDOWN_PAUSE = register(CommandTemplate("countdown_pause", b"\x07\x00\x08\x80\x02\x00\x00"))
+COUNTDOWN_RESTART = register(CommandTemplate("countdown_restart", b"\x07\x00\x08\x80\x03\x00\x00"))
+
+# ScoreboardModule: both counters (little endian)
+SCOREBOARD = register(CommandTemplate("scoreboard", b"\x08\x00\x0a\x80", "2H"))
+
+# EffectModule: style, speed (fixed to 90), color count and the colors, one template per color count
+EFFECT_COLOR_COUNTS = range(2, 8)
+EFFECTS: Dict[int, CommandTemplate] = {
+    color_count: register(
+        CommandTemplate(f"effect_{color_count}_colors", bytes([6 + color_count, 0, 3, 2]), f"{3 + 3 * color_count}B")
+    )
+    for color_count in EFFECT_COLOR_COUNTS
+}
+
+
+class CommandBatch:
+    """
+    Encodes multiple commands into one contiguous buffer, e.g. to send them with a single write.
+    """
+
+    def __init__(self):
+        self._commands: List[Tuple[CommandTemplate, tuple]] = []
+        self._size = 0
+
+    def add(self, template: CommandTemplate, *parameters) -> "CommandBatch":
+        """
+        Adds a command to the batch.
+        Args:
+            template (CommandTemplate): The command, e.g. BRIGHTNESS.
+            *parameters: The parameters of the command.
+        Returns:
+            CommandBatch: This batch, so calls can be chained.
+        """
+        self._commands.append((template, parameters))
+        self._size += template.size
+        return self
+
+    def __len__(self):
+        return len(self._commands)
+
+    @property
+    def size(self) -> int:
+        """
+        Returns:
+            int: The size of all encoded commands in bytes.
+        """
+        return self._size
+
+    def encode(self) -> bytearray:
+        """
+        Encodes all commands of the batch, back to back.
+        Returns:
+            bytearray: The encoded commands.
+        Raises:
+            ValueError: If the parameters of a command don't fit its parameter format.
+        """
+        buffer = bytearray(self._size)
+        offset = 0
+        for template, parameters in self._commands:
+            template.encode_into(buffer, offset, *parameters)
+            offset += template.size
+        return buffer
+
+    def encode_packets(self) -> List[List[memoryview]]:
+        """
+        Encodes all commands of the batch into one buffer, and returns every command as a packet of its own.
+        Returns:
+            List[List[memoryview]]: One packet per command, as slices of the buffer.
+        """
+        view = memoryview(self.encode())
+        packets = []
+        offset = 0
+        for template, _ in self._commands:
+            packets.append([view[offset:offset + template.size]])
+            offset += template.size
+        return packets
@@ -1,13 +1,24 @@
 import asyncio
 import logging
+import time
 from asyncio import Task
 from collections.abc import Callable
 from typing import List, Optional, Awaitable, Any
 
 from bleak import BleakClient, BleakScanner, AdvertisementData
+from bleak.backends.characteristic import BleakGATTCharacteristic
 from bleak.exc import BleakDBusError
 
+from .command_queue import CommandQueue
 from .const import UUID_READ_DATA, UUID_CHARACTERISTIC_WRITE_DATA, BLUETOOTH_DEVICE_NAME
+from .metrics import MetricsRecorder, command_type, METRIC_TRANSFERS, METRIC_TRANSFER_ERRORS, \
+    METRIC_TRANSFER_BYTES, METRIC_TRANSFER_CHUNKS, METRIC_TRANSFER_DURATION, METRIC_WRITE_LATENCY, \
+    METRIC_RESPONSE_READ_LATENCY, METRIC_CONNECTS, METRIC_CONNECT_FAILURES, METRIC_CONNECT_DURATION, \
+    METRIC_RECONNECT_ATTEMPTS, METRIC_DISCONNECTS, METRIC_LOCK_WAIT
+from .pacer import AdaptivePacer
+from .transaction import Transaction, StepTiming, WAIT_NONE, WAIT_PACED, WAIT_ACKNOWLEDGEMENT
+from .transfer_job import TransferJob, TransferCancelledError
+from .util.chunk_planner import ChunkPlanner, MAX_WRITE_WITH_RESPONSE_SIZE
 
 
 class ConnectionListener:
@@ -26,7 +37,74 @@ class ConnectionListener:
         self.on_disconnected = on_disconnected
 
 
-connection_manager_lock = asyncio.Lock()
+class TransferStats:
+    def __init__(
+        self,
+        mode: str,
+        byte_count: int,
+        packet_count: int,
+        duration_seconds: float,
+    ):
+        """
+        Statistics about a single transfer done by the ConnectionManager.
+        Args:
+            mode (str): The transmit mode that was used, either TRANSFER_MODE_STRICT or TRANSFER_MODE_PIPELINED.
+            byte_count (int): The number of payload bytes that were written to the device.
+            packet_count (int): The number of (4K) protocol packets that were written to the device.
+            duration_seconds (float): The time the transfer took, in seconds.
+        """
+        self.mode = mode
+        self.byte_count = byte_count
+        self.packet_count = packet_count
+        self.duration_seconds = duration_seconds
+
+    @property
+    def bytes_per_second(self) -> float:
+        """
+        Returns:
+            float: The achieved throughput of the transfer in bytes per second.
+        """
+        if self.duration_seconds <= 0:
+            return 0.0
+        return self.byte_count / self.duration_seconds
+
+    def __str__(self):
+        return (
+            f"TransferStats(mode={self.mode}, byte_count={self.byte_count}, packet_count={self.packet_count}, "
+            f"duration_seconds={self.duration_seconds:.3f}, bytes_per_second={self.bytes_per_second:.0f})"
+        )
+
+
+TRANSFER_MODE_STRICT = "strict"
+TRANSFER_MODE_PIPELINED = "pipelined"
+# transfers done by send_bytes, only used as a metrics label
+TRANSFER_MODE_RAW = "raw"
+
+# number of 4K packets that may be in flight without an acknowledgement from the device in pipelined mode
+DEFAULT_PIPELINE_WINDOW = 2
+# time to wait for the device to acknowledge a 4K packet in pipelined mode before falling back to strict mode
+PIPELINE_ACK_TIMEOUT_SECONDS = 5.0
+
+
+class PipelineError(Exception):
+    """
+    Raised by a pipelined transfer that failed, e.g. because the device did not acknowledge a packet in time.
+    """
+
+    def __init__(self, acknowledged_packet_count: int, write_count: int, cause: Exception):
+        """
+        Args:
+            acknowledged_packet_count (int): The number of packets the device has acknowledged before the failure.
+                These packets have been accepted by the device and must not be sent again.
+            write_count (int): The number of writes done before the failure.
+            cause (Exception): The error that stopped the transfer.
+        """
+        message = f"{type(cause).__name__} after {acknowledged_packet_count} acknowledged packet(s)"
+        # some errors, e.g. a TimeoutError, have no message
+        super().__init__(f"{message}: {cause}" if str(cause) else message)
+        self.acknowledged_packet_count = acknowledged_packet_count
+        self.write_count = write_count
+        self.cause = cause
 
 
 class ConnectionManager:
@@ -35,12 +113,14 @@ class ConnectionManager:
     def __init__(
         self,
         address: Optional[str] = None,
+        metrics: Optional[MetricsRecorder] = None,
     ) -> None:
         """
         Initializes the ConnectionManager with an optional Bluetooth address.
         Args:
             address (Optional[str]): The Bluetooth address (MAC) of the iDotMatrix device, f.e. "00:11:22:33:44:55".
             If no address is provided, the instance can be used to discover devices and set the address later.
+            metrics (Optional[MetricsRecorder]): Receives metrics about transfers and connections, see set_metrics.
         """
         self.address: Optional[str] = None
         self.client: Optional[BleakClient] = None
@@ -49,12 +129,33 @@ class ConnectionManager:
             self.set_address(address)
 
         self._connected = False
+        # serializes connecting and disconnecting this device, other devices connect concurrently
+        self._connection_lock = asyncio.Lock()
 
         self._auto_reconnect = False
         self._is_auto_reconnect_active = False
         self._reconnect_loop_task: Optional[Task] = None
 
-        self._ble_packet_size = None
+        self._chunk_planner = ChunkPlanner()
+
+        self._pipelined = False
+        self._pipeline_window = DEFAULT_PIPELINE_WINDOW
+        # set if the device did not acknowledge a pipelined transfer, reset on the next connection
+        self._is_pipeline_suspended = False
+        self._is_notify_active = False
+        self._ack_queue: asyncio.Queue[bytearray] = asyncio.Queue()
+        self._last_transfer_stats: Optional[TransferStats] = None
+        # number of send operations, used to detect whether anything has been sent in the meantime
+        self.send_count = 0
+        self._metrics: Optional[MetricsRecorder] = metrics
+
+        self._pacer = AdaptivePacer()
+        self._adaptive_pacing = True
+        # set if the device does not support notifications, reset on the next connection
+        self._is_notify_unavailable = False
+        self._last_sent_at = 0.0
+        self._command_queue: Optional[CommandQueue] = None
+        self._is_bulk_preemption_enabled = False
 
         self._connection_listeners: List[ConnectionListener] = []
 
@@ -152,7 +253,11 @@ class ConnectionManager:
         Raises:
             ValueError: If the device address is not set.
         """
-        async with connection_manager_lock:
+        metrics = self._metrics
+        lock_requested_at = time.perf_counter() if metrics is not None else 0
+        async with self._connection_lock:
+            if metrics is not None:
+                metrics.observe(METRIC_LOCK_WAIT, time.perf_counter() - lock_requested_at, {"operation": "connect"})
             if self._auto_reconnect:
                 self._is_auto_reconnect_active = True
             if not self.address:
@@ -161,7 +266,16 @@ class ConnectionManager:
 
             if not self.is_connected():
                 self.logging.info(f"connecting to {self.address}...")
-                await self.client.connect()
+                connect_started_at = time.perf_counter() if metrics is not None else 0
+                try:
+                    await self.client.connect()
+                except Exception:
+                    if metrics is not None:
+                        metrics.increment(METRIC_CONNECT_FAILURES)
+                    raise
+                if metrics is not None:
+                    metrics.increment(METRIC_CONNECTS)
+                    metrics.observe(METRIC_CONNECT_DURATION, time.perf_counter() - connect_started_at)
                 self._connected = True
                 self.logging.info(f"connected to {self.address}")
 
@@ -186,13 +300,18 @@ class ConnectionManager:
         """
         # Disable auto-reconnect during active disconnection, it will be re-enabled on active connection attempt
         self._is_auto_reconnect_active = False
-        async with connection_manager_lock:
+        metrics = self._metrics
+        lock_requested_at = time.perf_counter() if metrics is not None else 0
+        async with self._connection_lock:
+            if metrics is not None:
+                metrics.observe(METRIC_LOCK_WAIT, time.perf_counter() - lock_requested_at, {"operation": "disconnect"})
             if self._reconnect_loop_task:
                 self._reconnect_loop_task.cancel()
                 self._reconnect_loop_task = None
             if self.is_connected():
                 await self.client.disconnect()
             self._connected = False
+            self._reset_pipeline_state()
 
     def is_connected(self) -> bool:
         """
@@ -216,100 +335,655 @@ class ConnectionManager:
             data (bytearray | bytes): The data to send to the device.
             response (bool): If True, a write-with-response operation will be used, otherwise a write-without-response operation will be used.
         """
+        if self._command_queue is not None:
+            await self._command_queue.submit(
+                self._command_queue.get_coalescing_key(data),
+                lambda: self._transmit_bytes(data, response),
+            )
+        else:
+            await self._transmit_bytes(data, response)
+
+    async def _transmit_bytes(self, data: bytearray | bytes, response: bool):
         if not self.is_connected():
             await self.connect()
 
+        await self._pacer.wait_until_ready()
+        self._discard_acknowledgements()
+        self.send_count += 1
         self.logging.debug("sending raw data to device")
-        ble_packet_size = await self.get_max_bytes_per_chunk(response)
-        for packet in range(0, len(data), ble_packet_size):
-            self.logging.debug(f"sending chunk {packet // ble_packet_size + 1} of {len(data) // ble_packet_size + 1}")
-            await self.client.write_gatt_char(
-                char_specifier=UUID_CHARACTERISTIC_WRITE_DATA,
-                data=data[packet:packet + ble_packet_size],
-                response=response)
+        metrics = self._metrics
+        labels = {"command": command_type(data)} if metrics is not None else None
+        start_time = time.perf_counter()
+        try:
+            chunk_count = await self._write_chunks(data, response=response, labels=labels, is_response_for_all=True)
+        except Exception:
+            if metrics is not None:
+                metrics.increment(METRIC_TRANSFER_ERRORS, labels=labels)
+            raise
+        self._last_sent_at = time.perf_counter()
+
+        if metrics is not None:
+            self._record_transfer_metrics(
+                labels=labels,
+                mode=TRANSFER_MODE_RAW,
+                byte_count=len(data),
+                chunk_count=chunk_count,
+                duration_seconds=time.perf_counter() - start_time,
+            )
 
-    async def send_packets(self, packets: List[List[bytearray | bytes]], response: bool = False):
+    async def send_packets(
+        self,
+        packets: List[List[bytearray | bytes]],
+        response: bool = False,
+        job: Optional[TransferJob] = None,
+    ):
         """
         Sends multiple packets to the device.
         Each packet is a list of bytearrays or bytes, which will be sent sequentially.
         The structure of the packets depends on the command being sent to the device.
-        If the data needs to be sent in chunks, the caller needs to ensure that the packets are split accordingly.
         Keep in mind that there are two chunking mechanisms:
         1. The outer chunking for the data itself, which is defined in the protocol for a command.
-        2. The inner chunking for transmitting over BLE, which is defined by the MTU size of the BLE connection, or the protocol of the command.
+           The caller needs to ensure that the packets are split accordingly.
+        2. The inner chunking for transmitting over BLE, which is defined by the MTU size of the BLE connection.
+           The chunks of each packet are joined and re-sliced to the largest write size the connection supports,
+           stepping down to smaller write sizes if a write fails (see ChunkPlanner).
+
+        If pipelined transfers are enabled (see set_pipelined_transfer) and a response is requested, the packets
+        are sent using write-without-response only, and the notifications of the device are used as the
+        acknowledgement of each packet. If the device fails to acknowledge a packet, the transfer is repeated
+        in strict mode.
+
+        If a TransferJob is given, it receives the progress of the transfer, and cancelling it stops the transfer
+        before its next packet. A write that fails while the device is still connected is retried at the failed
+        chunk (up to TransferJob.max_retries times). If the connection is lost, the device discards the partially
+        received transfer, so the transfer starts over with the first packet once the connection is re-established.
         Args:
             packets: A list of packets, where each packet is a list of bytearrays or bytes.
             response: If True, a write-with-response operation will be used, otherwise a write-without-response operation will be used.
+            job: Tracks the progress of the transfer and allows to cancel it.
+        Raises:
+            TransferCancelledError: If the job has been cancelled.
         """
         if len(packets) == 0:
             self.logging.warning("no packets to send, skipping")
+            if job is not None:
+                job.complete()
+            return
+        if self._command_queue is not None:
+            # multi-packet transfers are never coalesced, but keep their order relative to the other commands
+            await self._command_queue.submit(None, lambda: self._transmit_packets(packets, response, job))
+        else:
+            await self._transmit_packets(packets, response, job)
+
+    async def _transmit_packets(
+        self,
+        packets: List[List[bytearray | bytes]],
+        response: bool,
+        job: Optional[TransferJob] = None,
+    ):
+        await self._pacer.wait_until_ready()
+        if job is None:
+            await self._transfer_packets(packets, response)
             return
+        try:
+            job.raise_if_cancelled()
+            await self._transfer_packets(packets, response, job)
+        except (TransferCancelledError, asyncio.CancelledError):
+            job.set_cancelled()
+            raise
+        except Exception as e:
+            job.fail(e)
+            raise
+        job.complete()
+
+    async def run_transaction(self, transaction: Transaction) -> List[StepTiming]:
+        """
+        Runs the steps of a transaction in order, e.g. switching the device to another mode and uploading an image.
+
+        The link is held for the whole transaction: the connection is checked once, and with command coalescing
+        the transaction is queued as a single command, so no other command is sent between its steps. Between two
+        steps, only the wait condition of the first one is awaited (see Transaction), instead of a fixed sleep.
+        The gap of the last step delays the next command sent after the transaction.
+        Args:
+            transaction (Transaction): The steps to run.
+        Returns:
+            List[StepTiming]: The timing of every step.
+        """
+        timings: List[StepTiming] = []
+        if len(transaction) == 0:
+            return timings
+        if self._command_queue is not None:
+            await self._command_queue.submit(None, lambda: self._run_transaction_steps(transaction, timings))
+        else:
+            await self._run_transaction_steps(transaction, timings)
+        return timings
+
+    async def _run_transaction_steps(self, transaction: Transaction, timings: List[StepTiming]):
+        if not self.is_connected():
+            await self.connect()
+        if any(step.wait != WAIT_NONE for step in transaction.steps):
+            # subscribe before the first step is sent, so its acknowledgement is not missed
+            await self._subscribe_to_acknowledgements()
+
+        previous_step_end = time.perf_counter()
+        for step in transaction.steps:
+            await self._pacer.wait_until_ready()
+            send_start = time.perf_counter()
+            # like send_packets, so the response of the device is read after every packet of a response step
+            await self._transfer_packets(step.packets, step.response)
+            send_end = time.perf_counter()
+
+            acknowledged = None
+            if step.wait == WAIT_PACED:
+                await self.pace(data=step.first_chunk, default_gap=step.gap)
+            elif step.wait == WAIT_ACKNOWLEDGEMENT:
+                acknowledged = await self._wait_for_acknowledgement(timeout=step.gap)
+                if not acknowledged:
+                    # e.g. the device does not support notifications, wait for the rest of the gap instead
+                    self._pacer.defer(step.gap - (time.perf_counter() - send_end))
+            timings.append(
+                StepTiming(
+                    name=step.name,
+                    wait_seconds=send_start - previous_step_end,
+                    send_seconds=send_end - send_start,
+                    acknowledged=acknowledged,
+                )
+            )
+            previous_step_end = send_end
+
+    async def _transfer_packets(
+        self,
+        packets: List[List[bytearray | bytes]],
+        response: bool,
+        job: Optional[TransferJob] = None,
+    ):
         if not self.is_connected():
             await self.connect()
 
+        # the caller has waited for the pacer already
+        self._discard_acknowledgements()
+        self.send_count += 1
+
         total_byte_count = 0
         for packet in packets:
             for ble_packet in packet:
                 total_byte_count += len(ble_packet)
 
         self.logging.debug(
-            f"sending {len(packets)} packet(s) in chunks of size {len(packets[0][0])} bytes to device, for a total size of {total_byte_count} bytes"
+            f"sending {len(packets)} packet(s) in chunks of up to {await self.get_max_bytes_per_chunk(False)} bytes "
+            f"to device, for a total size of {total_byte_count} bytes"
         )
 
-        ble_packet_size = await self.get_max_bytes_per_chunk(response)
-        self.logging.debug(f"ble_packet_size size is {ble_packet_size} bytes")
-
-        # restructure packets to fit the BLE packet size
-        # restructured_packets = []
-        # for packet in packets:
-        #     restructured_packet = []
-        #     # first combine all packets into one bytearray
-        #     combined_packet = bytearray()
-        #     for ble_packet in packet:
-        #         combined_packet.extend(ble_packet)
-        #     # then split the combined packet into chunks of size ble_packet_size
-        #     for i in range(0, len(combined_packet), ble_packet_size):
-        #         restructured_packet.append(combined_packet[i:i + ble_packet_size])
-        #     restructured_packets.append(restructured_packet)
-        # packets = restructured_packets
-
-        for i, packet in enumerate(packets):
-            for j, ble_paket in enumerate(packet):
-                self.logging.debug(f"sending packet {i + 1}.{j + 1} of {len(packets)}.{len(packets[-1])}")
-                wait_for_response = response if j == len(packet) - 1 else False
+        metrics = self._metrics
+        labels = {"command": command_type(packets[0][0])} if metrics is not None else None
+        if job is not None:
+            job.start(packet_count=len(packets), byte_count=total_byte_count)
+        start_time = time.perf_counter()
+        mode = TRANSFER_MODE_STRICT
+        try:
+            if response and self._pipelined and not self._is_pipeline_suspended:
+                try:
+                    chunk_count = await self._send_packets_pipelined(packets, labels, job)
+                    mode = TRANSFER_MODE_PIPELINED
+                except PipelineError as e:
+                    self.logging.warning(f"pipelined transfer failed, falling back to strict mode: {e}")
+                    self._is_pipeline_suspended = True
+                    # the acknowledged packets have been accepted by the device, continue with the first one that was not
+                    chunk_count = e.write_count + await self._send_packets_strict(
+                        packets, response, labels, job, start_index=e.acknowledged_packet_count,
+                    )
+            else:
+                chunk_count = await self._send_packets_strict(packets, response, labels, job)
+        except Exception:
+            if metrics is not None:
+                metrics.increment(METRIC_TRANSFER_ERRORS, labels=labels)
+            raise
+        self._last_sent_at = time.perf_counter()
+
+        self._last_transfer_stats = TransferStats(
+            mode=mode,
+            byte_count=total_byte_count,
+            packet_count=len(packets),
+            duration_seconds=time.perf_counter() - start_time,
+        )
+        self.logging.debug(f"transfer finished: {self._last_transfer_stats}")
+        if metrics is not None:
+            self._record_transfer_metrics(
+                labels=labels,
+                mode=mode,
+                byte_count=total_byte_count,
+                chunk_count=chunk_count,
+                duration_seconds=self._last_transfer_stats.duration_seconds,
+            )
+
+    def _record_transfer_metrics(
+        self,
+        labels: dict,
+        mode: str,
+        byte_count: int,
+        chunk_count: int,
+        duration_seconds: float,
+    ):
+        transfer_labels = {**labels, "mode": mode}
+        self._metrics.increment(METRIC_TRANSFERS, labels=transfer_labels)
+        self._metrics.increment(METRIC_TRANSFER_BYTES, byte_count, labels=transfer_labels)
+        self._metrics.increment(METRIC_TRANSFER_CHUNKS, chunk_count, labels=transfer_labels)
+        self._metrics.observe(METRIC_TRANSFER_DURATION, duration_seconds, labels=transfer_labels)
+
+    async def _write_chunks(
+        self,
+        data: bytearray | bytes,
+        response: bool,
+        labels: Optional[dict] = None,
+        is_response_for_all: bool = False,
+        job: Optional[TransferJob] = None,
+    ) -> int:
+        """
+        Writes the data in chunks of the largest write size the connection supports.
+        If a write fails, the write size is stepped down and the failed chunk is written again in smaller chunks.
+        Once no smaller write size is left, the failed chunk is written again while the job allows retries.
+        Args:
+            data: The data to write, e.g. a whole protocol packet.
+            response: If True, a write-with-response operation will be used for the last chunk.
+            labels: Metrics labels of the transfer, None if metrics are disabled.
+            is_response_for_all: If True, the response setting applies to all chunks instead of the last one only.
+            job: The transfer job the data belongs to, if any.
+        Returns:
+            int: The number of writes.
+        """
+        metrics = self._metrics if labels is not None else None
+        view = memoryview(data)
+        offset = 0
+        write_count = 0
+        while offset < len(view):
+            write_size = await self.get_max_bytes_per_chunk(response and is_response_for_all)
+            end = min(offset + write_size, len(view))
+            if response and end == len(view) and end - offset > MAX_WRITE_WITH_RESPONSE_SIZE:
+                # the last chunk is written with response, which is limited to fewer bytes
+                end -= MAX_WRITE_WITH_RESPONSE_SIZE
+            with_response = response and (is_response_for_all or end == len(view))
+            self.logging.debug(f"writing bytes {offset}-{end} of {len(view)}")
+
+            write_started_at = time.perf_counter() if metrics is not None else 0
+            try:
                 await self.client.write_gatt_char(
                     char_specifier=UUID_CHARACTERISTIC_WRITE_DATA,
-                    data=ble_paket,
-                    response=wait_for_response
+                    data=view[offset:end],
+                    response=with_response
                 )
-                if wait_for_response:
-                    try:
-                        response_data = await self.client.read_gatt_char(UUID_READ_DATA)
-                        self.logging.debug(f"received response data: {response_data}")
-                    except BleakDBusError as e:
-                        if e.dbus_error == "org.bluez.Error.NotPermitted":
-                            pass
-                        else:
-                            self.logging.error(f"error while reading response data: {e}")
-                            # self.logging.warning("no response received, this is expected for some commands")
-                    except Exception as e:
+            except Exception as e:
+                if not self.client.is_connected:
+                    raise
+                if self._chunk_planner.step_down(self.address, end - offset) is None:
+                    if job is None or not job.can_retry():
+                        raise
+                    # the device has received the data up to the failed chunk, so only that chunk is written again
+                    await job.retry(e)
+                continue
+            if metrics is not None:
+                metrics.observe(METRIC_WRITE_LATENCY, time.perf_counter() - write_started_at, labels)
+            write_count += 1
+            offset = end
+        return write_count
+
+    async def _send_packets_strict(
+        self,
+        packets: List[List[bytearray | bytes]],
+        response: bool,
+        labels: Optional[dict] = None,
+        job: Optional[TransferJob] = None,
+        start_index: int = 0,
+    ) -> int:
+        """
+        Sends the packets one after another, waiting for a write response and reading
+        the response of the device after the last chunk of each packet (if response is True).
+        Args:
+            packets: A list of packets, where each packet is a list of bytearrays or bytes.
+            response: If True, a write-with-response operation will be used for the last chunk of each packet.
+            labels: Metrics labels of the transfer, None if metrics are disabled.
+            job: Receives the progress of the transfer, and allows to cancel it and to retry failed writes.
+            start_index: Index of the first packet to send, e.g. because the device has already accepted the packets
+                before it. After a reconnect, the transfer always starts over with the first packet.
+        Returns:
+            int: The number of writes.
+        Raises:
+            TransferCancelledError: If the job has been cancelled.
+        """
+        metrics = self._metrics if labels is not None else None
+        write_count = 0
+        i = start_index
+        while i < len(packets):
+            if job is not None:
+                job.raise_if_cancelled()
+            if i > start_index:
+                await self._send_preempting_commands()
+            self.logging.debug(f"sending packet {i + 1} of {len(packets)}")
+            data = ChunkPlanner.join(packets[i])
+            try:
+                write_count += await self._write_chunks(data, response=response, labels=labels, job=job)
+            except Exception as e:
+                if job is None or not job.can_retry() or self.client.is_connected:
+                    raise
+                await job.retry(e)
+                # the device discards a partially received transfer when the connection is lost
+                await self._reconnect()
+                job.restart()
+                i = start_index = 0
+                continue
+            if response:
+                read_started_at = time.perf_counter() if metrics is not None else 0
+                try:
+                    response_data = await self.client.read_gatt_char(UUID_READ_DATA)
+                    if metrics is not None:
+                        metrics.observe(METRIC_RESPONSE_READ_LATENCY, time.perf_counter() - read_started_at, labels)
+                    self.logging.debug(f"received response data: {response_data}")
+                except BleakDBusError as e:
+                    if e.dbus_error == "org.bluez.Error.NotPermitted":
+                        pass
+                    else:
                         self.logging.error(f"error while reading response data: {e}")
+                        # self.logging.warning("no response received, this is expected for some commands")
+                except Exception as e:
+                    self.logging.error(f"error while reading response data: {e}")
+            if job is not None:
+                job.record_packet(len(data))
+            i += 1
+        return write_count
+
+    async def _reconnect(self):
+        """
+        Re-establishes a connection that has been lost during a transfer, without waiting for the auto-reconnect loop.
+        """
+        self.logging.info(f"connection to {self.address} lost during a transfer, reconnecting...")
+        self._connected = False
+        self._reset_pipeline_state()
+        await self.connect()
+
+    async def _send_preempting_commands(self):
+        """
+        Sends the pending control commands of the command queue between two packets of a transfer,
+        if bulk preemption is enabled (see set_bulk_preemption).
+        """
+        if not self._is_bulk_preemption_enabled or self._command_queue is None:
+            return
+        if not self._command_queue.has_pending_control_commands():
+            return
+        await self._command_queue.send_control_commands()
+        # let the callers pace the commands they just sent, before the transfer continues
+        await asyncio.sleep(0)
+        await self._pacer.wait_until_ready()
+
+    async def _send_packets_pipelined(
+        self,
+        packets: List[List[bytearray | bytes]],
+        labels: Optional[dict] = None,
+        job: Optional[TransferJob] = None,
+    ) -> int:
+        """
+        Sends the packets using write-without-response only, keeping at most `_pipeline_window` packets
+        in flight that have not been acknowledged by a notification of the device yet.
+        Args:
+            packets: A list of packets, where each packet is a list of bytearrays or bytes.
+            labels: Metrics labels of the transfer, None if metrics are disabled.
+            job: Receives the progress of the transfer, and allows to cancel it.
+        Returns:
+            int: The number of writes.
+        Raises:
+            PipelineError: If the device does not acknowledge a packet in time, or a write fails.
+            TransferCancelledError: If the job has been cancelled.
+        """
+        acknowledged_packet_count = 0
+        write_count = 0
+        try:
+            await self._start_notify()
+
+            self._discard_acknowledgements()
+
+            packets_in_flight = 0
+            for i, packet in enumerate(packets):
+                while packets_in_flight >= self._pipeline_window:
+                    await self._wait_for_ack()
+                    self._record_acknowledged_packet(packets[acknowledged_packet_count], job)
+                    packets_in_flight -= 1
+                    acknowledged_packet_count += 1
+
+                if job is not None:
+                    job.raise_if_cancelled()
+                self.logging.debug(f"sending packet {i + 1} of {len(packets)} ({packets_in_flight} in flight)")
+                write_count += await self._write_chunks(ChunkPlanner.join(packet), response=False, labels=labels)
+                packets_in_flight += 1
+
+            while packets_in_flight > 0:
+                await self._wait_for_ack()
+                self._record_acknowledged_packet(packets[acknowledged_packet_count], job)
+                packets_in_flight -= 1
+                acknowledged_packet_count += 1
+            return write_count
+        except TransferCancelledError:
+            raise
+        except Exception as e:
+            raise PipelineError(acknowledged_packet_count, write_count, e) from e
+
+    @staticmethod
+    def _record_acknowledged_packet(packet: List[bytearray | bytes], job: Optional[TransferJob]):
+        if job is not None:
+            job.record_packet(sum(len(chunk) for chunk in packet))
+
+    async def _wait_for_ack(self):
+        """
+        Waits for the device to acknowledge a packet via a notification on UUID_READ_DATA.
+        Raises:
+            asyncio.TimeoutError: If no acknowledgement is received within PIPELINE_ACK_TIMEOUT_SECONDS.
+        """
+        ack = await asyncio.wait_for(self._ack_queue.get(), timeout=PIPELINE_ACK_TIMEOUT_SECONDS)
+        self.logging.debug(f"received acknowledgement: {ack}")
+
+    async def _start_notify(self):
+        """
+        Subscribes to the notifications of UUID_READ_DATA, if not already subscribed for the current connection.
+        """
+        if self._is_notify_active:
+            return
+        await self.client.start_notify(UUID_READ_DATA, self._on_notification)
+        self._is_notify_active = True
+
+    def _discard_acknowledgements(self):
+        """
+        Discards the acknowledgements of previous commands.
+        """
+        while not self._ack_queue.empty():
+            self._ack_queue.get_nowait()
+
+    async def _subscribe_to_acknowledgements(self) -> bool:
+        """
+        Starts the notifications on UUID_READ_DATA, which the device uses to acknowledge commands.
+        Returns:
+            bool: True if notifications are available, False otherwise.
+        """
+        if self._is_notify_unavailable:
+            return False
+        try:
+            await self._start_notify()
+        except Exception as e:
+            self.logging.info(f"notifications are not available, pacing commands without acknowledgements: {e}")
+            self._is_notify_unavailable = True
+            return False
+        return True
+
+    async def _wait_for_acknowledgement(self, timeout: float) -> bool:
+        """
+        Waits for the device to acknowledge the last command via a notification on UUID_READ_DATA.
+        Args:
+            timeout (float): The maximum time to wait in seconds.
+        Returns:
+            bool: True if the command has been acknowledged, False if notifications are not available or the timeout expired.
+        """
+        if not await self._subscribe_to_acknowledgements():
+            return False
+        try:
+            await asyncio.wait_for(self._ack_queue.get(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def pace(self, data: bytearray | bytes, default_gap: float) -> None:
+        """
+        Paces the command that has just been sent, so the device has time to process it before it receives
+        the next command. Instead of sleeping, the next send is delayed until the device is ready.
+
+        With adaptive pacing, the gap is learned per command type from the acknowledgements of the device:
+        until enough acknowledgements have been seen, this waits for the acknowledgement of the command
+        (at most default_gap). Commands that are not acknowledged are paced with default_gap.
+        Args:
+            data (bytearray | bytes): The command that has just been sent, or its first chunk.
+            default_gap (float): The conservative time in seconds the device needs to process the command.
+        """
+        if not self._adaptive_pacing:
+            self._pacer.defer(default_gap)
+            return
+
+        command = command_type(data)
+        if self._pacer.has_learned_gap(command) or not self._pacer.expects_acknowledgement(command):
+            self._pacer.defer(self._pacer.get_gap(command, default_gap))
+            return
+
+        # defer the next command right away, as it may already be waiting in the command queue
+        self._pacer.defer(default_gap - (time.perf_counter() - self._last_sent_at))
+        if await self._wait_for_acknowledgement(timeout=default_gap):
+            self._pacer.record_acknowledgement(command, time.perf_counter() - self._last_sent_at)
+            self._pacer.set_ready()
+        else:
+            self._pacer.record_missing_acknowledgement(command)
+
+    def _on_notification(self, sender: BleakGATTCharacteristic, data: bytearray):
+        """
+        Callback function that is called when the device sends a notification on UUID_READ_DATA.
+        Args:
+            sender (BleakGATTCharacteristic): The characteristic that sent the notification.
+            data (bytearray): The data of the notification.
+        """
+        self._ack_queue.put_nowait(data)
+
+    def _reset_pipeline_state(self):
+        """
+        Resets the per-connection state of pipelined transfers.
+        """
+        self._is_notify_active = False
+        self._is_notify_unavailable = False
+        self._is_pipeline_suspended = False
+
+    def set_pipelined_transfer(self, enabled: bool, window: int = DEFAULT_PIPELINE_WINDOW) -> None:
+        """
+        Sets whether multi-packet transfers that expect a response should be pipelined.
+        Args:
+            enabled (bool): True to enable pipelined transfers, False to always use strict mode.
+            window (int): The maximum number of packets that may be in flight without an acknowledgement of the device.
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self._pipelined = enabled
+        self._pipeline_window = window
+        self._is_pipeline_suspended = False
+
+    def set_command_coalescing(self, enabled: bool) -> None:
+        """
+        Sets whether all commands should be sent through a CommandQueue, which coalesces idempotent "set state"
+        commands (brightness, color, screen on/off, ...) that are superseded by a newer command before they are sent.
+        Only has an effect if commands are sent concurrently, e.g. by several tasks.
+        Args:
+            enabled (bool): True to queue and coalesce commands, False to send every command directly.
+        """
+        if enabled and self._command_queue is None:
+            self._command_queue = CommandQueue()
+        elif not enabled and self._command_queue is not None:
+            self._command_queue.clear()
+            self._command_queue = None
+
+    def set_bulk_preemption(self, enabled: bool) -> None:
+        """
+        Sets whether pending control commands (brightness, screen on/off, ...) of the command queue may be sent
+        between two packets of a multi-packet transfer, instead of waiting for the whole transfer.
+        Only has an effect if command coalescing is enabled, and not for pipelined transfers, which have several
+        packets in flight.
+        Args:
+            enabled (bool): True to let control commands preempt bulk transfers.
+        """
+        self._is_bulk_preemption_enabled = enabled
+
+    @property
+    def command_queue(self) -> Optional[CommandQueue]:
+        """
+        Returns:
+            Optional[CommandQueue]: The queue all commands are sent through, or None if command coalescing is disabled.
+        """
+        return self._command_queue
+
+    def set_adaptive_pacing(self, enabled: bool) -> None:
+        """
+        Sets whether the gap between commands should be learned from the acknowledgements of the device (see pace).
+        Args:
+            enabled (bool): True to learn the gaps, False to always use the default gap of each command.
+        """
+        self._adaptive_pacing = enabled
+
+    @property
+    def pacer(self) -> AdaptivePacer:
+        """
+        Returns:
+            AdaptivePacer: Paces the commands sent to the device, and holds the learned gaps per command type.
+        """
+        return self._pacer
+
+    def set_metrics(self, metrics: Optional[MetricsRecorder]) -> None:
+        """
+        Sets the recorder that receives metrics about transfers (bytes, chunks, write and response latencies
+        per command type) and connections (connects, reconnect attempts, time spent waiting for the connection lock).
+        Args:
+            metrics (Optional[MetricsRecorder]): The recorder, e.g. an InMemoryMetrics instance, or None to disable metrics.
+        """
+        self._metrics = metrics
+
+    @property
+    def metrics(self) -> Optional[MetricsRecorder]:
+        """
+        Returns:
+            Optional[MetricsRecorder]: The recorder that receives metrics, or None if metrics are disabled.
+        """
+        return self._metrics
+
+    @property
+    def last_transfer_stats(self) -> Optional[TransferStats]:
+        """
+        Returns:
+            Optional[TransferStats]: Statistics of the last transfer done by send_packets, or None if nothing has been sent yet.
+        """
+        return self._last_transfer_stats
 
     async def get_max_bytes_per_chunk(self, response: bool) -> int:
+        """
+        Returns the largest write size the connection to the device supports, probing it on first use.
+        Args:
+            response (bool): Whether the write is done with response, which is limited to 512 bytes.
+        Returns:
+            int: The maximum number of bytes per write.
+        """
+        write_size = self._chunk_planner.get_write_size(self.address)
+        if write_size is None:
+            char = self.client.services.get_characteristic(UUID_CHARACTERISTIC_WRITE_DATA)
+            write_size = self._chunk_planner.probe(
+                self.address, char.max_write_without_response_size if char is not None else None,
+            )
         if response:
-            # Maximum write size with response is limited to 512 bytes
-            # see: https://bleak.readthedocs.io/en/latest/api/client.html#bleak.BleakClient.write_gatt_char
-            return 512
-        else:
-            if self._ble_packet_size is None:
-                char = self.client.services.get_characteristic(UUID_CHARACTERISTIC_WRITE_DATA)
-                if char.max_write_without_response_size != 20:
-                    self._ble_packet_size = char.max_write_without_response_size
-                else:
-                    # my 64x64 device reports a max_write_without_response_size of 514 bytes, most of the time
-                    self._ble_packet_size = 514
+            return min(write_size, MAX_WRITE_WITH_RESPONSE_SIZE)
+        return write_size
 
-        return self._ble_packet_size
+    @property
+    def chunk_planner(self) -> ChunkPlanner:
+        """
+        Returns:
+            ChunkPlanner: Keeps track of the write size the connection to the device supports.
+        """
+        return self._chunk_planner
 
     async def read(self) -> bytes:
         if not self.client.is_connected:
@@ -345,7 +1019,10 @@ class ConnectionManager:
             return
 
         self._connected = False
+        self._reset_pipeline_state()
         self.logging.info(f"disconnected from {client.address}")
+        if self._metrics is not None:
+            self._metrics.increment(METRIC_DISCONNECTS)
         for listener in self._connection_listeners:
             if listener.on_disconnected:
                 asyncio.ensure_future(listener.on_disconnected())
@@ -364,6 +1041,8 @@ class ConnectionManager:
         while self._auto_reconnect and self._is_auto_reconnect_active and not self.is_connected():
             try:
                 await asyncio.sleep(5)  # Wait before trying to reconnect
+                if self._metrics is not None:
+                    self._metrics.increment(METRIC_RECONNECT_ATTEMPTS)
                 await self.connect()
             except asyncio.CancelledError:
                 self.logging.info("Reconnection loop cancelled.")
@@ -2,27 +2,31 @@ import asyncio
 import logging
 import re
 import signal
+import threading
 from asyncio import sleep, Task
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
 from os import PathLike
 from pathlib import Path
 from random import shuffle
-from typing import List
-
-from watchdog.observers.inotify import InotifyObserver
-from watchdog.observers.polling import PollingObserver
+from typing import Dict, List, Tuple, TYPE_CHECKING
 
+from idotmatrix import commands
 from idotmatrix.client import IDotMatrixClient
 from idotmatrix.connection_manager import ConnectionListener
 from idotmatrix.modules.image import ImageMode
-from idotmatrix.util.file_watch import ImageFileEventHandler
+from idotmatrix.transaction import Transaction
 from idotmatrix.util.image_utils import ResizeMode
 
-FilesystemObserver = InotifyObserver | PollingObserver
+if TYPE_CHECKING:
+    # watchdog is only imported when a folder is watched, see _setup_file_observers
+    from watchdog.observers.api import BaseObserver as FilesystemObserver
 
 IMAGE_FILE_EXTENSIONS = {".png", ".jpg", ".jpeg"}
 ANIMATION_FILE_EXTENSIONS = {".gif"}
 SUPPORTED_FILE_EXTENSIONS = IMAGE_FILE_EXTENSIONS.union(ANIMATION_FILE_EXTENSIONS)
+# time the device needs to process an uploaded GIF before it can receive the next command
+GIF_PROCESSING_SECONDS = 3
 
 
 class PictureFrameGif:
@@ -57,6 +61,7 @@ class PictureFrameImage:
 
 
 DEFAULT_INTERVAL_SECONDS = 30
+DEFAULT_PREFETCH_COUNT = 1
 
 
 class FileObserverType(Enum):
@@ -77,6 +82,7 @@ class DigitalPictureFrame:
         resize_mode: ResizeMode = ResizeMode.FIT,
         interval_seconds: int = DEFAULT_INTERVAL_SECONDS,
         shuffle_images: bool = False,
+        prefetch_count: int = DEFAULT_PREFETCH_COUNT,
     ):
         """
         Initializes the DigitalPictureFrame with a device client and optional images.
@@ -86,6 +92,8 @@ class DigitalPictureFrame:
             resize_mode (ResizeMode): The mode to use for resizing images (ResizeMode.FIT, ResizeMode.FILL, ResizeMode.STRETCH).
             interval_seconds (int): The time in seconds between image changes in the slideshow. Defaults to 30 seconds.
             shuffle_images (bool): Whether to shuffle the images in the slideshow. Defaults to False.
+            prefetch_count (int): The number of upcoming images/GIFs to encode in the background while the current one
+                is displayed. Set to 0 to disable prefetching. Defaults to 1.
         """
         self.device_client: IDotMatrixClient = device_client
         self.device_client.set_auto_reconnect(True)
@@ -99,7 +107,7 @@ class DigitalPictureFrame:
         self.interval_seconds: int = interval_seconds
         self._shuffle_images = shuffle_images
 
-        self._filesystem_observers: List[FilesystemObserver] = []
+        self._filesystem_observers: List["FilesystemObserver"] = []
 
         self._current_slideshow_index: int = -1  # Start with -1 to ensure the first call to next() works correctly
         self._last_set_image: PictureFrameImage | PictureFrameGif | PathLike | str | None = ""
@@ -109,6 +117,14 @@ class DigitalPictureFrame:
         self._is_paused: bool = False
         self._is_in_diy_mode: bool = False
 
+        self.prefetch_count: int = prefetch_count
+        # encoding is done in a separate thread, so the event loop is not blocked by Pillow,
+        # created on demand and shut down when the slideshow is stopped
+        self._prefetch_executor: ThreadPoolExecutor | None = None
+        # the file watchers modify the list of images from their own threads
+        self._prefetch_lock = threading.Lock()
+        self._prefetched: Dict[Tuple, Future] = {}
+
     def _setup_connection_listener(self):
         """
         Due to the device not beeing the most stable, and the connection also being lost sometimes,
@@ -223,6 +239,7 @@ class DigitalPictureFrame:
             raise ValueError("Image must be of type PictureFrameImage, PictureFrameGif, PathLike, or str.")
 
         self.images.append(image)
+        self._invalidate_prefetched()
         self.logging.info(f"Added image: {image}")
 
     def remove_image(self, image: PictureFrameImage | PictureFrameGif | PathLike | str):
@@ -234,6 +251,7 @@ class DigitalPictureFrame:
         """
         if image in self.images:
             self.images.remove(image)
+            self._invalidate_prefetched()
             self.logging.info(f"Removed image: {image}")
         else:
             self.logging.warning(f"Image not found in slideshow: {image}")
@@ -247,6 +265,7 @@ class DigitalPictureFrame:
 
         self.logging.info("Shuffling images in slideshow")
         shuffle(self.images)
+        self._invalidate_prefetched()
 
         if self._last_set_image is not None:
             current_image = self._get_current_image()
@@ -287,6 +306,8 @@ class DigitalPictureFrame:
 
         asyncio.get_event_loop().add_signal_handler(signal.SIGINT, lambda: signal_handler(signal.SIGINT))
         asyncio.get_event_loop().add_signal_handler(signal.SIGTERM, lambda: signal_handler(signal.SIGTERM))
+        with self._prefetch_lock:
+            self._get_prefetch_executor()
         self._slideshow_task = self._start_slideshow_task()
         await asyncio.sleep(0)
         return self._slideshow_task
@@ -315,6 +336,11 @@ class DigitalPictureFrame:
             self.logging.info("Stopping slideshow")
             self._slideshow_task.cancel()
             self._slideshow_task = None
+        self._invalidate_prefetched()
+        with self._prefetch_lock:
+            executor, self._prefetch_executor = self._prefetch_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
 
         # we don't have a way to know what the device was showing before the slideshow started,
         # so we simply show the clock
@@ -400,74 +426,166 @@ class DigitalPictureFrame:
         else:
             if len(self.images) > 1:
                 self.logging.info(f"Skipping image '{next_image}' as it is already being displayed currently.")
+        self._prefetch_upcoming()
 
     async def _switch_to(self, image: PictureFrameImage | PictureFrameGif | PathLike | str) -> str:
-        if isinstance(image, PictureFrameImage):
-            image_path = image.file_path
-            await self._set_image(image_path)
-        elif isinstance(image, PictureFrameGif):
-            image_path = image.file_path
+        is_gif, image_path, duration_per_frame_in_ms = self._resolve_image(image)
+        packets = await self._get_packets(image)
+        if is_gif:
             await self._set_gif(
                 file_path=image_path,
-                duration_per_frame_in_ms=image.duration_per_frame_in_ms
+                packets=packets,
+                duration_per_frame_in_ms=duration_per_frame_in_ms,
             )
+        else:
+            await self._set_image(
+                file_path=image_path,
+                packets=packets,
+            )
+
+        self._last_set_image = image
+        return image_path
+
+    @staticmethod
+    def _resolve_image(image: PictureFrameImage | PictureFrameGif | PathLike | str) -> Tuple[bool, PathLike | str, int | None]:
+        """
+        Returns:
+            Tuple[bool, PathLike | str, int | None]: Whether the image is a GIF, its file path and the duration per frame of a GIF.
+        """
+        if isinstance(image, PictureFrameImage):
+            return False, image.file_path, None
+        elif isinstance(image, PictureFrameGif):
+            return True, image.file_path, image.duration_per_frame_in_ms
         elif isinstance(image, (PathLike, str)):
             # If it's a string or PathLike, treat it as a file path
             if isinstance(image, PathLike):
                 image_path = image.__fspath__()
             else:
                 image_path = image
-            if image_path.lower().endswith('.gif'):
-                await self._set_gif(image_path)
-            else:
-                await self._set_image(image_path)
+            return image_path.lower().endswith('.gif'), image_path, None
         else:
             raise ValueError(
                 f"Unsupported image type: {type(image)}. Must be PictureFrameImage, PictureFrameGif, or a file path."
             )
 
-        self._last_set_image = image
-        return image_path
+    def _create_packets(self, image: PictureFrameImage | PictureFrameGif | PathLike | str) -> List[List[bytearray | bytes]]:
+        """
+        Loads and encodes the given image or GIF into the packets to upload it to the device.
+        This is CPU intensive and should not be called on the event loop thread.
+        """
+        is_gif, image_path, duration_per_frame_in_ms = self._resolve_image(image)
+        if is_gif:
+            return self.device_client.gif.create_gif_file_packets(
+                file_path=image_path,
+                resize_mode=self.resize_mode,
+                duration_per_frame_in_ms=duration_per_frame_in_ms,
+            )
+        return self.device_client.image.create_image_file_packets(
+            file_path=image_path,
+            resize_mode=self.resize_mode,
+        )
+
+    def _prefetch_key(self, image: PictureFrameImage | PictureFrameGif | PathLike | str) -> Tuple:
+        is_gif, image_path, duration_per_frame_in_ms = self._resolve_image(image)
+        return is_gif, str(image_path), duration_per_frame_in_ms, self.resize_mode
+
+    async def _get_packets(self, image: PictureFrameImage | PictureFrameGif | PathLike | str) -> List[List[bytearray | bytes]]:
+        """
+        Returns the packets for the given image, either from a prefetched result or by encoding it in the background.
+        """
+        key = self._prefetch_key(image)
+        with self._prefetch_lock:
+            future = self._prefetched.pop(key, None)
+            if future is None:
+                future = self._get_prefetch_executor().submit(self._create_packets, image)
+            else:
+                self.logging.debug(f"using prefetched packets for '{image}'")
+        return await asyncio.wrap_future(future)
+
+    def _get_prefetch_executor(self) -> ThreadPoolExecutor:
+        """
+        Returns the executor that encodes the images, creating it if necessary. Must be called with _prefetch_lock held.
+        """
+        if self._prefetch_executor is None:
+            self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="picture-frame-prefetch")
+        return self._prefetch_executor
+
+    def _get_upcoming_images(self) -> List[PictureFrameImage | PictureFrameGif | PathLike | str]:
+        """
+        Returns the images that will be displayed after the current one, in order, up to prefetch_count items.
+        """
+        upcoming = []
+        image_count = len(self.images)
+        index = self._current_slideshow_index
+        for _ in range(min(self.prefetch_count, image_count - 1)):
+            index = (index + 1) % image_count
+            if index == 0 and self._shuffle_images:
+                # the images will be reshuffled before the next round starts, so the order is unknown
+                break
+            upcoming.append(self.images[index])
+        return upcoming
+
+    def _prefetch_upcoming(self):
+        """
+        Starts encoding the upcoming images in the background, so only the transfer to the device remains
+        when it is time to switch to them.
+        """
+        if self.prefetch_count <= 0:
+            return
+        with self._prefetch_lock:
+            upcoming_keys = set()
+            for image in self._get_upcoming_images():
+                key = self._prefetch_key(image)
+                upcoming_keys.add(key)
+                if key not in self._prefetched:
+                    self.logging.debug(f"prefetching '{image}'")
+                    self._prefetched[key] = self._get_prefetch_executor().submit(self._create_packets, image)
+
+            for key in list(self._prefetched.keys()):
+                if key not in upcoming_keys:
+                    self._prefetched.pop(key).cancel()
+
+    def _invalidate_prefetched(self):
+        """
+        Discards all prefetched results, e.g. because the list or order of images has changed.
+        """
+        with self._prefetch_lock:
+            for future in self._prefetched.values():
+                future.cancel()
+            self._prefetched.clear()
 
     async def _set_image(
         self,
-        file_path: PathLike | str
+        file_path: PathLike | str,
+        packets: List[List[bytearray | bytes]],
     ):
         self.logging.debug(f"Setting image file: {file_path}")
-        await self._switch_device_to_image_mode()
-        await self.device_client.image.upload_image_file(
-            file_path=file_path,
-            resize_mode=self.resize_mode,
-        )
+        transaction = Transaction()
+        if not self._is_in_diy_mode:
+            self.logging.debug("Switching device to image mode")
+            transaction.add_command(commands.IMAGE_MODE.encode(ImageMode.EnableDIY.value))
+        transaction.add_packets(packets)
+        await self.device_client.run_transaction(transaction)
+        self._is_in_diy_mode = True
 
     async def _set_gif(
         self,
         file_path: PathLike | str,
+        packets: List[List[bytearray | bytes]],
         duration_per_frame_in_ms: int = None
     ):
         self.logging.debug(f"Setting GIF file: {file_path} ({duration_per_frame_in_ms} ms per frame)")
         await self._switch_device_to_gif_mode()
-        await self.device_client.gif.upload_gif_file(
-            file_path=file_path,
-            resize_mode=self.resize_mode,
-            duration_per_frame_in_ms=duration_per_frame_in_ms,
-        )
-        # give the device some time to process the GIF
-        await sleep(3)
-
-    async def _switch_device_to_image_mode(self):
-        if self._is_in_diy_mode:
-            return
-        self.logging.debug("Switching device to image mode")
-        await self.device_client.image.set_mode(ImageMode.EnableDIY)
-        self._is_in_diy_mode = True
+        await self.device_client.gif.upload_gif_packets(packets)
+        # give the device some time to process the GIF before the next command
+        self.device_client.defer_next_command(GIF_PROCESSING_SECONDS)
 
     async def _switch_device_to_gif_mode(self):
         if not self._is_in_diy_mode:
             return
         self.logging.debug("Switching device to GIF mode")
-        await self.device_client.image.set_mode(ImageMode.DisableDIY)
-        await self._show_black_screen()
+        transaction = Transaction().add_command(commands.IMAGE_MODE.encode(ImageMode.DisableDIY.value))
+        await self._show_black_screen(transaction)
 
     def _add_folder_watch(
         self,
@@ -499,7 +617,11 @@ class DigitalPictureFrame:
         observer_type: FileObserverType,
         source_directories: List[Path],
         file_filter: re.Pattern | None = None,
-    ) -> List[FilesystemObserver]:
+    ) -> List["FilesystemObserver"]:
+        from watchdog.observers.inotify import InotifyObserver
+        from watchdog.observers.polling import PollingObserver
+        from idotmatrix.util.file_watch import ImageFileEventHandler
+
         observers = []
 
         for directory in source_directories:
@@ -530,11 +652,18 @@ class DigitalPictureFrame:
     def _advance_slideshow_index(self):
         self._current_slideshow_index = (self._current_slideshow_index + 1) % len(self.images)
 
-    async def _show_black_screen(self):
+    async def _show_black_screen(self, transaction: Transaction | None = None):
+        """
+        Clears the screen and resets the device, sending all commands back to back.
+        Args:
+            transaction (Transaction | None): Commands to send before, e.g. to leave the DIY mode.
+        """
         self._last_set_image = None
         self._is_in_diy_mode = False
-        await self.device_client.color.show_color(color="black")
-        await self.device_client.reset()
+        if transaction is None:
+            transaction = Transaction()
+        transaction.add_command(commands.FULLSCREEN_COLOR.encode(0, 0, 0))
+        await self.device_client.reset(transaction=transaction)
 
     def _get_current_image(self) -> PictureFrameImage | PictureFrameGif | PathLike | str | None:
         return self.images[self._current_slideshow_index % len(self.images)] if self.images else None
@@ -0,0 +1,144 @@
+import logging
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image as PILImage
+
+from idotmatrix.client import IDotMatrixClient
+from idotmatrix.modules.graffiti import MAX_PIXEL_LIST_LENGTH
+from idotmatrix.modules.image import ImageMode, CHUNK_SIZE_4096
+from idotmatrix.util import image_utils
+
+GRAFFITI_HEADER_SIZE = 8  # see GraffitiModule._create_payload
+DIY_IMAGE_HEADER_SIZE = 9  # see ImageModule._create_diy_image_data_packets
+# Estimated cost of a single acknowledged write (one round trip), expressed in bytes,
+# so that the number of writes can be weighed against the number of bytes sent.
+DEFAULT_WRITE_OVERHEAD_BYTES = 512
+
+
+class FrameUpdateMode(Enum):
+    """How a frame was transferred to the device."""
+    NONE = "none"  # the frame did not change
+    FULL = "full"  # the whole frame was uploaded as a DIY image
+    DIFF = "diff"  # only the changed pixels were sent using graffiti commands
+
+
+class FrameBuffer:
+    """
+    Keeps track of the last frame sent to the device and only transmits the pixels that changed,
+    using graffiti commands, if that is cheaper than uploading the whole frame as a DIY image.
+    """
+    logging = logging.getLogger(__name__)
+
+    def __init__(
+        self,
+        device_client: IDotMatrixClient,
+        write_overhead_bytes: int = DEFAULT_WRITE_OVERHEAD_BYTES,
+    ):
+        """
+        Initializes the FrameBuffer.
+        Args:
+            device_client (IDotMatrixClient): The client to communicate with the device.
+            write_overhead_bytes (int): Estimated cost of a single acknowledged write in bytes, used to decide
+                whether sending the changed pixels is cheaper than uploading the full frame.
+        """
+        self.device_client = device_client
+        self.write_overhead_bytes = write_overhead_bytes
+        self.width, self.height = device_client.screen_size.value
+        self._last_frame: Optional[bytes] = None
+        self.last_update_mode: Optional[FrameUpdateMode] = None
+
+    def invalidate(self):
+        """
+        Forgets the last frame, so the next frame is uploaded in full.
+        Call this if anything else has been shown on the device in the meantime.
+        """
+        self._last_frame = None
+
+    async def show(self, frame: PILImage.Image | bytes | bytearray | Any) -> FrameUpdateMode:
+        """
+        Shows the given frame on the device, sending only what changed since the last frame if that is cheaper.
+        Args:
+            frame (PILImage.Image | bytes | bytearray | Any): The frame as a PIL image of the screen size, or as
+                raw RGB pixel data (3 bytes per pixel, row by row), e.g. a NumPy array of shape (height, width, 3).
+        Returns:
+            FrameUpdateMode: How the frame was transferred.
+        """
+        frame = self._to_rgb_bytes(frame)
+
+        if self._last_frame is None:
+            mode = FrameUpdateMode.FULL
+            commands = []
+        else:
+            commands = self._create_graffiti_commands(self._last_frame, frame)
+            if not commands:
+                mode = FrameUpdateMode.NONE
+            elif self._estimate_graffiti_cost(commands) < self._estimate_full_cost(len(frame)):
+                mode = FrameUpdateMode.DIFF
+            else:
+                mode = FrameUpdateMode.FULL
+
+        # forget the state of the device until the update is complete, so a failed update leads to a full upload
+        last_frame = self._last_frame
+        self._last_frame = None
+        if mode == FrameUpdateMode.FULL:
+            if last_frame is None:
+                await self.device_client.image.set_mode(ImageMode.EnableDIY)
+            await self.device_client.image.upload_image_rgb_data(frame)
+        elif mode == FrameUpdateMode.DIFF:
+            graffiti = self.device_client.graffiti
+            for color, xys in commands:
+                await graffiti.set_pixels(color=color, xys=xys)
+        self._last_frame = frame
+
+        self.logging.debug(f"frame update: {mode.value} ({len(commands)} graffiti command(s) possible)")
+        self.last_update_mode = mode
+        return mode
+
+    def _to_rgb_bytes(self, frame: PILImage.Image | bytes | bytearray | Any) -> bytes:
+        if isinstance(frame, PILImage.Image):
+            if frame.size != (self.width, self.height):
+                raise ValueError(f"frame must be {self.width}x{self.height} pixels, got: {frame.width}x{frame.height}")
+            if frame.mode != "RGB":
+                frame = frame.convert("RGB")
+            return frame.tobytes()
+
+        return bytes(image_utils.to_rgb_buffer(frame, width=self.width, height=self.height))
+
+    def _create_graffiti_commands(
+        self,
+        old_frame: bytes,
+        new_frame: bytes,
+    ) -> List[Tuple[Tuple[int, int, int], List[Tuple[int, int]]]]:
+        """
+        Computes the changed pixels between two frames and groups them by color.
+        Returns:
+            List[Tuple[Tuple[int, int, int], List[Tuple[int, int]]]]: (color, coordinates) pairs, where each
+                list of coordinates contains at most MAX_PIXEL_LIST_LENGTH entries.
+        """
+        changed_pixels: Dict[Tuple[int, int, int], List[Tuple[int, int]]] = {}
+        row_size = self.width * 3
+        for y in range(self.height):
+            row_start = y * row_size
+            row_end = row_start + row_size
+            # most rows are usually unchanged, so compare them as a whole first
+            if old_frame[row_start:row_end] == new_frame[row_start:row_end]:
+                continue
+            for x in range(self.width):
+                i = row_start + x * 3
+                if old_frame[i:i + 3] != new_frame[i:i + 3]:
+                    color = (new_frame[i], new_frame[i + 1], new_frame[i + 2])
+                    changed_pixels.setdefault(color, []).append((x, y))
+
+        commands = []
+        for color, xys in changed_pixels.items():
+            for i in range(0, len(xys), MAX_PIXEL_LIST_LENGTH):
+                commands.append((color, xys[i:i + MAX_PIXEL_LIST_LENGTH]))
+        return commands
+
+    def _estimate_graffiti_cost(self, commands: List[Tuple[Tuple[int, int, int], List[Tuple[int, int]]]]) -> int:
+        return sum(GRAFFITI_HEADER_SIZE + 2 * len(xys) + self.write_overhead_bytes for _, xys in commands)
+
+    def _estimate_full_cost(self, frame_size: int) -> int:
+        chunk_count = (frame_size + CHUNK_SIZE_4096 - 1) // CHUNK_SIZE_4096
+        return frame_size + chunk_count * (DIY_IMAGE_HEADER_SIZE + self.write_overhead_bytes)
@@ -0,0 +1,212 @@
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# upper bounds of the latency histogram buckets, in seconds
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# metric names fed by the ConnectionManager
+METRIC_TRANSFERS = "transfers_total"
+METRIC_TRANSFER_ERRORS = "transfer_errors_total"
+METRIC_TRANSFER_BYTES = "transfer_bytes_total"
+METRIC_TRANSFER_CHUNKS = "transfer_chunks_total"
+METRIC_TRANSFER_DURATION = "transfer_duration_seconds"
+METRIC_WRITE_LATENCY = "write_latency_seconds"
+METRIC_RESPONSE_READ_LATENCY = "response_read_latency_seconds"
+METRIC_CONNECTS = "connects_total"
+METRIC_CONNECT_FAILURES = "connect_failures_total"
+METRIC_CONNECT_DURATION = "connect_duration_seconds"
+METRIC_RECONNECT_ATTEMPTS = "reconnect_attempts_total"
+METRIC_DISCONNECTS = "disconnects_total"
+METRIC_LOCK_WAIT = "connection_lock_wait_seconds"
+
+Labels = Optional[Dict[str, str]]
+_LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def command_type(data: bytes | bytearray | memoryview) -> str:
+    """
+    Returns the command type of a protocol packet, which is used as a metrics label.
+    Every packet starts with its length (2 bytes), followed by the command and sub-command bytes.
+    Args:
+        data: The first BLE chunk of the packet.
+    Returns:
+        str: The command and sub-command as hex, e.g. "0501" for graffiti, or "unknown".
+    """
+    if len(data) < 4:
+        return "unknown"
+    return f"{data[2]:02x}{data[3]:02x}"
+
+
+class MetricsRecorder:
+    """
+    Receives the metrics of the transport layer. This base class discards everything,
+    subclass it to forward the metrics to a monitoring system of your choice.
+    """
+
+    def increment(self, name: str, value: float = 1, labels: Labels = None):
+        """
+        Increments a counter.
+        Args:
+            name (str): Name of the counter, e.g. METRIC_TRANSFERS.
+            value (float): The value to add.
+            labels (Optional[Dict[str, str]]): Labels of the counter, e.g. the command type.
+        """
+
+    def observe(self, name: str, value: float, labels: Labels = None):
+        """
+        Records a value in a histogram.
+        Args:
+            name (str): Name of the histogram, e.g. METRIC_WRITE_LATENCY.
+            value (float): The value to record, durations are in seconds.
+            labels (Optional[Dict[str, str]]): Labels of the histogram, e.g. the command type.
+        """
+
+
+class LabeledMetricsRecorder(MetricsRecorder):
+    """
+    Adds fixed labels, e.g. the device address, to all metrics before passing them on to another recorder.
+    Useful to collect the metrics of several devices in one recorder.
+    """
+
+    def __init__(self, recorder: MetricsRecorder, labels: Dict[str, str]):
+        """
+        Initializes the LabeledMetricsRecorder.
+        Args:
+            recorder (MetricsRecorder): The recorder to pass the metrics on to.
+            labels (Dict[str, str]): The labels to add to all metrics.
+        """
+        self.recorder = recorder
+        self.labels = labels
+
+    def increment(self, name: str, value: float = 1, labels: Labels = None):
+        self.recorder.increment(name, value, {**self.labels, **labels} if labels else self.labels)
+
+    def observe(self, name: str, value: float, labels: Labels = None):
+        self.recorder.observe(name, value, {**self.labels, **labels} if labels else self.labels)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        """
+        Histogram with fixed buckets, like a Prometheus histogram.
+        Args:
+            buckets (Sequence[float]): Sorted upper bounds of the buckets. An implicit +Inf bucket is added.
+        """
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @property
+    def average(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class InMemoryMetrics(MetricsRecorder):
+    """
+    Keeps all metrics in memory and can export them in the Prometheus text format.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        Initializes the InMemoryMetrics.
+        Args:
+            buckets (Sequence[float]): Upper bounds of the histogram buckets, in seconds.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[_LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[_LabelKey, Histogram]] = {}
+
+    @staticmethod
+    def _label_key(labels: Labels) -> _LabelKey:
+        return tuple(sorted(labels.items())) if labels else ()
+
+    def increment(self, name: str, value: float = 1, labels: Labels = None):
+        key = self._label_key(labels)
+        with self._lock:
+            counters = self._counters.setdefault(name, {})
+            counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: Labels = None):
+        key = self._label_key(labels)
+        with self._lock:
+            histograms = self._histograms.setdefault(name, {})
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def get_counter(self, name: str, labels: Labels = None) -> float:
+        """
+        Returns:
+            float: The value of the counter, or 0 if it has never been incremented.
+        """
+        with self._lock:
+            return self._counters.get(name, {}).get(self._label_key(labels), 0)
+
+    def get_histogram(self, name: str, labels: Labels = None) -> Optional[Histogram]:
+        """
+        Returns:
+            Optional[Histogram]: The histogram, or None if nothing has been recorded yet.
+        """
+        with self._lock:
+            return self._histograms.get(name, {}).get(self._label_key(labels))
+
+    def reset(self):
+        """
+        Removes all recorded metrics.
+        """
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def to_prometheus(self, prefix: str = "idotmatrix_", extra_labels: Labels = None) -> str:
+        """
+        Exports all metrics in the Prometheus text exposition format.
+        Args:
+            prefix (str): Prefix for all metric names.
+            extra_labels (Optional[Dict[str, str]]): Labels to add to every sample, e.g. the device address.
+        Returns:
+            str: The metrics, one sample per line.
+        """
+        lines: List[str] = []
+        with self._lock:
+            for name, counters in sorted(self._counters.items()):
+                lines.append(f"# TYPE {prefix}{name} counter")
+                for key, value in sorted(counters.items()):
+                    lines.append(f"{prefix}{name}{_format_labels(key, extra_labels)} {_format_value(value)}")
+            for name, histograms in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                for key, histogram in sorted(histograms.items()):
+                    cumulative_count = 0
+                    for upper_bound, bucket_count in zip(histogram.buckets + (None,), histogram.bucket_counts):
+                        cumulative_count += bucket_count
+                        le = "+Inf" if upper_bound is None else _format_value(upper_bound)
+                        labels = _format_labels(key + (("le", le),), extra_labels)
+                        lines.append(f"{prefix}{name}_bucket{labels} {cumulative_count}")
+                    labels = _format_labels(key, extra_labels)
+                    lines.append(f"{prefix}{name}_sum{labels} {_format_value(histogram.sum)}")
+                    lines.append(f"{prefix}{name}_count{labels} {histogram.count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: _LabelKey, extra_labels: Labels = None) -> str:
+    items = list(extra_labels.items()) + list(key) if extra_labels else list(key)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(str(value))}"' for name, value in items) + "}"
@@ -1,7 +1,10 @@
-from asyncio import sleep
 from typing import List
 
 from idotmatrix.connection_manager import ConnectionManager
+from idotmatrix.transfer_job import TransferJob
+
+# time the device needs to process a command that is not answered, used until the pacer has learned a shorter gap
+DEFAULT_SLEEP_AFTER = 0.5
 
 
 class IDotMatrixModule:
@@ -27,33 +30,39 @@ class IDotMatrixModule:
         Args:
             data (bytearray | bytes): The data to send.
             response (bool, optional): Whether to expect a response from the device. Defaults to False.
-            sleep_after (float, optional): Time to wait after sending the data. Defaults to 0 if response=True and 0.5 seconds if response=False.
+            sleep_after (float, optional): Time the device needs to process the data before it can receive the next
+                command. Defaults to 0 if response=True and 0.5 seconds if response=False. The next command is delayed
+                accordingly, or by the shorter gap learned from the acknowledgements of the device (see ConnectionManager.pace).
         """
         if sleep_after is None:
-            sleep_after = 0 if response else 0.5
+            sleep_after = 0 if response else DEFAULT_SLEEP_AFTER
 
         await self._connection_manager.send_bytes(data=data, response=response)
         if sleep_after > 0:
             # sometimes the device needs a moment to process the command before it is able to receive the next one
-            await sleep(sleep_after)
+            await self._connection_manager.pace(data=data, default_gap=sleep_after)
 
     async def _send_packets(
         self,
         packets: List[List[bytearray | bytes]],
         response: bool = False,
-        sleep_after: float = None
+        sleep_after: float = None,
+        job: TransferJob = None,
     ):
         """
         Sends multiple packets to the IDotMatrix device.
         Args:
             packets (List[List[bytearray | bytes]]): The packets to send.
             response (bool, optional): Whether to expect a response from the device. Defaults to False.
-            sleep_after (float, optional): Time to wait after sending the packets. Defaults to 0 if response=True and 0.5 seconds if response=False.
+            sleep_after (float, optional): Time the device needs to process the packets before it can receive the next
+                command. Defaults to 0 if response=True and 0.5 seconds if response=False. The next command is delayed
+                accordingly, or by the shorter gap learned from the acknowledgements of the device (see ConnectionManager.pace).
+            job (TransferJob, optional): Receives the progress of the transfer and allows to cancel it.
         """
         if sleep_after is None:
-            sleep_after = 0 if response else 0.5
+            sleep_after = 0 if response else DEFAULT_SLEEP_AFTER
 
-        await self._connection_manager.send_packets(packets=packets, response=response)
-        if sleep_after > 0:
+        await self._connection_manager.send_packets(packets=packets, response=response, job=job)
+        if sleep_after > 0 and len(packets) > 0:
             # sometimes the device needs a moment to process the command before it is able to receive the next one
-            await sleep(sleep_after)
+            await self._connection_manager.pace(data=packets[0][0], default_gap=sleep_after)
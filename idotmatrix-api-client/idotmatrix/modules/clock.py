@@ -3,6 +3,7 @@ from asyncio import sleep
 from enum import Enum
 from typing import Tuple
 
+from idotmatrix import commands
 from idotmatrix.modules import IDotMatrixModule
 from idotmatrix.util import color_utils
 
@@ -74,15 +75,7 @@ class ClockModule(IDotMatrixModule):
         Args:
             enabled (bool, optional): Whether to show the time indicator of the clock. Defaults to True.
         """
-        data: bytearray = bytearray(
-            [
-                5,
-                0,
-                7,
-                128,
-                1 if enabled else 0,
-            ]
-        )
+        data = commands.CLOCK_TIME_INDICATOR_ON.frame if enabled else commands.CLOCK_TIME_INDICATOR_OFF.frame
         await self._send_bytes(data=data)
 
     @staticmethod
@@ -91,7 +84,7 @@ class ClockModule(IDotMatrixModule):
         show_date: bool,
         hour24: bool,
         r: int, g: int, b: int
-    ) -> bytearray:
+    ) -> bytes:
         """Create a payload for the clock settings.
 
         Args:
@@ -102,16 +95,9 @@ class ClockModule(IDotMatrixModule):
             g (int): Color green.
             b (int): Color blue.
         """
-        data: bytearray = bytearray(
-            [
-                8,
-                0,
-                6,
-                1,
-                (style | (128 if show_date else 0)) | (64 if hour24 else 0),
-                r % 256,
-                g % 256,
-                b % 256,
-            ]
+        return commands.CLOCK.encode(
+            (style | (128 if show_date else 0)) | (64 if hour24 else 0),
+            r % 256,
+            g % 256,
+            b % 256,
         )
-        return data
@@ -2,7 +2,12 @@ import logging
 from datetime import datetime
 from typing import Optional
 
+from idotmatrix import commands
+from idotmatrix.commands import CommandBatch
+from idotmatrix.connection_manager import ConnectionManager
 from idotmatrix.modules import IDotMatrixModule
+from idotmatrix.transaction import Transaction
+from idotmatrix.util.gif_slots import GifSlotManager
 
 
 class CommonModule(IDotMatrixModule):
@@ -13,6 +18,14 @@ class CommonModule(IDotMatrixModule):
 
     logging = logging.getLogger(__name__)
 
+    def __init__(
+        self,
+        connection_manager: ConnectionManager,
+        gif_slot_manager: Optional[GifSlotManager] = None,
+    ):
+        super().__init__(connection_manager=connection_manager)
+        self._gif_slot_manager = gif_slot_manager
+
     async def freeze_screen(self):
         """
         Freezes or unfreezes the screen.
@@ -20,14 +33,7 @@ class CommonModule(IDotMatrixModule):
         Returns:
             bytearray: Command to be sent to the device.
         """
-        data = bytearray(
-            [
-                4,
-                0,
-                3,
-                0,
-            ]
-        )
+        data = commands.FREEZE_SCREEN.frame
         await self._send_bytes(data=data, response=True)
 
     async def turn_off(self):
@@ -37,15 +43,7 @@ class CommonModule(IDotMatrixModule):
         Returns:
             bytearray: Command to be sent to the device.
         """
-        data = bytearray(
-            [
-                5,
-                0,
-                7,
-                1,
-                0,
-            ]
-        )
+        data = commands.SCREEN_OFF.frame
         await self._send_bytes(data=data, response=True)
 
     async def turn_on(self):
@@ -55,15 +53,7 @@ class CommonModule(IDotMatrixModule):
         Returns:
             bytearray: Command to be sent to the device.
         """
-        data = bytearray(
-            [
-                5,
-                0,
-                7,
-                1,
-                1,
-            ]
-        )
+        data = commands.SCREEN_ON.frame
         await self._send_bytes(data=data)
 
     async def set_screen_state(self, is_on: bool):
@@ -74,15 +64,7 @@ class CommonModule(IDotMatrixModule):
             is_on (bool): True = on, False = off.
         """
 
-        data = bytearray(
-            [
-                5,
-                0,
-                7,
-                1,
-                1 if is_on else 0,
-            ]
-        )
+        data = commands.SCREEN_ON.frame if is_on else commands.SCREEN_OFF.frame
         await self._send_bytes(data=data)
 
     async def set_screen_flipped(self, flip: bool = True):
@@ -92,15 +74,7 @@ class CommonModule(IDotMatrixModule):
         Args:
             flip (bool): False = normal, True = rotated. Defaults to True.
         """
-        data = bytearray(
-            [
-                5,
-                0,
-                6,
-                128,
-                1 if flip else 0,
-            ]
-        )
+        data = commands.SCREEN_FLIPPED.frame if flip else commands.SCREEN_NOT_FLIPPED.frame
         await self._send_bytes(data=data, response=True)
 
     async def set_brightness(self, brightness_percent: int):
@@ -112,15 +86,7 @@ class CommonModule(IDotMatrixModule):
         """
         if brightness_percent not in range(5, 101):
             raise ValueError("Common.setBrightness parameter brightness_percent is not in range between 5 and 100")
-        data = bytearray(
-            [
-                5,
-                0,
-                4,
-                128,
-                brightness_percent,
-            ]
-        )
+        data = commands.BRIGHTNESS.encode(brightness_percent)
         await self._send_bytes(data=data, response=True)
 
     async def set_speed(self, speed: int):
@@ -130,15 +96,7 @@ class CommonModule(IDotMatrixModule):
         Args:
             speed (int): Set the speed.
         """
-        data = bytearray(
-            [
-                5,
-                0,
-                3,
-                1,
-                speed,
-            ]
-        )
+        data = commands.SPEED.encode(speed)
         await self._send_bytes(data=data)
 
     async def set_time(self, time: datetime):
@@ -168,20 +126,14 @@ class CommonModule(IDotMatrixModule):
         if not (0 <= second <= 59):
             raise ValueError("Common.setTime parameter second is not in range between 0 and 59")
 
-        data = bytearray(
-            [
-                11,
-                0,
-                1,
-                128,
-                year % 100,
-                month,
-                day,
-                datetime(year, month, day).weekday() + 1,
-                hour,
-                minute,
-                second,
-            ]
+        data = commands.TIME.encode(
+            year % 100,
+            month,
+            day,
+            datetime(year, month, day).weekday() + 1,
+            hour,
+            minute,
+            second,
         )
         await self._send_bytes(data=data, response=True)
 
@@ -192,15 +144,7 @@ class CommonModule(IDotMatrixModule):
         Args:
             mode (int): Set the joint mode.
         """
-        data = bytearray(
-            [
-                5,
-                0,
-                12,
-                128,
-                mode,
-            ]
-        )
+        data = commands.JOINT.encode(mode)
         await self._send_bytes(data=data)
 
     async def set_password(self, password: int):
@@ -213,32 +157,52 @@ class CommonModule(IDotMatrixModule):
         pwd_high = (password // 10000) % 256
         pwd_mid = (password // 100) % 100 % 256
         pwd_low = password % 100 % 256
-        data = bytearray(
-            [
-                8,
-                0,
-                4,
-                2,
-                1,
-                pwd_high,
-                pwd_mid,
-                pwd_low,
-            ]
-        )
+        data = commands.PASSWORD.encode(pwd_high, pwd_mid, pwd_low)
         await self._send_bytes(data=data)
 
-    async def reset(self):
+    async def reset(self, transaction: Optional[Transaction] = None):
         """
         Sends a command that resets the device and its internals.
         Can fix issues that appear over time.
 
+        Args:
+            transaction (Optional[Transaction]): Commands to send right before the reset, e.g. to clear the screen.
+                The reset is added as the last step, and the whole transaction is run at once
+                (see ConnectionManager.run_transaction).
+
         Note:
             Credits to 8none1 for finding this method:
             https://github.com/8none1/idotmatrix/commit/1a08e1e9b82d78427ab1c896c24c2a7fb45bc2f0
         """
         reset_packets = [
             [
-                bytes(bytearray.fromhex("04 00 03 80"))
+                commands.RESET.frame
             ]
         ]
-        await self._send_packets(packets=reset_packets, response=True)
+        if transaction is None:
+            await self._send_packets(packets=reset_packets, response=True)
+        else:
+            transaction.add_packets(reset_packets, response=True, name=commands.RESET.name)
+            await self._connection_manager.run_transaction(transaction)
+        # the GIFs stored on the device can not be relied upon anymore
+        if self._gif_slot_manager is not None and self._connection_manager.address:
+            self._gif_slot_manager.invalidate(self._connection_manager.address)
+
+    async def send_commands(self, batch: CommandBatch, single_write: bool = False):
+        """
+        Sends a batch of commands, e.g. of a control loop that updates the brightness and the color at once.
+        The commands are encoded into one contiguous buffer and sent back to back, without pacing in between.
+
+        Args:
+            batch (CommandBatch): The commands to send.
+            single_write (bool): If True, all commands are sent with a single write (or as few writes as the
+                write size of the connection allows), which requires a device that accepts multiple commands
+                in one write. If False, every command is written on its own. Defaults to False.
+        """
+        if len(batch) == 0:
+            return
+        if single_write:
+            packets = [[batch.encode()]]
+        else:
+            packets = batch.encode_packets()
+        await self._send_packets(packets=packets, response=True)
@@ -1,5 +1,6 @@
 import logging
 
+from idotmatrix import commands
 from idotmatrix.modules import IDotMatrixModule
 
 
@@ -12,7 +13,7 @@ class CountdownModule(IDotMatrixModule):
         """
         Disables the countdown.
         """
-        await self._set_mode(mode=0, minutes=0, seconds=0)
+        await self._send_bytes(data=commands.COUNTDOWN_STOP.frame)
 
     async def start(self, minutes: int, seconds: int = 0):
         """
@@ -28,13 +29,13 @@ class CountdownModule(IDotMatrixModule):
         """
         Pauses the countdown.
         """
-        await self._set_mode(mode=2, minutes=0, seconds=0)
+        await self._send_bytes(data=commands.COUNTDOWN_PAUSE.frame)
 
     async def restart(self):
         """
         Restarts the countdown with the given minutes and seconds.
         """
-        await self._set_mode(mode=3, minutes=0, seconds=0)
+        await self._send_bytes(data=commands.COUNTDOWN_RESTART.frame)
 
     async def _set_mode(
         self, mode: int, minutes: int, seconds: int
@@ -63,16 +64,5 @@ class CountdownModule(IDotMatrixModule):
         await self._send_bytes(data=data)
 
     @staticmethod
-    def _create_payload(mode: int, minutes: int, seconds: int) -> bytearray:
-        data = bytearray(
-            [
-                7,
-                0,
-                8,
-                128,
-                mode % 256,
-                minutes % 256,
-                seconds % 256,
-            ]
-        )
-        return data
+    def _create_payload(mode: int, minutes: int, seconds: int) -> bytes:
+        return commands.COUNTDOWN.encode(mode, minutes, seconds)
@@ -1,7 +1,9 @@
+import itertools
 import logging
 from enum import Enum
 from typing import List, Tuple
 
+from idotmatrix import commands
 from idotmatrix.modules import IDotMatrixModule
 from idotmatrix.util import color_utils
 
@@ -50,30 +52,18 @@ class EffectModule(IDotMatrixModule):
         await self._send_bytes(data=data)
 
     @staticmethod
-    def _compute_payload(style: int, rgb_values: List[Tuple[int, int, int]]) -> bytearray:
+    def _compute_payload(style: int, rgb_values: List[Tuple[int, int, int]]) -> bytes:
         """
         Computes the payload for the effect mode command.
 
         Args:
             style (int): The effect style, must be between 0 and 6.
-            rgb_values (list[tuple[int, int, int]]): List of RGB tuples, each tuple contains red, green, and blue values.
+            rgb_values (list[tuple[int, int, int]]): List of 2-7 RGB tuples, each tuple contains red, green, and
+                blue values, as returned by color_utils.parse_color_rgb_list.
         """
-        processed_rgb_values = [
-            (r % 256, g % 256, b % 256)
-            for rgb in rgb_values
-            for r, g, b in [rgb + (255,) * (3 - len(rgb))]
-        ]
-
-        data = bytearray(
-            [
-                6 + len(processed_rgb_values),
-                0,
-                3,
-                2,
-                style % 256,
-                90,
-                len(processed_rgb_values) % 256,
-            ] + [component for rgb in processed_rgb_values for component in rgb]
+        return commands.EFFECTS[len(rgb_values)].encode(
+            style % 256,
+            90,
+            len(rgb_values),
+            *itertools.chain.from_iterable(rgb_values),
         )
-
-        return data
@@ -1,6 +1,7 @@
 import logging
 from typing import Tuple
 
+from idotmatrix import commands
 from idotmatrix.modules import IDotMatrixModule
 from idotmatrix.util import color_utils
 
@@ -48,16 +49,5 @@ class FullscreenColorModule(IDotMatrixModule):
         await self._send_bytes(data=data, response=True)
 
     @staticmethod
-    def _create_payload(r, g, b) -> bytearray:
-        data = bytearray(
-            [
-                7,
-                0,
-                2,
-                2,
-                int(r) % 256,
-                int(g) % 256,
-                int(b) % 256,
-            ]
-        )
-        return data
+    def _create_payload(r, g, b) -> bytes:
+        return commands.FULLSCREEN_COLOR.encode(int(r), int(g), int(b))
@@ -1,25 +1,29 @@
 import binascii
 import io
 import logging
+import struct
 from os import PathLike
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 
 from PIL import Image as PILImage
 
 from idotmatrix.connection_manager import ConnectionManager
 from idotmatrix.modules import IDotMatrixModule
 from idotmatrix.screensize import ScreenSize
+from idotmatrix.transfer_job import TransferJob
 from idotmatrix.util import image_utils, color_utils
+from idotmatrix.util.frame_planner import plan_frames, read_frame_durations
+from idotmatrix.util.gif_encoder import encode_gif_with_global_palette
+from idotmatrix.util.gif_slots import GifSlotManager, DEFAULT_GIF_SLOT
 from idotmatrix.util.image_utils import ResizeMode
-
-ANIMATION_MAX_FRAME_COUNT = 64  # Maximum number of frames in a GIF animation
-DEFAULT_DURATION_PER_FRAME_MS = 200  # Default duration per frame in milliseconds if not specified in the GIF file
-ANIMATION_TOTAL_DURATION_LIMIT_MS = 2000
-DEFAULT_ANIMATION_TOTAL_DURATION_MS = ANIMATION_TOTAL_DURATION_LIMIT_MS
+from idotmatrix.util.packet_builder import build_framed_packets
+from idotmatrix.util.payload_cache import PayloadCache
 
 # --- Constants based on the Java code ---
 CHUNK_SIZE_4096 = 4096
 HEADER_SIZE_GIF = 16  # As per sendImageData logic in GifAgreement.java
+GIF_HEADER = struct.Struct("<HBBBII")
+GIF_HEADER_TIME_SIGN = struct.Struct(">HB")
 
 
 class GifModule(IDotMatrixModule):
@@ -32,9 +36,13 @@ class GifModule(IDotMatrixModule):
         self,
         connection_manager: ConnectionManager,
         screen_size: ScreenSize,
+        payload_cache: Optional[PayloadCache] = None,
+        slot_manager: Optional[GifSlotManager] = None,
     ) -> None:
         super().__init__(connection_manager=connection_manager)
         self.screen_size = screen_size
+        self._payload_cache = payload_cache
+        self._slot_manager = slot_manager
 
     async def upload_gif_file(
         self,
@@ -43,7 +51,10 @@ class GifModule(IDotMatrixModule):
         palletize: bool = True,
         background_color: Tuple[int, int, int] or int or str = (0, 0, 0),
         duration_per_frame_in_ms: int = None,
-    ):
+        slot: int = DEFAULT_GIF_SLOT,
+        job: Optional[TransferJob] = None,
+        global_palette: bool = False,
+    ) -> bool:
         """
         Uploads a GIF file to the device.
 
@@ -54,10 +65,106 @@ class GifModule(IDotMatrixModule):
                 high detail (like photos) but good for pixel-art or other content with high contrasts. Defaults to True.
             background_color (Tuple[int, int, int]): RGB color to fill transparent pixels. Defaults to black (0, 0, 0).
             duration_per_frame_in_ms (int, optional): Duration of each frame in milliseconds. If not provided, defaults to the duration specified in the GIF file, or 200ms if not set.
+            slot (int): The slot ("gif type") of the device to store the GIF in. Defaults to 12.
+            job (Optional[TransferJob]): Receives the progress of the upload, allows to cancel it and to retry
+                failed writes, see ConnectionManager.send_packets.
+            global_palette (bool): Quantize all frames against one shared palette and only encode the changed
+                rectangle of every frame, see create_gif_file_packets. Defaults to False.
+        Returns:
+            bool: False if the upload has been skipped because the GIF is still shown on the device, see upload_gif_packets.
+        Raises:
+            TransferCancelledError: If the job has been cancelled.
+        """
+        packets = self.create_gif_file_packets(
+            file_path=file_path,
+            resize_mode=resize_mode,
+            palletize=palletize,
+            background_color=background_color,
+            duration_per_frame_in_ms=duration_per_frame_in_ms,
+            slot=slot,
+            global_palette=global_palette,
+        )
+        return await self.upload_gif_packets(packets, job=job)
+
+    async def upload_gif_packets(
+        self,
+        packets: List[List[bytearray | bytes]],
+        job: Optional[TransferJob] = None,
+    ) -> bool:
+        """
+        Uploads GIF packets that have been created beforehand, e.g. using create_gif_file_packets.
+        If a slot manager is configured and the same GIF has been uploaded to the device with nothing else being
+        sent since, the upload is skipped.
+
+        Args:
+            packets (List[List[bytearray | bytes]]): The packets to send to the device.
+            job (Optional[TransferJob]): Receives the progress of the upload and allows to cancel it.
+        Returns:
+            bool: True if the packets have been sent, False if the upload has been skipped.
+        Raises:
+            TransferCancelledError: If the job has been cancelled.
+        """
+        device = self._connection_manager.address if self._slot_manager is not None else None
+        if device:
+            content_hash = GifSlotManager.content_hash(packets)
+            if self._slot_manager.is_showing(device, content_hash, self._connection_manager.send_count):
+                self.logging.info("GIF is already shown on the device, skipping upload")
+                if job is not None:
+                    job.complete()
+                return False
+
+        await self._send_packets(packets=packets, response=True, job=job)
+
+        if device:
+            self._slot_manager.record_upload(
+                device=device,
+                slot=GifSlotManager.slot_of(packets),
+                content_hash=content_hash,
+                send_count=self._connection_manager.send_count,
+            )
+        return True
+
+    def create_gif_file_packets(
+        self,
+        file_path: PathLike | str,
+        resize_mode: ResizeMode = ResizeMode.FIT,
+        palletize: bool = True,
+        background_color: Tuple[int, int, int] or int or str = (0, 0, 0),
+        duration_per_frame_in_ms: int = None,
+        slot: int = DEFAULT_GIF_SLOT,
+        global_palette: bool = False,
+    ) -> List[List[bytearray | bytes]]:
+        """
+        Loads a GIF file, adapts it to the canvas of the device and creates the packets to upload it.
+        If a payload cache is configured, previously created packets are reused.
+
+        Args:
+            file_path (str): path to the image file
+            resize_mode (ResizeMode): The mode to resize the image.
+            palletize (bool): Whether to convert the image to a color palette. Defaults to True.
+            background_color (Tuple[int, int, int]): RGB color to fill transparent pixels. Defaults to black (0, 0, 0).
+            duration_per_frame_in_ms (int, optional): Duration of each frame in milliseconds.
+            slot (int): The slot ("gif type") of the device to store the GIF in. Defaults to 12.
+            global_palette (bool): Quantize all frames against one palette computed across the whole animation,
+                and encode every frame as the rectangle that changed since the previous frame. This is faster and
+                produces smaller GIFs than palettizing every frame on its own. Implies palletize. Defaults to False.
+        Returns:
+            List[List[bytearray | bytes]]: The packets to send to the device.
         """
         screen_width = self.screen_size.value[0]  # assuming square canvas, so width == height
         background_color = color_utils.parse_color_rgb(background_color)
 
+        cache_key = None
+        if self._payload_cache is not None:
+            cache_key = self._payload_cache.create_key(
+                file_path, "gif", screen_width, resize_mode.value, palletize, background_color,
+                duration_per_frame_in_ms, slot, global_palette,
+            )
+            packets = self._payload_cache.get(cache_key)
+            if packets is not None:
+                self.logging.debug(f"using cached packets for GIF file {file_path}")
+                return packets
+
         gif_data = self._load_gif_and_adapt_to_canvas(
             file_path=file_path,
             canvas_size=screen_width,
@@ -65,6 +172,7 @@ class GifModule(IDotMatrixModule):
             palletize=palletize,
             background_color=background_color,
             duration_per_frame_in_ms=duration_per_frame_in_ms,
+            global_palette=global_palette,
         )
 
         # TODO: although the current implementation seems to _mostly_ work,
@@ -72,18 +180,18 @@ class GifModule(IDotMatrixModule):
         # fails completely (previous GIF is just "stuck" and the new GIF is never displayed). So there is probably some edge case
         # that is not handled correctly.
 
-        GIF_TYPE_DIY_ANIMATION = 13
-        GIF_TYPE_NO_TIME_SIGNATURE = 12
         packets = self.create_gif_data_packets(
             gif_data=gif_data,
-            # TODO: figure out what this does
-            #  this might be the index that this GIF will be stored within the device's memory :think:
-            #  it doesn't seem to have an effect when sending a single GIF like it is done here though
-            gif_type=GIF_TYPE_NO_TIME_SIGNATURE,
+            # this might be the index that this GIF will be stored within the device's memory,
+            # it doesn't seem to have an effect when sending a single GIF like it is done here though
+            # 12 (DEFAULT_GIF_SLOT) = no time signature, 13 = DIY animation
+            gif_type=slot,
             # TODO: figure out what this does, doesn't seem to have any effect
             time_sign=1,
         )
-        await self._send_packets(packets=packets, response=True)
+        if cache_key is not None:
+            self._payload_cache.put(cache_key, packets)
+        return packets
 
     @staticmethod
     def _convert_device_material_time(input_key: int) -> int:
@@ -113,6 +221,7 @@ class GifModule(IDotMatrixModule):
         palletize: bool = True,
         background_color: Tuple[int, int, int] = (0, 0, 0),
         duration_per_frame_in_ms: int = None,
+        global_palette: bool = False,
     ) -> bytes:
         """
         Loads a GIF file and adapts it to the pixel size of the device's canvas.
@@ -128,46 +237,57 @@ class GifModule(IDotMatrixModule):
             palletize (bool): Whether to convert the image to a color palette. Defaults to True.
             background_color (Tuple[int, int, int]): Background color to fill transparent pixels.
             duration_per_frame_in_ms (int, optional): Duration of each frame in milliseconds. If not provided, defaults to the duration specified in the GIF file, or 200ms if not set.
+            global_palette (bool): Encode the frames with one shared palette and delta frames, see
+                encode_gif_with_global_palette. Defaults to False.
         Returns:
             bytes: A byte representation of the GIF file, adapted to fit the pixel size.
         """
         from PIL import GifImagePlugin
         GifImagePlugin.LOADING_STRATEGY = GifImagePlugin.LoadingStrategy.RGB_AFTER_DIFFERENT_PALETTE_ONLY
 
-        with PILImage.open(file_path) as img:
+        with open(file_path, "rb") as file:
+            data = file.read()
+
+        # There doesn't seem to be a frame limit in the app, but too many frames cause problems.
+        # The frames to keep are chosen up front, so only those have to be adapted to the canvas.
+        plan = plan_frames(read_frame_durations(data), duration_per_frame_in_ms)
+        self.logging.debug(f"GIF {plan}")
+
+        with PILImage.open(io.BytesIO(data)) as img:
             frames = []
-            try:
-                # There doesn't seem to be a frame limit in the app, but too many frames cause problems.
-                # To be on the safe side, we limit it to 64 frames.
-                while True:
-                    frame = img.copy()
-
-                    if frame.size != (canvas_size, canvas_size):
-                        # needs to use NEAREST to to avoid color distortion
-                        resample_mode = PILImage.Resampling.NEAREST
-                        frame = image_utils.resize_image(
-                            image=frame,
-                            canvas_size=canvas_size,
-                            resize_mode=resize_mode,
-                            resample_mode=resample_mode,
-                            background_color=background_color,
-                            mode="RGBA",
-                        )
-                    if palletize:
-                        frame = image_utils.palettize(frame)
-
-                    frames.append(frame.copy())
-                    img.seek(img.tell() + 1)
-            except EOFError:
-                pass
-
-            frames, duration_per_frame_in_ms = self._ensure_reasonable_frame_count(
-                img, frames, duration_per_frame_in_ms
-            )
+            durations = []
+            for index, duration in zip(plan.indices, plan.durations):
+                try:
+                    # skipped frames are still composited by Pillow, as GIF frames build upon each other
+                    img.seek(index)
+                except EOFError:
+                    break
+                frame = img.copy()
+
+                # the global palette needs opaque frames, so transparent pixels are always filled in that case
+                if frame.size != (canvas_size, canvas_size) or global_palette:
+                    # needs to use NEAREST to to avoid color distortion
+                    resample_mode = PILImage.Resampling.NEAREST
+                    frame = image_utils.resize_image(
+                        image=frame,
+                        canvas_size=canvas_size,
+                        resize_mode=resize_mode,
+                        resample_mode=resample_mode,
+                        background_color=background_color,
+                        mode="RGBA",
+                    )
+                if palletize and not global_palette:
+                    frame = image_utils.palettize(frame)
+
+                frames.append(frame)
+                durations.append(duration)
 
             # TODO: there are still some cases where
             #  - the GIF is not animating all frames
 
+            if global_palette:
+                return encode_gif_with_global_palette(frames, durations)
+
             gif_buffer = io.BytesIO()
             # take the first frame, append the rest as additional frames and save as GIF into gif_buffer
             frames[0].save(
@@ -177,44 +297,19 @@ class GifModule(IDotMatrixModule):
                 optimize=True,  # setting this to False fails the transfer for some reason
                 append_images=frames[1:],
                 loop=0,  # loop forever
-                duration=duration_per_frame_in_ms,
+                duration=durations,
                 disposal=2,  # Restore to background color after each frame
             )
             gif_buffer.seek(0)
             return gif_buffer.getvalue()
 
-    def _int_to_bytes_le(self, value: int, length: int = 4) -> bytearray:
-        """Converts an integer to a little-endian bytearray of specified length."""
-        return bytearray(value.to_bytes(length, byteorder='little'))
-
-    def _short_to_bytes_le(self, value: int) -> bytearray:
-        """Converts a short (2 bytes) to a little-endian bytearray."""
-        return bytearray(value.to_bytes(2, byteorder='little'))
-
-    def _chunk_data_by_size(self, data: bytes, chunk_size: int) -> list[bytearray]:
-        """
-        Chunks data into smaller pieces of a specified size.
-        Corresponds to getSendData4096.
-        """
-        if not data:
-            return []
-
-        chunks = []
-        num_chunks = (len(data) + chunk_size - 1) // chunk_size  # Ceiling division
-
-        for i in range(num_chunks):
-            start = i * chunk_size
-            end = min((i + 1) * chunk_size, len(data))
-            chunks.append(bytearray(data[start:end]))
-        return chunks
-
     def create_gif_data_packets(
         self,
         gif_data: bytes,
         gif_type: int,
         time_sign: int,  # Assuming this is the raw time signature before DeviceMaterialTimeConvert.ConvertTime
         ble_device_mtu_enabled: bool = True
-    ) -> list[list[bytearray]]:
+    ) -> list[list[memoryview]]:
         """
         Creates packets for sending GIF data, mirroring the Java GifAgreement logic.
 
@@ -225,94 +320,46 @@ class GifModule(IDotMatrixModule):
             ble_device_mtu_enabled: Boolean indicating if MTU is enabled on the BLE device.
 
         Returns:
-            A list of lists of byte arrays. The outer list represents "4K chunks with headers",
-            and the inner lists contain the actual BLE packets for each of those chunks.
+            A list of lists of BLE packets. The outer list represents "4K chunks with headers",
+            and the inner lists contain the actual BLE packets for each of those chunks, as memoryview slices
+            of a single buffer per chunk.
         """
-        send_data_3 = []
-
         if not gif_data:
             raise ValueError("gif_data cannot be empty or None.")
 
         # Calculate CRC32 for the entire GIF data
         # Ensure this CRC32 matches the Java CrcUtils.CRC32.CRC32 implementation
         crc32_val = self.calculate_crc32_java_equivalent(gif_data)
-        crc32_bytes = self._int_to_bytes_le(crc32_val)  # Little-endian int (4 bytes)
-
-        # Get the total length of the GIF data as bytes
-        total_length_bytes = self._int_to_bytes_le(len(gif_data))  # Little-endian int (4 bytes)
-
-        # 1. Chunk the gif_data into 4096-byte chunks
-        chunks_4096 = self._chunk_data_by_size(gif_data, CHUNK_SIZE_4096)
-
-        processed_large_packets_with_headers = []
-        for i, current_chunk in enumerate(chunks_4096):
-            packet_data_length = len(current_chunk) + HEADER_SIZE_GIF
-            packet_data_length_bytes_be = bytearray(self._int_to_bytes_le(packet_data_length))
-
-            header = bytearray(HEADER_SIZE_GIF)
-
-            header[0] = packet_data_length_bytes_be[0]  # Packet Length (Big Endian short)
-            header[1] = packet_data_length_bytes_be[1]
-            header[2] = 1  # Command or type (fixed value from sendImageData)
-            header[3] = 0  # Sub-command or subtype (fixed value)
-
-            if i > 0:
-                header[4] = 2  # Continuation packet
-            else:
-                header[4] = 0  # First packet
-
-            # Total GIF data length (Little Endian int)
-            header[5:9] = total_length_bytes[0:4]
-
-            # CRC32 of GIF data (Little Endian int)
-            header[9:13] = crc32_bytes[0:4]
-
-            # Time signature or fixed bytes based on 'gif_type'
-            if gif_type == 12:  # Assuming 12 is a special type
-                header[13] = 0
-                header[14] = 0
-            else:
-                # Java: DeviceMaterialTimeConvert.ConvertTime(AppData.getInstance().getTimeSign())
-                # 'time_sign' passed to create_gif_data_packets is the input_key
-                converted_time_value = self._convert_device_material_time(time_sign)  # time_sign is the key (0,1,2,3,4...)
-
-                time_sign_bytes_be = bytearray(converted_time_value.to_bytes(2, byteorder='big'))
-                header[13] = time_sign_bytes_be[0]
-                header[14] = time_sign_bytes_be[1]
-
-            header[15] = gif_type & 0xFF  # Ensure it's a byte
-
-            large_packet_with_header = bytes(header) + current_chunk
-            processed_large_packets_with_headers.append(large_packet_with_header)
 
-        # 3. Split each "large packet with header" into smaller BLE packets
-        for i, large_packet in enumerate(processed_large_packets_with_headers):
-            ble_packets_for_chunk = self._create_ble_packets(large_packet, ble_device_mtu_enabled)
-            if ble_packets_for_chunk:
-                send_data_3.append(ble_packets_for_chunk)
-
-        return send_data_3
-
-    @staticmethod
-    def _create_ble_packets(data_packet: bytes, ble_device_mtu_enabled: bool = True) -> list[bytearray]:
-        """
-        Splits a single data packet into smaller packets suitable for BLE transmission.
-        Corresponds to getSendData.
-        MTU values (509, 18) are from GifAgreement.java.
-        """
-        if not data_packet:
-            return []
-
-        ble_packets = []
-        mtu_packet_size = 509 if ble_device_mtu_enabled else 18
-
-        num_ble_packets = (len(data_packet) + mtu_packet_size - 1) // mtu_packet_size
-
-        for i in range(num_ble_packets):
-            start = i * mtu_packet_size
-            end = min((i + 1) * mtu_packet_size, len(data_packet))
-            ble_packets.append(bytearray(data_packet[start:end]))
-        return ble_packets
+        # Time signature or fixed bytes based on 'gif_type'
+        if gif_type == 12:  # Assuming 12 is a special type
+            time_sign_value = 0
+        else:
+            # Java: DeviceMaterialTimeConvert.ConvertTime(AppData.getInstance().getTimeSign())
+            # 'time_sign' passed to create_gif_data_packets is the input_key
+            time_sign_value = self._convert_device_material_time(time_sign)  # time_sign is the key (0,1,2,3,4...)
+
+        def write_header(frame: bytearray, index: int, payload_size: int):
+            # Packet length (little-endian short), command or type (fixed value from sendImageData),
+            # sub-command or subtype (fixed value), first (0) or continuation (2) packet,
+            # total GIF data length and CRC32 of the GIF data (little-endian ints)
+            GIF_HEADER.pack_into(
+                frame, 0,
+                payload_size + HEADER_SIZE_GIF, 1, 0, 2 if index > 0 else 0, len(gif_data), crc32_val,
+            )
+            # Time signature (big-endian short) and the type
+            GIF_HEADER_TIME_SIGN.pack_into(frame, 13, time_sign_value, gif_type & 0xFF)
+
+        # 1. Chunk the gif_data into 4096-byte chunks, each with a header
+        # 2. Split each "large packet with header" into smaller BLE packets
+        # MTU values (509, 18) are from GifAgreement.java.
+        return build_framed_packets(
+            gif_data,
+            header_size=HEADER_SIZE_GIF,
+            write_header=write_header,
+            chunk_size=CHUNK_SIZE_4096,
+            ble_packet_size=509 if ble_device_mtu_enabled else 18,
+        )
 
     # --- Placeholder for a CRC32 function ---
     # The Java code uses CrcUtils.CRC32.CRC32. Python's built-in binascii.crc32
@@ -333,76 +380,3 @@ class GifModule(IDotMatrixModule):
         # The result should be masked to get an unsigned 32-bit value.
         crc = binascii.crc32(data) & 0xFFFFFFFF
         return crc
-
-    @staticmethod
-    def _ensure_reasonable_frame_count(
-        img: PILImage.Image,
-        frames: List[PILImage.Image],
-        duration_per_frame_in_ms: int = None,
-        default_total_duration: int = DEFAULT_ANIMATION_TOTAL_DURATION_MS,
-        default_duration_per_frame: int = DEFAULT_DURATION_PER_FRAME_MS,
-        total_duration_limit_ms: int = ANIMATION_TOTAL_DURATION_LIMIT_MS,
-        max_total_frame_count: int = ANIMATION_MAX_FRAME_COUNT,
-    ) -> Tuple[List[PILImage.Image], int]:
-        """
-        The device can only handle a limited number of frames in a GIF animation, due to limited processing power and memory.
-        This function ensures that the number of frames does not exceed the maximum allowed frames (64) and adjusts the duration per frame if necessary.
-
-        Args:
-            img (PILImage.Image): The image object of the GIF.
-            frames (List[PILImage.Image]): List of frames in the GIF.
-            duration_per_frame_in_ms (int, optional): Duration of each frame in milliseconds. If not provided, defaults to the duration specified in the GIF file, or 200ms if not set.
-        Returns:
-            Tuple[List[PILImage.Image], int]: A tuple containing the list of frames and the duration per frame in milliseconds.
-        """
-        # determine the optimal duration per frame if not provided
-        if duration_per_frame_in_ms is None:
-            duration_per_frame_in_ms = img.info.get("duration", default_duration_per_frame)
-            # if the value we get is not reasonable, compute alternative value
-            if (
-                not isinstance(duration_per_frame_in_ms, int)
-                or not duration_per_frame_in_ms
-                or duration_per_frame_in_ms <= 0
-            ):
-                if len(frames) > max_total_frame_count:
-                    # if the number of frames exceeds the maximum allowed frames, set the duration so that exactly max_total_frame_count frames fit into the total duration limit
-                    duration_per_frame_in_ms = total_duration_limit_ms / max_total_frame_count
-                else:
-                    # compute the duration per frame based on the number of frames and the default total duration
-                    duration_per_frame_in_ms = default_total_duration / len(frames)
-
-            if duration_per_frame_in_ms < 16:
-                # make sure the duration is at least 16ms (60fps), otherwise the device might not be able to handle it
-                duration_per_frame_in_ms = 16
-
-        # make sure the duration of the full animation doesn't exceed (duration_per_frame_in_ms * 64)
-        # because otherwise the upload takes a very long time. If using the given duration_per_frame_in_ms exceeds the limit,
-        # intermediate frames are skipped to keep the total count of frames below max_total_frame_count.
-        original_frame_count = len(frames)
-        original_duration = original_frame_count * duration_per_frame_in_ms
-        if original_duration > total_duration_limit_ms:
-            # if the total duration limit is exceeded, skip frames (except for the first and last one) to stay within the limit
-            result_frames = [frames[0], frames[-1]]  # always keep the first and last frame
-
-            number_of_frames_to_keep = int(
-                total_duration_limit_ms / duration_per_frame_in_ms) - 2  # -2 because we keep the first and last frame
-            number_of_frames_to_keep = min(max_total_frame_count - 2, number_of_frames_to_keep)
-
-            if number_of_frames_to_keep >= original_frame_count:
-                # if the number of frames to keep is greater than or equal to the available frames, do nothing
-                return frames, duration_per_frame_in_ms
-
-            frames_excluding_first_and_last = frames[1:-1]
-            # evenly select number_of_frames_to_keep frames from frames_excluding_first_and_last and insert them into result_frames between the first and last frame
-            step = len(frames_excluding_first_and_last) // number_of_frames_to_keep
-            for i in range(0, len(frames_excluding_first_and_last), step):
-                if len(result_frames) < max_total_frame_count - 1:
-                    result_frames.insert(-1, frames_excluding_first_and_last[i])
-            frames = result_frames
-
-        logging.debug(f"GIF original frame count: {original_frame_count}")
-        logging.debug(f"GIF adjusted frame count: {len(frames)}")
-        logging.debug(f"GIF duration per frame: {duration_per_frame_in_ms} ms")
-        logging.debug(f"GIF total duration: {len(frames) * duration_per_frame_in_ms} ms")
-
-        return frames, duration_per_frame_in_ms
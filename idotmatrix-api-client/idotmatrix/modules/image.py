@@ -2,18 +2,22 @@ import logging
 import struct
 from enum import Enum
 from os import PathLike
-from typing import List, Tuple
+from typing import Any, List, Tuple, Optional
 
 from PIL import Image as PILImage, ImageOps
 
+from idotmatrix import commands
 from idotmatrix.connection_manager import ConnectionManager
 from idotmatrix.modules import IDotMatrixModule
 from idotmatrix.screensize import ScreenSize
 from idotmatrix.util import image_utils, color_utils
+from idotmatrix.util.packet_builder import build_framed_packets
+from idotmatrix.util.payload_cache import PayloadCache
 
 MTU_SIZE_IF_ENABLED = 509
 MTU_SIZE_IF_DISABLED = 18
 CHUNK_SIZE_4096 = 4096
+DIY_IMAGE_HEADER = struct.Struct("<hBBBi")
 
 
 class ImageMode(Enum):
@@ -31,9 +35,11 @@ class ImageModule(IDotMatrixModule):
         self,
         connection_manager: ConnectionManager,
         screen_size: ScreenSize,
+        payload_cache: Optional[PayloadCache] = None,
     ):
         super().__init__(connection_manager=connection_manager)
         self.screen_size = screen_size
+        self._payload_cache = payload_cache
 
     async def set_mode(
         self,
@@ -48,7 +54,7 @@ class ImageModule(IDotMatrixModule):
         if isinstance(mode, ImageMode):
             mode = mode.value
 
-        data = bytearray([5, 0, 4, 1, mode % 256])
+        data = commands.IMAGE_MODE.encode(mode % 256)
         await self._send_bytes(data=data, response=True)
 
     async def upload_image_file(
@@ -69,15 +75,66 @@ class ImageModule(IDotMatrixModule):
             background_color (Tuple[int, int, int]): RGB color for the background, which is only visible if the input
                 image doesn't match the devices aspect ratio. Defaults to black (0, 0, 0).
         """
+        packets = self.create_image_file_packets(
+            file_path=file_path,
+            resize_mode=resize_mode,
+            palletize=palletize,
+            background_color=background_color,
+        )
+        await self.upload_image_packets(packets)
+
+    async def upload_image_packets(self, packets: List[List[bytearray | bytes]]) -> None:
+        """
+        Uploads DIY image packets that have been created beforehand, e.g. using create_image_file_packets.
+
+        Args:
+            packets (List[List[bytearray | bytes]]): The packets to send to the device.
+        """
+        await self._send_packets(packets, response=True)
+
+    def create_image_file_packets(
+        self,
+        file_path: PathLike | str,
+        resize_mode: image_utils.ResizeMode = image_utils.ResizeMode.FIT,
+        palletize: bool = False,
+        background_color: Tuple[int, int, int] or int or str = (0, 0, 0),
+    ) -> List[List[bytearray | bytes]]:
+        """
+        Loads an image file, adapts it to the canvas of the device and creates the DIY image packets to upload it.
+        If a payload cache is configured, previously created packets are reused.
+
+        Args:
+            file_path (str): path-like object to the image file
+            resize_mode (image_utils.ResizeMode): The mode to use for resizing the image.
+            palletize (bool): If True, the image will be converted to a palette-based image. Defaults to False.
+            background_color (Tuple[int, int, int]): RGB color for the background. Defaults to black (0, 0, 0).
+        Returns:
+            List[List[bytearray | bytes]]: The packets to send to the device.
+        """
         background_color = color_utils.parse_color_rgb(background_color)
+        canvas_size = self.screen_size.value[0]  # assuming square canvas, so width == height
+
+        cache_key = None
+        if self._payload_cache is not None:
+            cache_key = self._payload_cache.create_key(
+                file_path, "image", canvas_size, resize_mode.value, palletize, background_color,
+            )
+            packets = self._payload_cache.get(cache_key)
+            if packets is not None:
+                self.logging.debug(f"using cached packets for image file {file_path}")
+                return packets
+
         pixel_data = self._load_image_and_adapt_to_canvas(
             file_path=file_path,
-            canvas_size=self.screen_size.value[0],  # assuming square canvas, so width == height
+            canvas_size=canvas_size,
             resize_mode=resize_mode,
             palletize=palletize,
             background_color=background_color,
         )
-        await self._send_diy_image_data(pixel_data)
+        packets = self._create_diy_image_data_packets(pixel_data)
+        if cache_key is not None:
+            self._payload_cache.put(cache_key, packets)
+        return packets
 
     @staticmethod
     def _load_image_and_adapt_to_canvas(
@@ -129,7 +186,7 @@ class ImageModule(IDotMatrixModule):
 
     async def upload_image_pixeldata(
         self,
-        pixel_colors: List[Tuple[int, int, int] or int or str],
+        pixel_colors: List[Tuple[int, int, int] or int or str] | Any,
     ) -> None:
         """
         Uploads pixel data to the iDotMatrix device.
@@ -137,78 +194,77 @@ class ImageModule(IDotMatrixModule):
             pixel_colors (List[Tuple[int, int, int]]): List of tuples representing RGB pixel values.
                 Each tuple should contain three integers (R, G, B) in the range 0-255.
                 The length of this list must match the square of the screen size (pixel_size * pixel_size).
+                Raw RGB data (e.g. a NumPy array of shape (pixel_size, pixel_size, 3)) is passed on to upload_image_rgb_data.
         """
+        if not isinstance(pixel_colors, (list, tuple)):
+            return await self.upload_image_rgb_data(pixel_colors)
+
         pixel_size = self.screen_size.value[0]  # assuming square canvas, so width == height
         if len(pixel_colors) != pixel_size * pixel_size:
             raise ValueError(
                 f"pixel_data must contain exactly {pixel_size * pixel_size} pixels (quared pixel_size), got: {len(pixel_colors)}"
             )
 
-        # parse the pixel_colors to ensure they are in RGB format
-        pixel_colors = color_utils.parse_color_rgb_list(pixel_colors)
-
-        # Convert pixel_data to a bytearray in RGB format
-        pixel_data = bytearray()
-        for r, g, b in pixel_colors:
-            if not (0 <= r <= 255 and 0 <= g <= 255 and 0 <= b <= 255):
-                raise ValueError(f"Invalid RGB value: ({r}, {g}, {b}). Values must be between 0 and 255.")
-            pixel_data.extend([r, g, b])
+        # parse the pixel_colors to ensure they are in RGB format and convert them to a bytearray in RGB format
+        pixel_data = color_utils.pack_color_rgb_list(pixel_colors)
 
         return await self._send_diy_image_data(pixel_data)
 
+    async def upload_image_rgb_data(
+        self,
+        rgb_data: bytes | bytearray | memoryview | Any,
+    ) -> None:
+        """
+        Uploads raw RGB pixel data to the iDotMatrix device, without parsing every single pixel.
+        Args:
+            rgb_data: 3 bytes (R, G, B) per pixel, row by row, as a bytes-like object or any object supporting
+                the buffer protocol, like a NumPy array of shape (pixel_size, pixel_size, 3) and dtype uint8.
+        """
+        await self.upload_image_packets(self.create_image_rgb_data_packets(rgb_data))
+
+    def create_image_rgb_data_packets(
+        self,
+        rgb_data: bytes | bytearray | memoryview | Any,
+    ) -> List[List[memoryview]]:
+        """
+        Creates the DIY image packets for raw RGB pixel data, e.g. to upload them later using upload_image_packets.
+        Args:
+            rgb_data: 3 bytes (R, G, B) per pixel, row by row, see upload_image_rgb_data.
+        Returns:
+            List[List[memoryview]]: The packets to send to the device.
+        Raises:
+            ValueError: If the size of the pixel data does not match the screen size.
+        """
+        width, height = self.screen_size.value
+        pixel_data = image_utils.to_rgb_buffer(rgb_data, width=width, height=height)
+        return self._create_diy_image_data_packets(pixel_data)
+
     async def _send_diy_image_data(
-        self, pixel_data: bytearray,
+        self, pixel_data: bytearray | bytes | memoryview,
     ) -> None:
         packets = self._create_diy_image_data_packets(pixel_data)
         await self._send_packets(packets, response=True)
 
     @staticmethod
-    def _short_to_bytes_le(value: int) -> bytes:
-        """Converts a short (2 bytes) to little-endian bytes."""
-        return struct.pack('<h', value)
-
-    @staticmethod
-    def _int_to_bytes_le(value: int) -> bytes:
-        """Converts an int (4 bytes) to little-endian bytes."""
-        return struct.pack('<i', value)
-
-    @staticmethod
-    def chunk_data_by_size(data: bytearray | bytes, chunk_size: int) -> List[bytearray]:
+    def chunk_data_by_size(data: bytearray | bytes | memoryview, chunk_size: int) -> List[memoryview]:
         """
-        Chunks the input data into smaller pieces of a specified size.
+        Chunks the input data into smaller pieces of a specified size, without copying it.
 
         Args:
             data: The byte array to be chunked.
             chunk_size: The maximum size of each chunk.
 
         Returns:
-            A list of byte arrays, where each is a chunk of the original data.
-        """
-        chunks = []
-        for i in range(0, len(data), chunk_size):
-            chunks.append(data[i:i + chunk_size])
-        return chunks
-
-    def _create_ble_packets(self, data_chunk, ble_device_mtu_enabled=True):
-        """
-        Splits a data chunk into smaller BLE packets based on MTU size.
-        This corresponds to the inner chunking logic in `getSendData`.
-
-        Args:
-            data_chunk: A byte array representing a single "large" chunk (e.g., 4K).
-            ble_device_mtu_enabled: Boolean indicating if MTU is enabled on the BLE device.
-
-        Returns:
-            A list of byte arrays, where each is a BLE packet.
+            A list of memoryview slices of the original data.
         """
-        mtu = MTU_SIZE_IF_ENABLED if ble_device_mtu_enabled else MTU_SIZE_IF_DISABLED
-        return self.chunk_data_by_size(data_chunk, mtu)
+        view = memoryview(data)
+        return [view[i:i + chunk_size] for i in range(0, len(view), chunk_size)]
 
     def _create_diy_image_data_packets(
         self,
-        image_data: bytearray,
+        image_data: bytearray | bytes | memoryview,
         ble_device_mtu_enabled=True
-    ) -> List[List[bytearray]]:
+    ) -> List[List[memoryview]]:
         """
         Recreates the sendData3 structure for DIY image data.
         This corresponds to the logic in `sendDIYImageData`.
@@ -218,49 +274,26 @@ class ImageModule(IDotMatrixModule):
             ble_device_mtu_enabled: Boolean indicating if MTU is enabled on the BLE device.
 
         Returns:
-            A list of lists of byte arrays. The outer list represents the "4K chunks"
-            and the inner lists contain the actual BLE packets for each 4K chunk.
+            A list of lists of BLE packets. The outer list represents the "4K chunks"
+            and the inner lists contain the actual BLE packets for each 4K chunk, as memoryview slices
+            of a single buffer per chunk.
         """
-        send_data_3 = []
-
-        image_data_len_bytes = self._int_to_bytes_le(len(image_data))
-
-        # 1. Chunk the image_data into 4096-byte chunks (or smaller for the last one)
-        # This corresponds to `getSendData4096`
-        chunks_4096 = self.chunk_data_by_size(image_data, CHUNK_SIZE_4096)
-
-        # 2. Process each 4096-byte chunk to create the "large packet" structure
-        # This corresponds to the loop creating `arrayList` in `sendDIYImageData`
-        processed_large_packets = []
-        for i, chunk in enumerate(chunks_4096):
-            packet_length = len(chunk) + 9  # 9 bytes for the header
-            packet_length_bytes = self._short_to_bytes_le(packet_length)
-
-            # Construct the header for this large packet
-            header = bytearray(9)
-            header[0] = packet_length_bytes[0]  # Little-endian short
-            header[1] = packet_length_bytes[1]
-            header[2] = 0  # Command or type
-            header[3] = 0  # Sub-command or subtype
-
-            if i > 0:
-                header[4] = 2  # Continuation packet
-            else:
-                header[4] = 0  # First packet
-
-            header[5] = image_data_len_bytes[0]  # Total image data length (little-endian int)
-            header[6] = image_data_len_bytes[1]
-            header[7] = image_data_len_bytes[2]
-            header[8] = image_data_len_bytes[3]
-
-            # Combine header and the current 4096B chunk data
-            large_packet_data = bytes(header) + chunk
-            processed_large_packets.append(large_packet_data)
-
-        # 3. Split each "large packet" into smaller BLE packets
-        # This corresponds to the loop calling `getSendData` and adding to `sendData3`
-        for i, large_packet in enumerate(processed_large_packets):
-            ble_packets_for_chunk = self._create_ble_packets(large_packet, ble_device_mtu_enabled)
-            send_data_3.append(ble_packets_for_chunk)
+        image_data_length = len(image_data)
 
-        return send_data_3
+        def write_header(frame: bytearray, index: int, payload_size: int):
+            # Packet length (little-endian short), command or type, sub-command or subtype,
+            # first (0) or continuation (2) packet, total image data length (little-endian int)
+            DIY_IMAGE_HEADER.pack_into(frame, 0, payload_size + DIY_IMAGE_HEADER.size, 0, 0, 2 if index > 0 else 0,
+                                       image_data_length)
+
+        # 1. Chunk the image_data into 4096-byte chunks (or smaller for the last one), each with a header
+        # This corresponds to `getSendData4096` and the loop creating `arrayList` in `sendDIYImageData`
+        # 2. Split each "large packet" into smaller BLE packets
+        # This corresponds to the loop calling `getSendData` and adding to `sendData3`
+        return build_framed_packets(
+            image_data,
+            header_size=DIY_IMAGE_HEADER.size,
+            write_header=write_header,
+            chunk_size=CHUNK_SIZE_4096,
+            ble_packet_size=MTU_SIZE_IF_ENABLED if ble_device_mtu_enabled else MTU_SIZE_IF_DISABLED,
+        )
@@ -1,8 +1,9 @@
 import logging
+from typing import Optional
 
-from cryptography.fernet import Fernet
-
+from idotmatrix.connection_manager import ConnectionManager
 from idotmatrix.modules import IDotMatrixModule
+from idotmatrix.util.gif_slots import GifSlotManager
 
 
 class SystemModule(IDotMatrixModule):
@@ -10,6 +11,14 @@ class SystemModule(IDotMatrixModule):
 
     logging = logging.getLogger(__name__)
 
+    def __init__(
+        self,
+        connection_manager: ConnectionManager,
+        gif_slot_manager: Optional[GifSlotManager] = None,
+    ):
+        super().__init__(connection_manager=connection_manager)
+        self._gif_slot_manager = gif_slot_manager
+
     async def delete_device_data(self):
         """
         Deletes the device data and resets it to defaults.
@@ -36,6 +45,8 @@ class SystemModule(IDotMatrixModule):
             ]
         )
         await self._send_bytes(data=data)
+        if self._gif_slot_manager is not None and self._connection_manager.address:
+            self._gif_slot_manager.invalidate(self._connection_manager.address)
 
     @staticmethod
     def _encrypt_aes(data: bytes, key: bytes) -> bytes:
@@ -49,6 +60,8 @@ class SystemModule(IDotMatrixModule):
         Returns:
             bytes: Encrypted data.
         """
+        # cryptography is only needed here, so it is not imported with the module
+        from cryptography.fernet import Fernet
         f = Fernet(key)
         encrypted_data = f.encrypt(data)
         return encrypted_data
@@ -78,6 +91,7 @@ class SystemModule(IDotMatrixModule):
                 0,
             ]
         )
+        from cryptography.fernet import Fernet
         key = Fernet.generate_key()
         data = self._encrypt_aes(bytes(command), key)
         await self._send_bytes(data=data)
@@ -3,10 +3,9 @@ import zlib
 from enum import Enum
 from typing import Tuple, Optional
 
-from PIL import Image, ImageDraw, ImageFont
-
 from idotmatrix.modules import IDotMatrixModule
 from idotmatrix.util import color_utils
+from idotmatrix.util.glyph_cache import GlyphCache
 
 
 class TextMode(Enum):
@@ -39,6 +38,9 @@ class TextModule(IDotMatrixModule):
     image_height = 32
     # must be x05 for 16x32 or x02 for 8x16
     separator = b"\x05\xff\xff\xff"
+    # shared by all instances, rendered characters only depend on font, font size and image size
+    # todo make image the correct size for 16x16, 32x32 and 64x64
+    glyph_cache = GlyphCache(glyph_width=image_width, glyph_height=image_height)
 
     async def show_text(
         self,
@@ -181,24 +183,8 @@ class TextModule(IDotMatrixModule):
         if not font_path:
             # using open source font from https://www.fontspace.com/rain-font-f22577
             font_path = "./fonts/Rain-DRM3.otf"
-        font = ImageFont.truetype(font_path, font_size)
         byte_stream = bytearray()
         for char in text:
-            # todo make image the correct size for 16x16, 32x32 and 64x64
-            image = Image.new("1", (self.image_width, self.image_height), 0)
-            draw = ImageDraw.Draw(image)
-            _, _, text_width, text_height = draw.textbbox((0, 0), text=char, font=font)
-            text_x = (self.image_width - text_width) // 2
-            text_y = (self.image_height - text_height) // 2
-            draw.text((text_x, text_y), char, fill=1, font=font)
-            bitmap = bytearray()
-            for y in range(self.image_height):
-                for x in range(self.image_width):
-                    if x % 8 == 0:
-                        byte = 0
-                    pixel = image.getpixel((x, y))
-                    byte |= (pixel & 1) << (x % 8)
-                    if x % 8 == 7 or x == self.image_width - 1:
-                        bitmap.append(byte)
-            byte_stream.extend(self.separator + bitmap)
+            byte_stream += self.separator
+            byte_stream += self.glyph_cache.get_bitmap(char, font_path=font_path, font_size=font_size)
         return byte_stream
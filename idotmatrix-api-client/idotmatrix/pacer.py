@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import time
+from typing import Dict
+
+# factor applied to the smoothed acknowledgement latency to get the learned gap between two commands
+DEFAULT_SAFETY_FACTOR = 1.5
+# weight of a new acknowledgement latency in the exponentially smoothed average
+DEFAULT_SMOOTHING = 0.25
+# number of acknowledgements of a command type before its learned gap is used
+DEFAULT_MIN_ACKNOWLEDGEMENTS = 3
+# number of missing acknowledgements after which a command type is paced with its default gap only
+DEFAULT_MAX_MISSING_ACKNOWLEDGEMENTS = 3
+
+
+class _CommandTiming:
+    def __init__(self):
+        self.average_latency = 0.0
+        self.acknowledgement_count = 0
+        self.missing_acknowledgement_count = 0
+
+
+class AdaptivePacer:
+    """
+    Paces the commands sent to a device.
+
+    Some commands are not answered by the device, but the device needs a moment to process them before it is able
+    to receive the next one. Instead of sleeping for a fixed time after each of these commands, the pacer remembers
+    when the device will be ready again and only delays the next command until then.
+
+    The gap between two commands is learned per command type from the acknowledgements (notifications) of the
+    device: the time until the device acknowledges a command, smoothed and multiplied by a safety factor.
+    Command types that are not acknowledged are paced with the conservative default gap given by the caller.
+    """
+    logging = logging.getLogger(__name__)
+
+    def __init__(
+        self,
+        safety_factor: float = DEFAULT_SAFETY_FACTOR,
+        smoothing: float = DEFAULT_SMOOTHING,
+        min_acknowledgements: int = DEFAULT_MIN_ACKNOWLEDGEMENTS,
+        max_missing_acknowledgements: int = DEFAULT_MAX_MISSING_ACKNOWLEDGEMENTS,
+    ):
+        """
+        Initializes the AdaptivePacer.
+        Args:
+            safety_factor (float): Factor applied to the smoothed acknowledgement latency.
+            smoothing (float): Weight (0..1) of a new acknowledgement latency in the smoothed average.
+            min_acknowledgements (int): Number of acknowledgements of a command type before its learned gap is used.
+            max_missing_acknowledgements (int): Number of missing acknowledgements after which a command type is no
+                longer expected to be acknowledged.
+        """
+        self.safety_factor = safety_factor
+        self.smoothing = smoothing
+        self.min_acknowledgements = min_acknowledgements
+        self.max_missing_acknowledgements = max_missing_acknowledgements
+        self._timings: Dict[str, _CommandTiming] = {}
+        self._ready_at = 0.0
+
+    def _get_timing(self, command: str) -> _CommandTiming:
+        timing = self._timings.get(command)
+        if timing is None:
+            timing = self._timings[command] = _CommandTiming()
+        return timing
+
+    def has_learned_gap(self, command: str) -> bool:
+        """
+        Returns:
+            bool: True if enough acknowledgements of the command type have been seen to use its learned gap.
+        """
+        timing = self._timings.get(command)
+        return timing is not None and timing.acknowledgement_count >= self.min_acknowledgements
+
+    def expects_acknowledgement(self, command: str) -> bool:
+        """
+        Returns:
+            bool: False if the device has repeatedly not acknowledged the command type.
+        """
+        timing = self._timings.get(command)
+        return timing is None or timing.missing_acknowledgement_count < self.max_missing_acknowledgements
+
+    def get_gap(self, command: str, default_gap: float) -> float:
+        """
+        Returns the time the device needs after a command of the given type before it can receive the next one.
+        Args:
+            command (str): The command type, see idotmatrix.metrics.command_type.
+            default_gap (float): The conservative gap in seconds, used until a gap has been learned.
+        Returns:
+            float: The gap in seconds, never more than default_gap.
+        """
+        if not self.has_learned_gap(command):
+            return default_gap
+        return min(self._timings[command].average_latency * self.safety_factor, default_gap)
+
+    def record_acknowledgement(self, command: str, latency: float):
+        """
+        Records the time between sending a command and its acknowledgement by the device.
+        """
+        timing = self._get_timing(command)
+        if timing.acknowledgement_count == 0:
+            timing.average_latency = latency
+        else:
+            timing.average_latency += self.smoothing * (latency - timing.average_latency)
+        timing.acknowledgement_count += 1
+        timing.missing_acknowledgement_count = 0
+
+    def record_missing_acknowledgement(self, command: str):
+        """
+        Records that a command has not been acknowledged within its default gap.
+        """
+        timing = self._get_timing(command)
+        timing.missing_acknowledgement_count += 1
+        if timing.missing_acknowledgement_count == self.max_missing_acknowledgements:
+            self.logging.info(f"command {command} is not acknowledged by the device, using its default gap")
+
+    def defer(self, seconds: float):
+        """
+        Delays the next command until the given time has passed.
+        """
+        self._ready_at = max(self._ready_at, time.monotonic() + seconds)
+
+    def set_ready(self):
+        """
+        Allows the next command to be sent right away, e.g. because the device acknowledged the last command.
+        """
+        self._ready_at = 0.0
+
+    async def wait_until_ready(self):
+        """
+        Waits until the device is ready to receive the next command.
+        """
+        delay = self._ready_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @property
+    def learned_gaps(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dict[str, float]: The learned gap in seconds per command type, for command types with enough acknowledgements.
+        """
+        return {
+            command: timing.average_latency * self.safety_factor
+            for command, timing in self._timings.items()
+            if timing.acknowledgement_count >= self.min_acknowledgements
+        }
+
+    def reset(self):
+        """
+        Forgets all learned gaps.
+        """
+        self._timings.clear()
+        self._ready_at = 0.0
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import random
+from types import SimpleNamespace
+from typing import Callable, List, Optional
+
+from bleak.exc import BleakError
+
+from idotmatrix.connection_manager import ConnectionManager
+from idotmatrix.const import UUID_CHARACTERISTIC_WRITE_DATA, UUID_READ_DATA
+
+SIMULATED_DEVICE_ADDRESS = "00:00:00:00:00:00"
+DEFAULT_MTU = 514  # max_write_without_response_size reported by real 64x64 devices
+MAX_WRITE_WITH_RESPONSE_SIZE = 512
+DEFAULT_ACKNOWLEDGEMENT = bytes([5, 0, 1, 0, 1])
+
+
+class SimulatedCharacteristic:
+    """A GATT characteristic of the SimulatedPeripheral."""
+
+    def __init__(self, uuid: str, handle: int, properties: List[str], max_write_without_response_size: int):
+        self.uuid = uuid
+        self.handle = handle
+        self.properties = properties
+        self.max_write_without_response_size = max_write_without_response_size
+        self.description = "Vendor specific"
+
+
+class SimulatedServices:
+    """The GATT services of the SimulatedPeripheral, mimicking bleak's BleakGATTServiceCollection."""
+
+    def __init__(self, mtu: int):
+        self._characteristics = {
+            UUID_CHARACTERISTIC_WRITE_DATA: SimulatedCharacteristic(
+                UUID_CHARACTERISTIC_WRITE_DATA, 5, ["write-without-response", "write"], mtu,
+            ),
+            UUID_READ_DATA: SimulatedCharacteristic(UUID_READ_DATA, 8, ["notify"], mtu),
+        }
+        self._service = SimpleNamespace(
+            uuid="000000fa-0000-1000-8000-00805f9b34fb",
+            handle=4,
+            characteristics=list(self._characteristics.values()),
+        )
+
+    def get_characteristic(self, uuid: str) -> Optional[SimulatedCharacteristic]:
+        return self._characteristics.get(uuid)
+
+    def __iter__(self):
+        return iter([self._service])
+
+
+class SimulatedPeripheral:
+    """
+    In-process stand-in for a BleakClient connected to an iDotMatrix device, for tests and benchmarks
+    without hardware.
+
+    Written data is reassembled into protocol packets using the little-endian length in the first two bytes
+    of every packet: the writes of a packet are collected until they add up to at least that length. Packets always
+    end with a write, so commands whose length header doesn't match their size (e.g. effects) and short commands
+    without a length header are received as one packet per write. Every completed packet is acknowledged with a notification on UUID_READ_DATA (if subscribed),
+    and the acknowledgement can also be read from UUID_READ_DATA.
+    """
+    logging = logging.getLogger(__name__)
+
+    def __init__(
+        self,
+        mtu: int = DEFAULT_MTU,
+        write_latency_seconds: float = 0.0,
+        jitter_seconds: float = 0.0,
+        drop_rate: float = 0.0,
+        acknowledge: bool = True,
+        acknowledgement_delay_seconds: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initializes the SimulatedPeripheral.
+        Args:
+            mtu (int): Maximum size of a write-without-response. Larger writes are rejected.
+            write_latency_seconds (float): Time every write takes.
+            jitter_seconds (float): Maximum random deviation from write_latency_seconds.
+            drop_rate (float): Probability (0..1) that a write-without-response is lost. Packets with lost
+                chunks are not acknowledged.
+            acknowledge (bool): Whether completed packets are acknowledged at all.
+            acknowledgement_delay_seconds (float): Time between completing a packet and its acknowledgement.
+            seed (Optional[int]): Seed for the random jitter and drops, for reproducible runs.
+        """
+        self.address = SIMULATED_DEVICE_ADDRESS
+        self.mtu = mtu
+        self.write_latency_seconds = write_latency_seconds
+        self.jitter_seconds = jitter_seconds
+        self.drop_rate = drop_rate
+        self.acknowledge = acknowledge
+        self.acknowledgement_delay_seconds = acknowledgement_delay_seconds
+        self.services = SimulatedServices(mtu)
+
+        self.is_connected = False
+        self.write_count = 0
+        self.dropped_write_count = 0
+        self.bytes_received = 0
+        self.packets: List[bytes] = []
+
+        self._random = random.Random(seed)
+        self._notification_callback: Optional[Callable] = None
+        self._pending_tasks = set()
+        self._buffer = bytearray()
+        self._is_buffer_corrupt = False
+        self._last_response = b""
+        # accessed by ConnectionManager._create_ble_client when the address is changed
+        self._backend = SimpleNamespace(address=self.address)
+
+    def attach(self, connection_manager: ConnectionManager) -> ConnectionManager:
+        """
+        Makes the connection manager talk to this simulated peripheral instead of a real device.
+        """
+        connection_manager.client = self
+        connection_manager.set_address(self.address)
+        return connection_manager
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def disconnect(self):
+        self.is_connected = False
+        self._notification_callback = None
+        # a partially received packet is discarded
+        self._buffer.clear()
+        self._is_buffer_corrupt = False
+
+    async def start_notify(self, char_specifier: str, callback: Callable):
+        if char_specifier != UUID_READ_DATA:
+            raise BleakError(f"characteristic {char_specifier} does not support notifications")
+        self._notification_callback = callback
+
+    async def stop_notify(self, char_specifier: str):
+        self._notification_callback = None
+
+    async def read_gatt_char(self, char_specifier: str) -> bytearray:
+        self._ensure_connected()
+        await self._simulate_latency()
+        return bytearray(self._last_response)
+
+    async def write_gatt_char(self, char_specifier: str, data: bytes | bytearray | memoryview, response: bool = False):
+        self._ensure_connected()
+        if char_specifier != UUID_CHARACTERISTIC_WRITE_DATA:
+            raise BleakError(f"characteristic {char_specifier} is not writable")
+        max_size = MAX_WRITE_WITH_RESPONSE_SIZE if response else self.mtu
+        if len(data) > max_size:
+            raise BleakError(f"write of {len(data)} bytes exceeds the maximum of {max_size} bytes")
+
+        await self._simulate_latency()
+        self.write_count += 1
+        if not response and self.drop_rate > 0 and self._random.random() < self.drop_rate:
+            self.dropped_write_count += 1
+            # the lost data still counts towards the packet it belongs to, which becomes corrupt
+            self._receive(bytes(data), is_corrupt=True)
+        else:
+            self._receive(bytes(data), is_corrupt=False)
+
+    def _ensure_connected(self):
+        if not self.is_connected:
+            raise BleakError("not connected")
+
+    async def _simulate_latency(self):
+        latency = self.write_latency_seconds
+        if self.jitter_seconds > 0:
+            latency += self._random.uniform(-self.jitter_seconds, self.jitter_seconds)
+        # always yield to the event loop, like a real transport does
+        await asyncio.sleep(max(latency, 0))
+
+    def _receive(self, data: bytes, is_corrupt: bool):
+        self.bytes_received += len(data)
+        self._buffer += data
+        self._is_buffer_corrupt |= is_corrupt
+        packet_length = int.from_bytes(self._buffer[:2], byteorder="little") if len(self._buffer) >= 2 else 0
+        if len(self._buffer) < packet_length:
+            # more writes of this packet will follow
+            return
+        packet = bytes(self._buffer)
+        self._buffer.clear()
+        self._on_packet(packet, is_corrupt=self._is_buffer_corrupt)
+        self._is_buffer_corrupt = False
+
+    def _on_packet(self, packet: bytes, is_corrupt: bool):
+        self.packets.append(packet)
+        if is_corrupt or not self.acknowledge:
+            self.logging.debug(f"not acknowledging packet of {len(packet)} bytes (corrupt: {is_corrupt})")
+            return
+        self._last_response = DEFAULT_ACKNOWLEDGEMENT
+        if self._notification_callback is not None:
+            task = asyncio.get_running_loop().create_task(self._notify(DEFAULT_ACKNOWLEDGEMENT))
+            self._pending_tasks.add(task)
+            task.add_done_callback(self._pending_tasks.discard)
+
+    async def _notify(self, data: bytes):
+        if self.acknowledgement_delay_seconds > 0:
+            await asyncio.sleep(self.acknowledgement_delay_seconds)
+        if self._notification_callback is not None:
+            self._notification_callback(self.services.get_characteristic(UUID_READ_DATA), bytearray(data))
@@ -0,0 +1,154 @@
+from typing import List, Optional
+
+from idotmatrix.metrics import command_type
+
+# the next step is sent right after this one, e.g. because the device handles both commands in order anyway
+WAIT_NONE = "none"
+# the next step is delayed by the gap the device needs to process this one, learned from its acknowledgements
+# (see ConnectionManager.pace), using the given gap until a shorter one has been learned
+WAIT_PACED = "paced"
+# the next step is sent as soon as the device acknowledges this one, or after the given gap at the latest
+WAIT_ACKNOWLEDGEMENT = "acknowledgement"
+WAIT_CONDITIONS = (WAIT_NONE, WAIT_PACED, WAIT_ACKNOWLEDGEMENT)
+
+
+class TransactionStep:
+    def __init__(
+        self,
+        name: str,
+        packets: List[List[bytearray | bytes | memoryview]],
+        response: bool,
+        wait: str,
+        gap: float,
+    ):
+        """
+        A single command or multi-packet transfer of a Transaction.
+        Args:
+            name (str): Name of the step, used in its timing, e.g. the command type.
+            packets (List[List[bytearray | bytes | memoryview]]): The packets of the step.
+            response (bool): If True, a write-with-response operation will be used.
+            wait (str): The condition to wait for before the next step, one of WAIT_CONDITIONS.
+            gap (float): The maximum time in seconds to wait for the condition.
+        """
+        self.name = name
+        self.packets = packets
+        self.response = response
+        self.wait = wait
+        self.gap = gap
+
+    @property
+    def first_chunk(self) -> bytearray | bytes | memoryview:
+        return self.packets[0][0]
+
+    def __str__(self):
+        return f"TransactionStep({self.name}, {len(self.packets)} packet(s), wait={self.wait} {self.gap}s)"
+
+
+class StepTiming:
+    def __init__(
+        self,
+        name: str,
+        wait_seconds: float,
+        send_seconds: float,
+        acknowledged: Optional[bool] = None,
+    ):
+        """
+        Timing of a single step of a transaction run by the ConnectionManager.
+        Args:
+            name (str): The name of the step.
+            wait_seconds (float): The time between the end of the previous step (or the start of the transaction)
+                and the start of this step, i.e. the gap the device needed before it could receive this step.
+            send_seconds (float): The time it took to write the step to the device.
+            acknowledged (Optional[bool]): Whether the device acknowledged the step, None if the step did not wait
+                for an acknowledgement.
+        """
+        self.name = name
+        self.wait_seconds = wait_seconds
+        self.send_seconds = send_seconds
+        self.acknowledged = acknowledged
+
+    @property
+    def total_seconds(self) -> float:
+        return self.wait_seconds + self.send_seconds
+
+    def __str__(self):
+        return (
+            f"StepTiming({self.name}, waited {self.wait_seconds * 1000:.1f} ms, "
+            f"sent in {self.send_seconds * 1000:.1f} ms)"
+        )
+
+
+class Transaction:
+    """
+    An ordered list of commands, each with the condition to wait for before the next one is sent.
+    The ConnectionManager runs all steps of a transaction back to back (see ConnectionManager.run_transaction),
+    so no other command is sent in between, and only waits as long as each step requires.
+    """
+
+    def __init__(self):
+        self.steps: List[TransactionStep] = []
+
+    def add_command(
+        self,
+        data: bytearray | bytes,
+        response: bool = True,
+        wait: str = WAIT_NONE,
+        gap: float = 0.0,
+        name: Optional[str] = None,
+    ) -> "Transaction":
+        """
+        Adds a single command, e.g. encoded with a CommandTemplate.
+        Args:
+            data (bytearray | bytes): The command.
+            response (bool): If True, a write-with-response operation will be used. Defaults to True.
+            wait (str): The condition to wait for before the next step, one of WAIT_CONDITIONS. Defaults to WAIT_NONE.
+            gap (float): The maximum time in seconds to wait for the condition. Defaults to 0.
+            name (Optional[str]): Name of the step, defaults to the command type, e.g. "0401".
+        Returns:
+            Transaction: This transaction, so calls can be chained.
+        Raises:
+            ValueError: If the wait condition is unknown, or requires a gap that has not been given.
+        """
+        return self.add_packets([[data]], response=response, wait=wait, gap=gap, name=name)
+
+    def add_packets(
+        self,
+        packets: List[List[bytearray | bytes | memoryview]],
+        response: bool = True,
+        wait: str = WAIT_NONE,
+        gap: float = 0.0,
+        name: Optional[str] = None,
+    ) -> "Transaction":
+        """
+        Adds a multi-packet transfer, e.g. the packets of an image upload.
+        Args:
+            packets (List[List[bytearray | bytes | memoryview]]): The packets to send, see ConnectionManager.send_packets.
+            response (bool): If True, a write-with-response operation will be used. Defaults to True.
+            wait (str): The condition to wait for before the next step, one of WAIT_CONDITIONS. Defaults to WAIT_NONE.
+            gap (float): The maximum time in seconds to wait for the condition. Defaults to 0.
+            name (Optional[str]): Name of the step, defaults to the command type of the first packet.
+        Returns:
+            Transaction: This transaction, so calls can be chained.
+        Raises:
+            ValueError: If there are no packets, the wait condition is unknown, or it requires a gap that has not
+                been given.
+        """
+        if len(packets) == 0:
+            raise ValueError("a transaction step needs at least one packet")
+        if wait not in WAIT_CONDITIONS:
+            raise ValueError(f"unknown wait condition {wait}, expected one of {', '.join(WAIT_CONDITIONS)}")
+        if wait != WAIT_NONE and gap <= 0:
+            raise ValueError(f"wait condition {wait} requires a gap greater than 0")
+        self.steps.append(
+            TransactionStep(
+                name=name or command_type(packets[0][0]),
+                packets=packets,
+                response=response,
+                wait=wait,
+                gap=gap,
+            )
+        )
+        return self
+
+    def __len__(self):
+        return len(self.steps)
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Callable, List, Optional
+
+JOB_STATE_PENDING = "pending"
+JOB_STATE_RUNNING = "running"
+JOB_STATE_COMPLETED = "completed"
+JOB_STATE_CANCELLED = "cancelled"
+JOB_STATE_FAILED = "failed"
+
+# number of times a failed 4K packet is sent again before the transfer fails
+DEFAULT_MAX_RETRIES = 3
+# time to wait before sending a failed packet again
+DEFAULT_RETRY_DELAY_SECONDS = 1.0
+
+
+class TransferCancelledError(Exception):
+    """Raised by a transfer that has been stopped at a packet boundary because its TransferJob was cancelled."""
+
+
+class TransferJob:
+    """
+    Tracks a multi-packet transfer (e.g. a GIF upload) done by ConnectionManager.send_packets.
+
+    The job reports the progress of the transfer (bytes and 4K packets sent, estimated time remaining) to its
+    listeners, can be cancelled, in which case the transfer stops before its next packet, and allows the
+    ConnectionManager to retry a failed packet instead of failing the whole transfer.
+    """
+    logging = logging.getLogger(__name__)
+
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        retry_delay_seconds: float = DEFAULT_RETRY_DELAY_SECONDS,
+        job_id: Optional[str] = None,
+    ):
+        """
+        Initializes the TransferJob.
+        Args:
+            max_retries (int): Number of times a failed packet is sent again before the transfer fails.
+            retry_delay_seconds (float): Time to wait before sending a failed packet again.
+            job_id (Optional[str]): Identifier of the job. Defaults to a random ID.
+        """
+        self.id = job_id or uuid.uuid4().hex
+        self.max_retries = max_retries
+        self.retry_delay_seconds = retry_delay_seconds
+        self.state = JOB_STATE_PENDING
+        self.packet_count = 0
+        self.byte_count = 0
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.retry_count = 0
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._is_cancel_requested = False
+        self._listeners: List[Callable[["TransferJob"], None]] = []
+
+    def add_listener(self, listener: Callable[["TransferJob"], None]) -> None:
+        """
+        Adds a listener that is called with the job whenever its progress or state changes.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[["TransferJob"], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify_listeners(self):
+        for listener in list(self._listeners):
+            try:
+                listener(self)
+            except Exception as e:
+                self.logging.error(f"transfer job listener failed: {e}")
+
+    @property
+    def is_finished(self) -> bool:
+        return self.state in (JOB_STATE_COMPLETED, JOB_STATE_CANCELLED, JOB_STATE_FAILED)
+
+    @property
+    def is_cancel_requested(self) -> bool:
+        return self._is_cancel_requested
+
+    @property
+    def progress(self) -> float:
+        """
+        Returns:
+            float: The fraction (0..1) of the bytes that have been sent.
+        """
+        if self.state == JOB_STATE_COMPLETED:
+            return 1.0
+        if self.byte_count <= 0:
+            return 0.0
+        return self.bytes_sent / self.byte_count
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """
+        Returns:
+            Optional[float]: The estimated time until the transfer is complete, based on the throughput so far,
+                or None if it can not be estimated yet.
+        """
+        if self.state != JOB_STATE_RUNNING or self.bytes_sent <= 0:
+            return None
+        return self.elapsed_seconds / self.bytes_sent * (self.byte_count - self.bytes_sent)
+
+    def cancel(self) -> None:
+        """
+        Requests the transfer to stop. A running transfer stops before its next packet, so the packet that is
+        currently being written is always completed. A pending job is cancelled right away.
+        """
+        if self.is_finished:
+            return
+        self._is_cancel_requested = True
+        if self.state == JOB_STATE_PENDING:
+            self.set_cancelled()
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Raises:
+            TransferCancelledError: If the job has been cancelled.
+        """
+        if self._is_cancel_requested:
+            raise TransferCancelledError(f"transfer job {self.id} has been cancelled")
+
+    def start(self, packet_count: int, byte_count: int) -> None:
+        self.state = JOB_STATE_RUNNING
+        self.packet_count = packet_count
+        self.byte_count = byte_count
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.started_at = time.perf_counter()
+        self._notify_listeners()
+
+    def record_packet(self, byte_count: int) -> None:
+        """
+        Records that a packet of the transfer has been sent (and acknowledged, if the transfer expects a response).
+        """
+        self.packets_sent += 1
+        self.bytes_sent += byte_count
+        self._notify_listeners()
+
+    def can_retry(self) -> bool:
+        return self.retry_count < self.max_retries and not self._is_cancel_requested
+
+    async def retry(self, error: Exception) -> None:
+        """
+        Records a failed packet and waits before it is sent again.
+        """
+        self.retry_count += 1
+        self.logging.warning(
+            f"packet {self.packets_sent + 1} of transfer job {self.id} failed, "
+            f"retrying ({self.retry_count}/{self.max_retries}): {error}"
+        )
+        self._notify_listeners()
+        if self.retry_delay_seconds > 0:
+            await asyncio.sleep(self.retry_delay_seconds)
+
+    def restart(self) -> None:
+        """
+        Resets the progress, because the transfer has to start over with its first packet.
+        """
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self._notify_listeners()
+
+    def complete(self) -> None:
+        self._finish(JOB_STATE_COMPLETED)
+
+    def set_cancelled(self) -> None:
+        self._finish(JOB_STATE_CANCELLED)
+
+    def fail(self, error: Exception) -> None:
+        self.error = str(error) or type(error).__name__
+        self._finish(JOB_STATE_FAILED)
+
+    def _finish(self, state: str):
+        if self.is_finished:
+            return
+        self.state = state
+        self.finished_at = time.perf_counter()
+        self._notify_listeners()
+
+    def __str__(self):
+        return (
+            f"TransferJob(id={self.id}, state={self.state}, packets_sent={self.packets_sent}/{self.packet_count}, "
+            f"bytes_sent={self.bytes_sent}/{self.byte_count}, retry_count={self.retry_count})"
+        )
@@ -0,0 +1,87 @@
+import logging
+import threading
+from typing import Dict, List, Optional
+
+# maximum size of a write with response
+# see: https://bleak.readthedocs.io/en/latest/api/client.html#bleak.BleakClient.write_gatt_char
+MAX_WRITE_WITH_RESPONSE_SIZE = 512
+# payload size of the default ATT MTU (23 bytes minus the 3 byte ATT header), supported by every BLE link
+MIN_WRITE_SIZE = 20
+# write size that is probed if the BLE stack does not report the negotiated MTU,
+# my 64x64 device reports a max_write_without_response_size of 514 bytes, most of the time
+DEFAULT_PROBE_WRITE_SIZE = 514
+# write sizes to step down to after a failed write: payload sizes of common ATT MTUs (512, 247, 185, 23)
+STEP_DOWN_WRITE_SIZES = (509, 244, 182, MIN_WRITE_SIZE)
+
+
+class ChunkPlanner:
+    """
+    Plans the BLE writes for the packets of the protocol, using the largest write size the connection
+    to a device supports instead of the fixed chunk size the packets have been split into.
+
+    The write size of a device starts at the size reported by the BLE stack for the negotiated MTU.
+    If a write fails, the write size is stepped down to the next smaller common MTU size. The write size
+    that is known to work is cached per device.
+    """
+    logging = logging.getLogger(__name__)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._write_sizes: Dict[str, int] = {}
+
+    def get_write_size(self, device: str) -> Optional[int]:
+        """
+        Returns:
+            Optional[int]: The cached write size of the device, or None if it has not been probed yet.
+        """
+        with self._lock:
+            return self._write_sizes.get(device)
+
+    def probe(self, device: str, reported_size: Optional[int]) -> int:
+        """
+        Sets the initial write size of a device.
+        Args:
+            device (str): MAC address of the device.
+            reported_size (Optional[int]): The max_write_without_response_size reported by the BLE stack.
+                Some stacks report exactly the minimum of 20 bytes until the MTU has been negotiated, in which
+                case DEFAULT_PROBE_WRITE_SIZE is probed instead.
+        Returns:
+            int: The write size to use.
+        """
+        write_size = reported_size if reported_size and reported_size != MIN_WRITE_SIZE else DEFAULT_PROBE_WRITE_SIZE
+        with self._lock:
+            write_size = self._write_sizes.setdefault(device, write_size)
+        self.logging.debug(f"write size of {device} is {write_size} bytes (reported: {reported_size})")
+        return write_size
+
+    def step_down(self, device: str, failed_size: int) -> Optional[int]:
+        """
+        Lowers the write size of a device after a write of the given size failed.
+        Args:
+            device (str): MAC address of the device.
+            failed_size (int): Size of the failed write.
+        Returns:
+            Optional[int]: The new write size, or None if no smaller write size is left to try.
+        """
+        smaller_sizes = [size for size in STEP_DOWN_WRITE_SIZES if size < failed_size]
+        if not smaller_sizes:
+            return None
+        with self._lock:
+            write_size = min(self._write_sizes.get(device, failed_size), smaller_sizes[0])
+            self._write_sizes[device] = write_size
+        self.logging.warning(f"write of {failed_size} bytes to {device} failed, stepping down to {write_size} bytes")
+        return write_size
+
+    def forget(self, device: str):
+        """
+        Forgets the write size of a device, so it is probed again on the next transfer.
+        """
+        with self._lock:
+            self._write_sizes.pop(device, None)
+
+    @staticmethod
+    def join(packet: List[bytearray | bytes]) -> bytes | bytearray:
+        """
+        Joins the chunks of a protocol packet, so it can be re-sliced to the write size of the connection.
+        """
+        return packet[0] if len(packet) == 1 else b"".join(packet)
@@ -1,52 +1,69 @@
+import itertools
+from functools import lru_cache
 from typing import Tuple
 
+from idotmatrix.util.named_colors import NAMED_COLORS
+
 
 def parse_color_rgb(color: Tuple[int, int, int] | int | str) -> Tuple[int, int, int]:
     """
     Parses a color input and returns it as an RGB tuple.
     Args:
         color (tuple, int, str): Color in RGB format as a tuple of three integers (r, g, b),
-                                 an integer (0 to 16777215), or a string in hex format (#RRGGBB or 0xRRGGBB)
-                                 or a named color.
+                                 an integer (0 to 16777215), or a string in hex format (#RRGGBB, #RGB or 0xRRGGBB)
+                                 or a named color (CSS/X11, e.g. "black" or "SteelBlue"). Other color
+                                 specifications, e.g. "tab:blue", are resolved with matplotlib, if it is installed.
     """
     if color is None:
         return None
     if isinstance(color, int):
-        if not (0 <= color < 16777216):
-            raise ValueError("Color integer must be between 0 and 16777215 (0xFFFFFF)")
-        # Convert integer to RGB tuple
-        r = (color >> 16) & 0xFF
-        g = (color >> 8) & 0xFF
-        b = color & 0xFF
-        color = (r, g, b)
+        # int() turns subclasses, e.g. bool or IntEnum values, into plain cache keys
+        return _parse_color_int(int(color))
     elif isinstance(color, str):
-        if color.startswith("#"):
-            # Convert hex color to RGB
-            color = tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
-        elif color.startswith("0x"):
-            # Convert hex color with '0x' prefix to RGB
-            color = tuple(int(color[i:i + 2], 16) for i in (2, 4, 6))
-        else:
-            try:
-                from matplotlib import colors
-                color = colors.to_rgb(color)
-                # convert to integer values
-                color = tuple(int(c * 255) for c in color)
-            except:
-                raise ValueError(
-                    "Invalid color string. Use hex format (#RRGGBB), '0xRRGGBB', or a named color."
-                )
+        return _parse_color_str(str(color))
     elif isinstance(color, tuple):
+        # validating a tuple is about as fast as looking it up, so tuples are not cached
         if len(color) != 3:
             raise ValueError("Color tuple must contain three integers (r, g, b)")
         if not all(isinstance(c, int) for c in color):
             raise ValueError("Color tuple must contain three integers (r, g, b)")
         if not all(0 <= c < 256 for c in color):
             raise ValueError("Color values must be between 0 and 255")
+        return color
     else:
         raise ValueError("Color must be an integer, a string, or a tuple of three integers (r, g, b)")
 
-    return color
+
+@lru_cache(maxsize=1024)
+def _parse_color_int(color: int) -> Tuple[int, int, int]:
+    if not (0 <= color < 16777216):
+        raise ValueError("Color integer must be between 0 and 16777215 (0xFFFFFF)")
+    return (color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF
+
+
+@lru_cache(maxsize=1024)
+def _parse_color_str(color: str) -> Tuple[int, int, int]:
+    if color.startswith("#") or color.startswith("0x"):
+        digits = color[1:] if color.startswith("#") else color[2:]
+        if len(digits) == 3 and color.startswith("#"):
+            # CSS shorthand, e.g. #F80 is #FF8800
+            digits = "".join(digit * 2 for digit in digits)
+        if len(digits) < 6:
+            raise ValueError("Invalid color string. Use hex format (#RRGGBB), '0xRRGGBB', or a named color.")
+        return tuple(int(digits[i:i + 2], 16) for i in (0, 2, 4))
+
+    rgb = NAMED_COLORS.get(color.lower())
+    if rgb is not None:
+        return rgb
+
+    try:
+        # only needed for exotic color specifications, matplotlib is an optional dependency
+        from matplotlib import colors
+        return tuple(round(c * 255) for c in colors.to_rgb(color))
+    except:
+        raise ValueError(
+            "Invalid color string. Use hex format (#RRGGBB), '0xRRGGBB', or a named color."
+        )
 
 
 def parse_color_rgb_list(colors: list[Tuple[int, int, int] | int | str]) -> list[Tuple[int, int, int]]:
@@ -57,4 +74,39 @@ def parse_color_rgb_list(colors: list[Tuple[int, int, int] | int | str]) -> list
                        integers (0 to 16777215), or strings in hex format (#RRGGBB or 0xRRGGBB)
                        or named colors.
     """
-    return [parse_color_rgb(color) for color in colors]
+    parsed_colors = {}
+    result = []
+    for color in colors:
+        # images usually consist of a limited set of colors, so each distinct value is only parsed once
+        try:
+            key = (type(color), color)
+            rgb = parsed_colors.get(key)
+            if rgb is None:
+                rgb = parsed_colors[key] = parse_color_rgb(color)
+        except TypeError:
+            # unhashable input, let parse_color_rgb report the error
+            rgb = parse_color_rgb(color)
+        result.append(rgb)
+    return result
+
+
+def pack_color_rgb_list(colors: list[Tuple[int, int, int] | int | str]) -> bytearray:
+    """
+    Parses a list of color inputs and packs them into a bytearray with 3 bytes (r, g, b) per color.
+    Args:
+        colors (list): List of colors in RGB format as tuples of three integers (r, g, b),
+                       integers (0 to 16777215), or strings in hex format (#RRGGBB or 0xRRGGBB)
+                       or named colors.
+    """
+    if all(type(color) is tuple and len(color) == 3 for color in colors):
+        try:
+            # bytearray validates the range of all values itself, which is a lot faster than doing it per color
+            return bytearray(itertools.chain.from_iterable(colors))
+        except (TypeError, ValueError):
+            # fall through to get a meaningful error message for the offending color
+            pass
+
+    data = bytearray()
+    for color in parse_color_rgb_list(colors):
+        data.extend(color)
+    return data
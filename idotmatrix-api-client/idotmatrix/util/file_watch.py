@@ -1,8 +1,8 @@
+import re
 from collections.abc import Callable
 from pathlib import Path
 from typing import Dict
 
-from dulwich.ignore import Pattern
 from watchdog.events import FileSystemEventHandler, EVENT_TYPE_MODIFIED, EVENT_TYPE_MOVED, EVENT_TYPE_CREATED, \
     EVENT_TYPE_DELETED, FileSystemEvent
 
@@ -11,7 +11,7 @@ class ImageFileEventHandler(FileSystemEventHandler):
 
     def __init__(
         self,
-        file_filter: Pattern,
+        file_filter: re.Pattern,
         on_created: Callable[[Path], None] = None,
         on_modified: Callable[[Path], None] = None,
         on_moved: Callable[[Path, Path], None] = None,
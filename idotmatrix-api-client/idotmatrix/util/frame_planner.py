@@ -0,0 +1,209 @@
+import io
+from itertools import accumulate
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image as PILImage
+
+ANIMATION_MAX_FRAME_COUNT = 64  # Maximum number of frames in a GIF animation
+DEFAULT_DURATION_PER_FRAME_MS = 200  # Default duration per frame in milliseconds if not specified in the GIF file
+ANIMATION_TOTAL_DURATION_LIMIT_MS = 2000
+DEFAULT_ANIMATION_TOTAL_DURATION_MS = ANIMATION_TOTAL_DURATION_LIMIT_MS
+MIN_FRAME_DURATION_MS = 16  # 60fps, shorter frames might be too fast for the device
+
+GIF_EXTENSION_INTRODUCER = 0x21
+GIF_GRAPHIC_CONTROL_LABEL = 0xF9
+GIF_IMAGE_SEPARATOR = 0x2C
+GIF_TRAILER = 0x3B
+
+
+class FramePlan:
+    """
+    The frames of an animation to keep, and how long to show each of them.
+    """
+
+    def __init__(self, indices: List[int], durations: List[int], source_frame_count: int):
+        self.indices = indices
+        self.durations = durations
+        self.source_frame_count = source_frame_count
+
+    @property
+    def total_duration(self) -> int:
+        return sum(self.durations)
+
+    def __str__(self):
+        return (
+            f"FramePlan({len(self.indices)} of {self.source_frame_count} frames, {self.total_duration} ms)"
+        )
+
+
+def read_frame_durations(data: bytes) -> List[Optional[int]]:
+    """
+    Reads the duration of every frame of an animation, without decoding the frames if possible.
+
+    GIF files are only scanned for their frame headers. Other formats are read with Pillow, which decodes
+    every frame while seeking.
+
+    Args:
+        data (bytes): The content of the animation file.
+    Returns:
+        List[Optional[int]]: The duration of every frame in milliseconds, None if a frame has no duration.
+    """
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return read_gif_frame_durations(data)
+
+    durations = []
+    with PILImage.open(io.BytesIO(data)) as img:
+        for index in range(getattr(img, "n_frames", 1)):
+            img.seek(index)
+            durations.append(img.info.get("duration"))
+    return durations
+
+
+def read_gif_frame_durations(data: bytes) -> List[Optional[int]]:
+    """
+    Reads the duration of every frame of a GIF file from its graphic control extensions, skipping the image data.
+
+    Args:
+        data (bytes): The content of the GIF file.
+    Returns:
+        List[Optional[int]]: The duration of every frame in milliseconds, None if a frame has no duration.
+    Raises:
+        ValueError: If the data is not a GIF file.
+    """
+    if data[:6] not in (b"GIF87a", b"GIF89a"):
+        raise ValueError("data is not a GIF file")
+
+    offset = 13  # header and logical screen descriptor
+    flags = data[10]
+    if flags & 0x80:
+        offset += 3 << ((flags & 7) + 1)  # global color table
+
+    durations = []
+    duration = None
+    while offset < len(data):
+        block = data[offset]
+        offset += 1
+        if block == GIF_EXTENSION_INTRODUCER:
+            label = data[offset]
+            offset += 1
+            if label == GIF_GRAPHIC_CONTROL_LABEL and offset + 4 < len(data):
+                # sub-block length, packed fields, delay time in 1/100s, transparent color index
+                duration = int.from_bytes(data[offset + 2:offset + 4], byteorder="little") * 10
+            offset = _skip_sub_blocks(data, offset)
+        elif block == GIF_IMAGE_SEPARATOR:
+            flags = data[offset + 8] if offset + 8 < len(data) else 0
+            offset += 9  # position, size and packed fields
+            if flags & 0x80:
+                offset += 3 << ((flags & 7) + 1)  # local color table
+            offset += 1  # LZW minimum code size
+            offset = _skip_sub_blocks(data, offset)
+            durations.append(duration)
+            duration = None
+        elif block == GIF_TRAILER:
+            break
+        else:
+            raise ValueError(f"invalid GIF block {block:#04x} at offset {offset - 1}")
+    return durations
+
+
+def _skip_sub_blocks(data: bytes, offset: int) -> int:
+    while offset < len(data) and data[offset]:
+        offset += data[offset] + 1
+    return offset + 1
+
+
+def plan_frames(
+    durations: Sequence[Optional[int]],
+    duration_per_frame_in_ms: Optional[int] = None,
+    default_total_duration: int = DEFAULT_ANIMATION_TOTAL_DURATION_MS,
+    default_duration_per_frame: int = DEFAULT_DURATION_PER_FRAME_MS,
+    total_duration_limit_ms: int = ANIMATION_TOTAL_DURATION_LIMIT_MS,
+    max_total_frame_count: int = ANIMATION_MAX_FRAME_COUNT,
+) -> FramePlan:
+    """
+    The device can only handle a limited number of frames in a GIF animation, due to limited processing power
+    and memory, and long animations take a long time to upload. This function chooses the frames to keep, so that
+    the animation has at most max_total_frame_count frames and lasts at most total_duration_limit_ms.
+
+    An animation that is too long is played faster, keeping the relative timing of its frames. Frames that would
+    become too short for the device are skipped: a skipped frame's time is added to the kept frame before it,
+    so a long pause stays a long pause, while a burst of short frames is thinned out. If there are still too
+    many frames, only as many frames as needed are skipped, spread evenly over the animation.
+
+    Args:
+        durations (Sequence[Optional[int]]): The duration of every frame in milliseconds, None or 0 if unknown,
+            see read_frame_durations.
+        duration_per_frame_in_ms (int, optional): Duration of each frame in milliseconds, overriding the durations
+            of the frames.
+        default_total_duration (int): Total duration of an animation without valid frame durations.
+        default_duration_per_frame (int): Duration of frames that don't specify any duration.
+        total_duration_limit_ms (int): Maximum total duration of the animation.
+        max_total_frame_count (int): Maximum number of frames.
+    Returns:
+        FramePlan: The indices of the frames to keep and their durations.
+    """
+    frame_count = len(durations)
+    if frame_count == 0:
+        raise ValueError("durations cannot be empty")
+
+    if duration_per_frame_in_ms is not None:
+        durations = [duration_per_frame_in_ms] * frame_count
+    else:
+        durations = [
+            default_duration_per_frame if duration is None
+            # if the value we get is not reasonable, spread the frames over the default total duration
+            else duration if isinstance(duration, (int, float)) and duration > 0
+            else default_total_duration / frame_count
+            for duration in durations
+        ]
+    durations = [max(duration, MIN_FRAME_DURATION_MS) for duration in durations]
+
+    source_duration = sum(durations)
+    # factor by which the animation is played faster to stay within the duration limit
+    speedup = max(1.0, source_duration / total_duration_limit_ms)
+
+    indices = []
+    planned_durations = []
+    for index, duration in enumerate(durations):
+        duration /= speedup
+        if planned_durations and planned_durations[-1] < MIN_FRAME_DURATION_MS:
+            # skip the frame, the previous frame is shown instead
+            planned_durations[-1] += duration
+        else:
+            indices.append(index)
+            planned_durations.append(duration)
+    # only the last frame can be shorter than MIN_FRAME_DURATION_MS
+    if len(indices) > 1 and planned_durations[-1] < MIN_FRAME_DURATION_MS:
+        indices.pop()
+        last_duration = planned_durations.pop()
+        planned_durations[-1] += last_duration
+
+    if len(indices) > max_total_frame_count:
+        indices, planned_durations = _skip_frames_evenly(indices, planned_durations, max_total_frame_count)
+
+    # round the end time of every frame, so the rounding errors don't add up
+    end_times = [round(end_time) for end_time in accumulate(planned_durations)]
+    return FramePlan(
+        indices=indices,
+        durations=[end - start for start, end in zip([0] + end_times, end_times)],
+        source_frame_count=frame_count,
+    )
+
+
+def _skip_frames_evenly(
+    indices: List[int],
+    durations: List[float],
+    frame_count: int,
+) -> Tuple[List[int], List[float]]:
+    """
+    Keeps frame_count of the given frames, including the first and the last one, skipping as few frames as possible
+    in between. The time of every skipped frame is added to the kept frame before it.
+    """
+    if frame_count <= 1:
+        return indices[:1], [sum(durations)]
+    stride = (len(indices) - 1) / (frame_count - 1)
+    positions = [round(i * stride) for i in range(frame_count)]
+    return (
+        [indices[position] for position in positions],
+        [sum(durations[start:end]) for start, end in zip(positions, positions[1:] + [len(durations)])],
+    )
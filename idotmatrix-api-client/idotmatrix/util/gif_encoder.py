@@ -0,0 +1,128 @@
+from typing import Sequence, Tuple
+
+from PIL import GifImagePlugin, Image as PILImage, ImageChops
+
+# colors available for the frames, the last of the 256 palette indices is kept free for transparency
+PALETTE_COLOR_COUNT = 255
+
+
+def quantize_with_global_palette(
+    frames: Sequence[PILImage.Image],
+    colors: int = PALETTE_COLOR_COUNT,
+) -> Tuple[PILImage.Image, bytes]:
+    """
+    Quantizes all frames against one palette that is computed across all of them.
+
+    Instead of building an adaptive palette for every frame, the frames are stacked into a single image strip,
+    which is quantized once, so the palette computation and the mapping of the pixels run in a single pass.
+
+    Args:
+        frames (Sequence[PILImage.Image]): The frames, all of the same size. Transparent pixels must already have
+            been filled with the background color.
+        colors (int): The number of colors of the palette, at most 255 (one index is reserved for transparency).
+    Returns:
+        Tuple[PILImage.Image, bytes]: The palette indices of all frames, stacked vertically, as an "L" image, and
+            the palette, containing only the RGB colors up to the highest index in use.
+    """
+    if not frames:
+        raise ValueError("frames cannot be empty")
+    if not 1 <= colors <= PALETTE_COLOR_COUNT:
+        raise ValueError(f"colors must be between 1 and {PALETTE_COLOR_COUNT}, got: {colors}")
+    width, height = frames[0].size
+    if any(frame.size != (width, height) for frame in frames):
+        raise ValueError("all frames must have the same size")
+
+    strip = PILImage.new("RGB", (width, height * len(frames)))
+    for i, frame in enumerate(frames):
+        strip.paste(frame if frame.mode == "RGB" else frame.convert("RGB"), (0, i * height))
+    quantized_strip = strip.quantize(
+        colors=colors,
+        method=PILImage.Quantize.MEDIANCUT,
+        dither=PILImage.Dither.NONE,
+    )
+    _, highest_index = quantized_strip.getextrema()
+    palette = quantized_strip.getpalette()[:(highest_index + 1) * 3]
+    # the raw indices, without applying the palette
+    indices = PILImage.frombytes("L", quantized_strip.size, quantized_strip.tobytes())
+    return indices, bytes(palette)
+
+
+def encode_gif_with_global_palette(
+    frames: Sequence[PILImage.Image],
+    durations: float | Sequence[float],
+    colors: int = PALETTE_COLOR_COUNT,
+) -> bytes:
+    """
+    Encodes frames as an animated GIF with a single global color table and delta frames.
+
+    Every frame after the first one is stored as the minimal rectangle that changed since the previous frame,
+    with unchanged pixels inside that rectangle set to the transparent index, while the previous frame is kept
+    underneath. Frames that don't change anything are merged into the previous one. Compared to palettizing
+    every frame on its own, this avoids a local color table per frame and compresses much better.
+
+    Args:
+        frames (Sequence[PILImage.Image]): The frames, all of the same size and without transparent pixels.
+        durations (float | Sequence[float]): Duration of all frames, or of each frame, in milliseconds.
+        colors (int): The number of colors of the global palette, at most 255.
+    Returns:
+        bytes: The GIF file.
+    """
+    if isinstance(durations, (int, float)):
+        durations = [durations] * len(frames)
+    elif len(durations) != len(frames):
+        raise ValueError(f"expected {len(frames)} durations, got: {len(durations)}")
+
+    indices, palette = quantize_with_global_palette(frames, colors=colors)
+    # the first unused index marks pixels that didn't change since the previous frame
+    transparent_index = len(palette) // 3
+    # the color table has 2^(size + 1) entries
+    color_table_size = max(transparent_index.bit_length() - 1, 0)
+    palette += bytes(3 * (2 ** (color_table_size + 1)) - len(palette))
+    width, height = frames[0].size
+    frame_count = len(frames)
+
+    # (indices, offset, duration) of every frame that is written
+    encoded_frames = [[indices.crop((0, 0, width, height)), (0, 0), durations[0]]]
+    if frame_count > 1:
+        # compare every frame to its predecessor at once
+        changes = ImageChops.difference(
+            indices.crop((0, height, width, height * frame_count)),
+            indices.crop((0, 0, width, height * (frame_count - 1))),
+        )
+        # 255 where a pixel is the same as in the previous frame
+        unchanged = changes.point(lambda value: 255 if value == 0 else 0)
+        for i in range(1, frame_count):
+            box = (0, (i - 1) * height, width, i * height)
+            bbox = changes.crop(box).getbbox()
+            if bbox is None:
+                encoded_frames[-1][2] += durations[i]
+                continue
+            left, top, right, bottom = bbox
+            delta = indices.crop((left, top + i * height, right, bottom + i * height))
+            delta.paste(transparent_index, mask=unchanged.crop((left, top + box[1], right, bottom + box[1])))
+            encoded_frames.append([delta, (left, top), durations[i]])
+
+    gif_data = [
+        b"GIF89a",
+        width.to_bytes(2, byteorder="little"),
+        height.to_bytes(2, byteorder="little"),
+        bytes([
+            0xF0 | color_table_size,  # global color table, 8 bits per primary color
+            0,  # background color index
+            0,  # no pixel aspect ratio
+        ]),
+        palette,
+        # NETSCAPE2.0 application extension: loop forever
+        b"!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00",
+    ]
+    for image, offset, duration in encoded_frames:
+        # image descriptor and LZW compressed indices, without a local color table
+        gif_data += GifImagePlugin.getdata(
+            image,
+            offset,
+            duration=duration,
+            disposal=1,  # keep the frame underneath the next one
+            transparency=transparent_index,
+        )
+    gif_data.append(b";")
+    return b"".join(gif_data)
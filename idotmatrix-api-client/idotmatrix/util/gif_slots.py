@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from os import PathLike
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_GIF_SLOT = 12  # the "gif type" byte used by the app when sending a single GIF
+
+
+class GifSlotManager:
+    """
+    Keeps track of which GIF (by content hash) has last been written to which slot of which device.
+
+    The slot is the "gif type" byte of the GIF upload header, which presumably selects the storage index
+    on the device. The slot map can be persisted to a JSON file, so it survives restarts.
+
+    Additionally, the GIF that is currently shown on each device is tracked for the lifetime of the process,
+    which allows skipping the upload of an animation that is still on screen.
+    """
+    logging = logging.getLogger(__name__)
+
+    def __init__(self, state_file: Optional[PathLike | str] = None):
+        """
+        Initializes the GifSlotManager.
+        Args:
+            state_file (Optional[PathLike | str]): JSON file to persist the slot map in. If None, the slot map
+                is only kept in memory.
+        """
+        self.state_file: Optional[Path] = Path(state_file) if state_file is not None else None
+        self._lock = threading.Lock()
+        # device -> slot -> content hash
+        self._slots: Dict[str, Dict[int, str]] = {}
+        # device -> (content hash, send count of the connection after the upload)
+        self._active: Dict[str, Tuple[str, int]] = {}
+        self._load()
+
+    @staticmethod
+    def content_hash(packets: List[List[bytearray | bytes]]) -> str:
+        """
+        Computes a hash of the given GIF upload packets.
+        Args:
+            packets (List[List[bytearray | bytes]]): The packets, as created by GifModule.create_gif_data_packets.
+        Returns:
+            str: The content hash.
+        """
+        digest = hashlib.sha256()
+        for packet in packets:
+            for chunk in packet:
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def slot_of(packets: List[List[bytearray | bytes]]) -> int:
+        """
+        Returns:
+            int: The slot that the given GIF upload packets are written to.
+        """
+        return packets[0][0][15]
+
+    def find_slot(self, device: str, content_hash: str) -> Optional[int]:
+        """
+        Returns the slot of the device that holds the given GIF, or None if it has not been uploaded to the device.
+        """
+        with self._lock:
+            for slot, slot_hash in self._slots.get(device, {}).items():
+                if slot_hash == content_hash:
+                    return slot
+        return None
+
+    def is_showing(self, device: str, content_hash: str, send_count: int) -> bool:
+        """
+        Returns True if the given GIF has been uploaded to the device and nothing else has been sent since.
+        Args:
+            device (str): MAC address of the device.
+            content_hash (str): Hash of the GIF packets.
+            send_count (int): Current send count of the connection to the device.
+        """
+        with self._lock:
+            return self._active.get(device) == (content_hash, send_count)
+
+    def record_upload(self, device: str, slot: int, content_hash: str, send_count: int):
+        """
+        Records that a GIF has been written to a slot of the device and is now shown.
+        Args:
+            device (str): MAC address of the device.
+            slot (int): The slot the GIF has been written to.
+            content_hash (str): Hash of the GIF packets.
+            send_count (int): Send count of the connection to the device after the upload.
+        """
+        with self._lock:
+            self._slots.setdefault(device, {})[slot] = content_hash
+            self._active[device] = (content_hash, send_count)
+            self._save()
+
+    def invalidate(self, device: str):
+        """
+        Forgets everything known about the slots of the device.
+        Must be called after the memory of the device has been cleared, e.g. by a reset.
+        """
+        with self._lock:
+            self._slots.pop(device, None)
+            self._active.pop(device, None)
+            self._save()
+        self.logging.debug(f"invalidated GIF slots of {device}")
+
+    def _load(self):
+        if self.state_file is None or not self.state_file.exists():
+            return
+        try:
+            state = json.loads(self.state_file.read_text())
+            self._slots = {
+                device: {int(slot): content_hash for slot, content_hash in slots.items()}
+                for device, slots in state.items()
+            }
+        except (OSError, ValueError, AttributeError) as e:
+            self.logging.warning(f"ignoring invalid GIF slot state file {self.state_file}: {e}")
+            self._slots = {}
+
+    def _save(self):
+        if self.state_file is None:
+            return
+        temp_file = self.state_file.with_suffix(".tmp")
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file.write_text(json.dumps(self._slots, indent=2, sort_keys=True))
+            os.replace(temp_file, self.state_file)
+        except OSError as e:
+            self.logging.warning(f"failed to write GIF slot state file {self.state_file}: {e}")
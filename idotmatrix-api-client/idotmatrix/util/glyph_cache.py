@@ -0,0 +1,107 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+DEFAULT_MAX_ENTRIES = 4096
+_MAX_LOADED_FONTS = 32
+
+# PIL packs 1-bit images with the leftmost pixel in the most significant bit,
+# the device expects it in the least significant bit.
+_REVERSED_BITS = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+
+@lru_cache(maxsize=_MAX_LOADED_FONTS)
+def load_font(font_path: str, font_size: int) -> ImageFont.FreeTypeFont:
+    """
+    Loads a TrueType/OpenType font, reusing fonts that have already been loaded.
+    Args:
+        font_path (str): Absolute path to the font file.
+        font_size (int): Size of the font.
+    Returns:
+        ImageFont.FreeTypeFont: The loaded font.
+    """
+    return ImageFont.truetype(font_path, font_size)
+
+
+class GlyphCache:
+    """
+    LRU cache for rendered and bit-packed character bitmaps, keyed by font path, font size and character.
+    """
+    logging = logging.getLogger(__name__)
+
+    def __init__(
+        self,
+        glyph_width: int,
+        glyph_height: int,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        """
+        Initializes the GlyphCache.
+        Args:
+            glyph_width (int): Width of a single character bitmap in pixels.
+            glyph_height (int): Height of a single character bitmap in pixels.
+            max_entries (int): Maximum number of bitmaps to keep. Defaults to 4096.
+        """
+        self.glyph_width = glyph_width
+        self.glyph_height = glyph_height
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Tuple[str, int, str], bytes] = OrderedDict()
+
+    def get_bitmap(self, char: str, font_path: str, font_size: int) -> bytes:
+        """
+        Returns the packed bitmap of a single character, rendering it if it is not cached yet.
+        Args:
+            char (str): The character to render.
+            font_path (str): Path to the font file.
+            font_size (int): Size of the font.
+        Returns:
+            bytes: The bitmap, one bit per pixel, row by row, with the leftmost pixel in the least significant bit.
+        """
+        font_path = os.path.abspath(font_path)
+        key = (font_path, font_size, char)
+        with self._lock:
+            bitmap = self._entries.get(key)
+            if bitmap is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return bitmap
+            self.misses += 1
+
+        bitmap = self._render(char, load_font(font_path, font_size))
+
+        with self._lock:
+            self._entries[key] = bitmap
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return bitmap
+
+    def clear(self):
+        """
+        Removes all cached bitmaps and resets the hit/miss counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _render(self, char: str, font: ImageFont.FreeTypeFont) -> bytes:
+        image = Image.new("1", (self.glyph_width, self.glyph_height), 0)
+        draw = ImageDraw.Draw(image)
+        _, _, text_width, text_height = draw.textbbox((0, 0), text=char, font=font)
+        text_x = (self.glyph_width - text_width) // 2
+        text_y = (self.glyph_height - text_height) // 2
+        draw.text((text_x, text_y), char, fill=1, font=font)
+        return image.tobytes().translate(_REVERSED_BITS)
+
+    def __str__(self):
+        return f"GlyphCache(entries={len(self._entries)}, hits={self.hits}, misses={self.misses})"
@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Any
 
 from PIL import Image as PILImage
 
@@ -114,3 +115,43 @@ def resize_image(
     image = new_img
 
     return image
+
+
+def to_rgb_buffer(
+    data: Any,
+    width: int,
+    height: int,
+) -> memoryview:
+    """
+    Converts raw RGB pixel data to a flat memoryview of bytes, without copying if possible.
+
+    :param data: The pixel data, either a bytes-like object with 3 bytes per pixel (row by row), or any object
+                 supporting the buffer protocol, like a NumPy array of shape (height, width, 3) and dtype uint8.
+                 Arrays of other integer dtypes are converted if NumPy is installed.
+    :param width: The width of the image in pixels.
+    :param height: The height of the image in pixels.
+    :return: A one-dimensional memoryview containing width * height * 3 bytes.
+    """
+    try:
+        view = memoryview(data)
+    except TypeError:
+        raise ValueError("pixel data must be a bytes-like object or support the buffer protocol")
+
+    if view.itemsize != 1 or view.format not in ("B", "b", "c"):
+        try:
+            import numpy
+        except ImportError:
+            raise ValueError(f"pixel data must consist of unsigned bytes, got format: '{view.format}'")
+        array = numpy.asarray(data)
+        if array.size and (array.min() < 0 or array.max() > 255):
+            raise ValueError("pixel values must be between 0 and 255")
+        view = memoryview(numpy.ascontiguousarray(array, dtype=numpy.uint8))
+
+    if not view.c_contiguous:
+        view = memoryview(view.tobytes())
+    view = view.cast("B")
+
+    expected_size = width * height * 3
+    if view.nbytes != expected_size:
+        raise ValueError(f"pixel data must contain exactly {expected_size} bytes ({width}x{height} RGB), got: {view.nbytes}")
+    return view
@@ -0,0 +1,42 @@
+from typing import Callable, List
+
+# writes the header of a frame into the start of its buffer, given the index of the frame and its payload size
+HeaderWriter = Callable[[bytearray, int, int], None]
+
+
+def build_framed_packets(
+    data: bytes | bytearray | memoryview,
+    header_size: int,
+    write_header: HeaderWriter,
+    chunk_size: int,
+    ble_packet_size: int,
+) -> List[List[memoryview]]:
+    """
+    Splits data into frames of chunk_size bytes, each preceded by a header, and splits every frame into BLE packets.
+
+    Every frame is a single buffer: the header is written in place at its start and the payload is copied behind it
+    once. The BLE packets are memoryview slices of that buffer, so neither the frames nor the packets are copied
+    again before they are written.
+
+    Args:
+        data (bytes | bytearray | memoryview): The payload, e.g. the GIF file or the RGB data of an image.
+        header_size (int): Size of the header of every frame.
+        write_header (HeaderWriter): Writes the header of a frame, e.g. with struct.pack_into.
+        chunk_size (int): Maximum payload size of a frame.
+        ble_packet_size (int): Maximum size of a BLE packet.
+    Returns:
+        List[List[memoryview]]: The BLE packets of every frame.
+    """
+    source = memoryview(data)
+    if source.ndim != 1 or source.itemsize != 1:
+        source = source.cast("B")
+
+    packets = []
+    for index, start in enumerate(range(0, len(source), chunk_size)):
+        payload = source[start:start + chunk_size]
+        frame = bytearray(header_size + len(payload))
+        write_header(frame, index, len(payload))
+        frame[header_size:] = payload
+        view = memoryview(frame)
+        packets.append([view[offset:offset + ble_packet_size] for offset in range(0, len(frame), ble_packet_size)])
+    return packets
@@ -0,0 +1,264 @@
+import hashlib
+import logging
+import os
+import struct
+import threading
+from collections import OrderedDict
+from os import PathLike
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+Packets = List[List[bytes]]
+
+DEFAULT_MAX_MEMORY_BYTES = 16 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 256 * 1024 * 1024
+
+_CACHE_FILE_MAGIC = b"IDMC"
+_CACHE_FILE_VERSION = 1
+_CACHE_FILE_SUFFIX = ".packets"
+_MAX_FILE_DIGEST_ENTRIES = 4096
+
+
+class PayloadCache:
+    """
+    Cache for the final packets that are sent to the device for a given input file and encoding parameters.
+
+    Entries are keyed by the content hash of the input file combined with all parameters that influence the
+    encoding (screen size, resize mode, etc.), so a changed file or a changed parameter always results in a miss.
+    Entries are kept in an in-memory LRU and, if a cache directory is given, are also persisted to disk so they
+    survive restarts. Both are bounded by size.
+    """
+    logging = logging.getLogger(__name__)
+
+    def __init__(
+        self,
+        cache_dir: Optional[PathLike | str] = None,
+        max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+        max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+    ):
+        """
+        Initializes the PayloadCache.
+        Args:
+            cache_dir (Optional[PathLike | str]): Directory to persist cache entries in. If None, entries are only kept in memory.
+            max_memory_bytes (int): Maximum total size of the packets kept in memory. Set to 0 to disable the in-memory cache.
+            max_disk_bytes (int): Maximum total size of the cache files in cache_dir.
+        """
+        self.cache_dir: Optional[Path] = Path(cache_dir) if cache_dir is not None else None
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._memory_entries: OrderedDict[str, Packets] = OrderedDict()
+        self._memory_bytes = 0
+        self._file_digests: Dict[Tuple[str, int, int], str] = {}
+
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def create_key(self, file_path: PathLike | str, *params: Any) -> str:
+        """
+        Creates a cache key for the given file and encoding parameters.
+        Args:
+            file_path (PathLike | str): Path to the input file.
+            *params: All parameters that influence the resulting packets.
+        Returns:
+            str: The cache key.
+        """
+        key_source = repr((self._file_digest(file_path),) + tuple(params))
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Packets]:
+        """
+        Returns the packets for the given key, or None if the key is not cached.
+        Args:
+            key (str): A key created with create_key.
+        """
+        with self._lock:
+            packets = self._memory_entries.get(key)
+            if packets is not None:
+                self._memory_entries.move_to_end(key)
+                self.hits += 1
+                return packets
+
+        # the lock only guards the in-memory entries, so other threads are not blocked by the disk access
+        packets = self._read_from_disk(key)
+        with self._lock:
+            if packets is not None:
+                self._put_in_memory(key, packets)
+                self.hits += 1
+            else:
+                self.misses += 1
+        return packets
+
+    def put(self, key: str, packets: List[List[bytearray | bytes]]):
+        """
+        Stores the packets for the given key.
+        Args:
+            key (str): A key created with create_key.
+            packets (List[List[bytearray | bytes]]): The packets to store.
+        """
+        packets = [[bytes(chunk) for chunk in packet] for packet in packets]
+        with self._lock:
+            self._put_in_memory(key, packets)
+        self._write_to_disk(key, packets)
+
+    def clear(self):
+        """
+        Removes all entries from memory and disk and resets the hit/miss counters.
+        """
+        with self._lock:
+            self._memory_entries.clear()
+            self._memory_bytes = 0
+            self._file_digests.clear()
+            self.hits = 0
+            self.misses = 0
+        if self.cache_dir is not None:
+            for cache_file in self.cache_dir.glob(f"*{_CACHE_FILE_SUFFIX}"):
+                cache_file.unlink(missing_ok=True)
+
+    def _file_digest(self, file_path: PathLike | str) -> str:
+        """
+        Returns the SHA-256 digest of the file content. The digest is memoized by path, mtime and size,
+        so the file is only read again if it has been modified.
+        """
+        stat = os.stat(file_path)
+        digest_key = (str(file_path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._file_digests.get(digest_key)
+        if digest is not None:
+            return digest
+
+        with open(file_path, "rb") as file:
+            digest = hashlib.file_digest(file, "sha256").hexdigest()
+
+        with self._lock:
+            if len(self._file_digests) >= _MAX_FILE_DIGEST_ENTRIES:
+                self._file_digests.clear()
+            self._file_digests[digest_key] = digest
+        return digest
+
+    @staticmethod
+    def _packets_size(packets: Packets) -> int:
+        return sum(len(chunk) for packet in packets for chunk in packet)
+
+    def _put_in_memory(self, key: str, packets: Packets):
+        size = self._packets_size(packets)
+        if size > self.max_memory_bytes:
+            return
+
+        previous = self._memory_entries.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= self._packets_size(previous)
+        self._memory_entries[key] = packets
+        self._memory_bytes += size
+
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory_entries.popitem(last=False)
+            self._memory_bytes -= self._packets_size(evicted)
+
+    def _cache_file_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{_CACHE_FILE_SUFFIX}"
+
+    def _read_from_disk(self, key: str) -> Optional[Packets]:
+        if self.cache_dir is None:
+            return None
+        cache_file = self._cache_file_path(key)
+        try:
+            data = cache_file.read_bytes()
+        except FileNotFoundError:
+            return None
+
+        try:
+            packets = self._deserialize(data)
+        except ValueError as e:
+            self.logging.warning(f"discarding invalid cache file {cache_file}: {e}")
+            cache_file.unlink(missing_ok=True)
+            return None
+
+        # update the modification time, which is used for LRU eviction on disk
+        try:
+            os.utime(cache_file)
+        except FileNotFoundError:
+            # evicted by another thread in the meantime
+            pass
+        return packets
+
+    def _write_to_disk(self, key: str, packets: Packets):
+        if self.cache_dir is None:
+            return
+        cache_file = self._cache_file_path(key)
+        # every thread writes its own temporary file, as the same key may be written concurrently
+        temp_file = cache_file.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            temp_file.write_bytes(self._serialize(packets))
+            os.replace(temp_file, cache_file)
+        except OSError as e:
+            self.logging.warning(f"failed to write cache file {cache_file}: {e}")
+            return
+        self._evict_from_disk()
+
+    def _evict_from_disk(self):
+        cache_files = []
+        total_size = 0
+        for cache_file in self.cache_dir.glob(f"*{_CACHE_FILE_SUFFIX}"):
+            try:
+                stat = cache_file.stat()
+            except FileNotFoundError:
+                continue
+            cache_files.append((stat.st_mtime_ns, stat.st_size, cache_file))
+            total_size += stat.st_size
+
+        # remove the least recently used files first
+        cache_files.sort()
+        for _, size, cache_file in cache_files:
+            if total_size <= self.max_disk_bytes:
+                break
+            cache_file.unlink(missing_ok=True)
+            total_size -= size
+
+    @staticmethod
+    def _serialize(packets: Packets) -> bytes:
+        data = bytearray(_CACHE_FILE_MAGIC)
+        data += struct.pack("<BI", _CACHE_FILE_VERSION, len(packets))
+        for packet in packets:
+            data += struct.pack("<I", len(packet))
+            for chunk in packet:
+                data += struct.pack("<I", len(chunk))
+                data += chunk
+        return bytes(data)
+
+    @staticmethod
+    def _deserialize(data: bytes) -> Packets:
+        try:
+            if data[:4] != _CACHE_FILE_MAGIC:
+                raise ValueError("invalid magic")
+            version, packet_count = struct.unpack_from("<BI", data, 4)
+            if version != _CACHE_FILE_VERSION:
+                raise ValueError(f"unsupported version {version}")
+            offset = 4 + struct.calcsize("<BI")
+            packets = []
+            for _ in range(packet_count):
+                (chunk_count,) = struct.unpack_from("<I", data, offset)
+                offset += 4
+                packet = []
+                for _ in range(chunk_count):
+                    (chunk_length,) = struct.unpack_from("<I", data, offset)
+                    offset += 4
+                    chunk = data[offset:offset + chunk_length]
+                    if len(chunk) != chunk_length:
+                        raise ValueError("truncated chunk")
+                    packet.append(chunk)
+                    offset += chunk_length
+                packets.append(packet)
+        except struct.error as e:
+            raise ValueError(f"truncated data: {e}")
+        return packets
+
+    def __str__(self):
+        return (
+            f"PayloadCache(entries={len(self._memory_entries)}, memory_bytes={self._memory_bytes}, "
+            f"hits={self.hits}, misses={self.misses})"
+        )
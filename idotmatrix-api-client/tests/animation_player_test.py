@@ -0,0 +1,57 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+from idotmatrix.animation_player import AnimationPlayer
+from idotmatrix.client import IDotMatrixClient
+from idotmatrix.screensize import ScreenSize
+from tests import TestBase
+
+
+class TestAnimationPlayer(TestBase):
+
+    @staticmethod
+    def _create_client(connection_manager: AsyncMock) -> IDotMatrixClient:
+        client = IDotMatrixClient(screen_size=ScreenSize.SIZE_16x16)
+        client._connection_manager = connection_manager
+        return client
+
+    @staticmethod
+    async def _frames(count: int, interval_seconds: float = 0):
+        for i in range(count):
+            yield bytes([i]) * (16 * 16 * 3)
+            await asyncio.sleep(interval_seconds)
+
+    async def test_play_sends_all_frames_if_link_keeps_up(self):
+        # GIVEN
+        connection_manager = AsyncMock()
+        under_test = AnimationPlayer(self._create_client(connection_manager), fps=1000)
+
+        # WHEN
+        stats = await under_test.play(self._frames(5, interval_seconds=0.01))
+
+        # THEN
+        self.assertEqual(5, stats.frames_received)
+        self.assertEqual(5, stats.frames_sent)
+        self.assertEqual(0, stats.frames_dropped)
+        self.assertEqual(5, connection_manager.send_packets.await_count)
+
+    async def test_play_drops_frames_if_link_is_too_slow(self):
+        # GIVEN
+        connection_manager = AsyncMock()
+
+        async def slow_send_packets(packets, response, job=None):
+            await asyncio.sleep(0.05)
+
+        connection_manager.send_packets.side_effect = slow_send_packets
+        under_test = AnimationPlayer(self._create_client(connection_manager), fps=1000)
+
+        # WHEN
+        stats = await under_test.play(self._frames(20, interval_seconds=0.005))
+
+        # THEN
+        self.assertEqual(20, stats.frames_received)
+        self.assertGreater(stats.frames_dropped, 0)
+        self.assertEqual(20, stats.frames_sent + stats.frames_dropped)
+        # the last frame of the source is always shown
+        last_packets = connection_manager.send_packets.await_args.kwargs["packets"]
+        self.assertEqual(bytes([19]) * 4, bytes(last_packets[-1][-1][-4:]))
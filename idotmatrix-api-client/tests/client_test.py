@@ -0,0 +1,56 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from idotmatrix.client import IDotMatrixClient
+from idotmatrix.screensize import ScreenSize
+from tests import TestBase
+
+
+class TestIDotMatrixClient(TestBase):
+
+    async def test_modules_are_created_once(self):
+        # GIVEN
+        under_test = IDotMatrixClient(screen_size=ScreenSize.SIZE_32x32)
+
+        # WHEN
+        gif_module = under_test.gif
+
+        # THEN
+        self.assertIs(gif_module, under_test.gif)
+        self.assertIs(under_test.common, under_test.common)
+        self.assertIs(under_test.image, under_test.image)
+
+    async def test_cached_modules_follow_the_screen_size(self):
+        # GIVEN
+        under_test = IDotMatrixClient(screen_size=ScreenSize.SIZE_32x32)
+        image_module = under_test.image
+
+        # WHEN
+        under_test.screen_size = ScreenSize.SIZE_64x64
+
+        # THEN
+        self.assertEqual(ScreenSize.SIZE_64x64, image_module.screen_size)
+        self.assertEqual(ScreenSize.SIZE_64x64, under_test.gif.screen_size)
+
+    async def test_heavy_dependencies_are_not_imported_with_the_client(self):
+        # GIVEN
+        script = (
+            "import sys\n"
+            "from idotmatrix.client import IDotMatrixClient\n"
+            "from idotmatrix.screensize import ScreenSize\n"
+            "IDotMatrixClient(screen_size=ScreenSize.SIZE_32x32).common\n"
+            "print(','.join(name for name in ('PIL', 'matplotlib', 'watchdog', 'cryptography') if name in sys.modules))"
+        )
+
+        # WHEN
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=Path(__file__).absolute().parent.parent,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+        # THEN
+        self.assertEqual("", output.strip())
@@ -0,0 +1,51 @@
+import sys
+from unittest.mock import patch
+
+from idotmatrix.util import color_utils
+from tests import TestBase
+
+
+class TestColorUtils(TestBase):
+
+    async def test_named_colors_are_resolved_without_matplotlib(self):
+        # GIVEN
+        names = ("black", "white", "SteelBlue", "rebeccapurple")
+
+        # WHEN
+        with patch.dict(sys.modules, {"matplotlib": None}):
+            # importing matplotlib fails
+            colors = [color_utils.parse_color_rgb(name) for name in names]
+
+        # THEN
+        self.assertEqual([(0, 0, 0), (255, 255, 255), (70, 130, 180), (102, 51, 153)], colors)
+
+    async def test_hex_and_integer_colors(self):
+        # WHEN
+        colors = [
+            color_utils.parse_color_rgb(color)
+            for color in ("#102030", "#F80", "0xA0B0C0", 0x00FF7F, (1, 2, 3))
+        ]
+
+        # THEN
+        self.assertEqual([(16, 32, 48), (255, 136, 0), (160, 176, 192), (0, 255, 127), (1, 2, 3)], colors)
+
+    async def test_parsed_colors_are_cached(self):
+        # WHEN
+        first = color_utils.parse_color_rgb("#123456")
+        second = color_utils.parse_color_rgb("#123456")
+
+        # THEN
+        self.assertIs(first, second)
+
+    async def test_invalid_colors_are_rejected(self):
+        for color in ("#12", "notacolor", 0x1000000, -1, (1, 2), (1, 2, 256), 1.5):
+            with self.subTest(color=color):
+                with self.assertRaises(ValueError):
+                    color_utils.parse_color_rgb(color)
+
+    async def test_color_lists_are_parsed_in_one_batch(self):
+        # WHEN
+        colors = color_utils.parse_color_rgb_list(["red", "#00FF00", 0x0000FF, "red"])
+
+        # THEN
+        self.assertEqual([(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 0, 0)], colors)
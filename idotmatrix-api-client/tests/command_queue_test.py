@@ -0,0 +1,108 @@
+import asyncio
+
+from idotmatrix.command_queue import CommandQueue
+from idotmatrix.connection_manager import ConnectionManager
+from idotmatrix.simulator import SimulatedPeripheral
+from tests import TestBase
+
+
+class TestCommandQueue(TestBase):
+
+    async def test_superseded_state_commands_are_coalesced(self):
+        # GIVEN
+        peripheral = SimulatedPeripheral()
+        connection_manager = peripheral.attach(ConnectionManager())
+        connection_manager.set_command_coalescing(True)
+        await connection_manager.connect()
+        upload_packet = b'\x06\x00\x01\x00\x01\x02'
+
+        def brightness(percent: int) -> bytes:
+            return bytes([5, 0, 4, 128, percent])
+
+        # WHEN
+        await asyncio.gather(
+            connection_manager.send_bytes(data=brightness(10), response=True),
+            connection_manager.send_bytes(data=brightness(20), response=True),
+            connection_manager.send_packets(packets=[[upload_packet]], response=True),
+            connection_manager.send_bytes(data=brightness(30), response=True),
+            connection_manager.send_bytes(data=brightness(40), response=True),
+        )
+
+        # THEN
+        # brightness is a control command, which is sent before the queued upload
+        self.assertEqual([brightness(40), upload_packet], peripheral.packets)
+        self.assertEqual(3, connection_manager.command_queue.coalesced_count)
+        self.assertEqual(0, connection_manager.command_queue.pending_count)
+
+    async def test_errors_are_passed_to_all_coalesced_callers(self):
+        # GIVEN
+        peripheral = SimulatedPeripheral()
+        connection_manager = peripheral.attach(ConnectionManager())
+        connection_manager.set_command_coalescing(True)
+        await connection_manager.connect()
+        # the connection is lost without the connection manager noticing
+        await peripheral.disconnect()
+        color = bytes([7, 0, 2, 2, 255, 0, 0])
+
+        # WHEN
+        results = await asyncio.gather(
+            connection_manager.send_bytes(data=color, response=False),
+            connection_manager.send_bytes(data=color, response=False),
+            return_exceptions=True,
+        )
+
+        # THEN
+        self.assertEqual(1, connection_manager.command_queue.coalesced_count)
+        self.assertTrue(all(isinstance(result, Exception) for result in results))
+
+    async def test_control_commands_preempt_bulk_transfers(self):
+        # GIVEN
+        peripheral = SimulatedPeripheral(write_latency_seconds=0.01)
+        connection_manager = peripheral.attach(ConnectionManager())
+        connection_manager.set_command_coalescing(True)
+        connection_manager.set_bulk_preemption(True)
+        await connection_manager.connect()
+        upload_packets = [[bytes([6, 0, 1, 0, i, 0])] for i in range(5)]
+        turn_off = bytes([5, 0, 7, 1, 0])
+
+        async def turn_off_during_upload():
+            await asyncio.sleep(0.015)
+            await connection_manager.send_bytes(data=turn_off, response=True)
+
+        # WHEN
+        await asyncio.gather(
+            connection_manager.send_packets(packets=upload_packets, response=True),
+            turn_off_during_upload(),
+        )
+
+        # THEN
+        self.assertEqual(6, len(peripheral.packets))
+        self.assertIn(peripheral.packets.index(turn_off), range(1, 5))
+        self.assertEqual(1, connection_manager.command_queue.preempted_count)
+
+    async def test_cancelled_send_does_not_block_the_queue(self):
+        # GIVEN
+        under_test = CommandQueue()
+        sent = []
+
+        async def cancelled_transfer():
+            raise asyncio.CancelledError()
+
+        async def send_color():
+            sent.append("color")
+
+        # WHEN
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                under_test.submit(None, cancelled_transfer),
+                under_test.submit("color", send_color),
+                return_exceptions=True,
+            ),
+            timeout=1,
+        )
+        await asyncio.wait_for(under_test.submit("color", send_color), timeout=1)
+
+        # THEN
+        self.assertIsInstance(results[0], asyncio.CancelledError)
+        self.assertIsNone(results[1])
+        self.assertEqual(["color", "color"], sent)
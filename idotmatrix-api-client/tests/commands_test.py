@@ -0,0 +1,82 @@
+from unittest.mock import AsyncMock
+
+from idotmatrix import commands
+from idotmatrix.commands import CommandBatch, CommandTemplate
+from idotmatrix.modules.common import CommonModule
+from tests import TestBase
+
+
+class TestCommands(TestBase):
+
+    async def test_parameterless_commands_are_static_frames(self):
+        # WHEN
+        data = commands.SCREEN_ON.encode()
+
+        # THEN
+        self.assertEqual(bytes([5, 0, 7, 1, 1]), data)
+        self.assertIs(commands.SCREEN_ON.frame, data)
+        self.assertIs(commands.SCREEN_ON, commands.COMMANDS["screen_on"])
+
+    async def test_parameters_are_packed_behind_the_prefix(self):
+        # WHEN
+        data = commands.SCOREBOARD.encode(300, 7)
+
+        # THEN
+        self.assertEqual(bytes([8, 0, 10, 128, 44, 1, 7, 0]), data)
+
+    async def test_invalid_parameters_are_rejected(self):
+        with self.assertRaises(ValueError):
+            commands.BRIGHTNESS.encode(256)
+        with self.assertRaises(ValueError):
+            commands.FULLSCREEN_COLOR.encode(1, 2)
+
+    async def test_templates_are_registered_once(self):
+        with self.assertRaises(ValueError):
+            commands.register(CommandTemplate("brightness", b"\x05\x00\x04\x80", "B"))
+
+    async def test_batch_is_encoded_into_one_buffer(self):
+        # GIVEN
+        batch = CommandBatch().add(commands.BRIGHTNESS, 50).add(commands.FULLSCREEN_COLOR, 255, 0, 0).add(commands.SCREEN_ON)
+
+        # WHEN
+        data = batch.encode()
+        packets = batch.encode_packets()
+
+        # THEN
+        expected_commands = [
+            bytes([5, 0, 4, 128, 50]),
+            bytes([7, 0, 2, 2, 255, 0, 0]),
+            bytes([5, 0, 7, 1, 1]),
+        ]
+        self.assertEqual(b"".join(expected_commands), data)
+        self.assertEqual(batch.size, len(data))
+        self.assertEqual([[command] for command in expected_commands], packets)
+        self.assertTrue(all(packet[0].obj is packets[0][0].obj for packet in packets))
+
+    async def test_batch_is_sent_with_a_single_write(self):
+        # GIVEN
+        connection_manager = AsyncMock()
+        under_test = CommonModule(connection_manager=connection_manager)
+        batch = CommandBatch().add(commands.BRIGHTNESS, 50).add(commands.SCREEN_OFF)
+
+        # WHEN
+        await under_test.send_commands(batch, single_write=True)
+
+        # THEN
+        connection_manager.send_packets.assert_awaited_once_with(
+            packets=[[bytes([5, 0, 4, 128, 50, 5, 0, 7, 1, 0])]], response=True, job=None,
+        )
+
+    async def test_batch_is_sent_as_one_packet_per_command(self):
+        # GIVEN
+        connection_manager = AsyncMock()
+        under_test = CommonModule(connection_manager=connection_manager)
+        batch = CommandBatch().add(commands.BRIGHTNESS, 50).add(commands.SCREEN_OFF)
+
+        # WHEN
+        await under_test.send_commands(batch)
+
+        # THEN
+        connection_manager.send_packets.assert_awaited_once_with(
+            packets=[[bytes([5, 0, 4, 128, 50])], [bytes([5, 0, 7, 1, 0])]], response=True, job=None,
+        )
@@ -0,0 +1,167 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, call, patch
+
+from idotmatrix.connection_manager import ConnectionManager, TRANSFER_MODE_PIPELINED, TRANSFER_MODE_STRICT
+from idotmatrix.const import UUID_CHARACTERISTIC_WRITE_DATA
+from tests import TestBase
+
+
+class TestConnectionManager(TestBase):
+
+    @staticmethod
+    def _create_connection_manager(client: AsyncMock, max_write_size: int = 514) -> ConnectionManager:
+        client.services = MagicMock()
+        client.services.get_characteristic.return_value.max_write_without_response_size = max_write_size
+        connection_manager = ConnectionManager()
+        connection_manager.client = client
+        connection_manager._connected = True
+        return connection_manager
+
+    async def test_send_packets_pipelined(self):
+        # GIVEN
+        client = AsyncMock()
+        notification_callbacks = []
+        client.start_notify.side_effect = lambda uuid, callback: notification_callbacks.append(callback)
+
+        async def write_gatt_char(char_specifier, data, response):
+            # every packet fits into a single write, the device acknowledges it
+            notification_callbacks[0](None, bytearray(b'\x05\x00\x01\x00\x01'))
+
+        client.write_gatt_char.side_effect = write_gatt_char
+        under_test = self._create_connection_manager(client)
+        under_test.set_pipelined_transfer(True, window=2)
+        packets = [[b'\x01\x02', b'\x03'], [b'\x04\x05', b'\x06'], [b'\x07\x08', b'\x09']]
+
+        # WHEN
+        await under_test.send_packets(packets=packets, response=True)
+
+        # THEN
+        client.start_notify.assert_awaited_once()
+        client.read_gatt_char.assert_not_awaited()
+        self.assertEqual(
+            [call(char_specifier=UUID_CHARACTERISTIC_WRITE_DATA, data=b"".join(packet), response=False)
+             for packet in packets],
+            client.write_gatt_char.await_args_list,
+        )
+        self.assertEqual(TRANSFER_MODE_PIPELINED, under_test.last_transfer_stats.mode)
+        self.assertEqual(9, under_test.last_transfer_stats.byte_count)
+
+    async def test_send_packets_pipelined_falls_back_to_strict_mode(self):
+        # GIVEN
+        client = AsyncMock()
+        client.start_notify.side_effect = Exception("notifications not supported")
+        under_test = self._create_connection_manager(client)
+        under_test.set_pipelined_transfer(True)
+        packets = [[b'\x01\x02', b'\x03']]
+
+        # WHEN
+        await under_test.send_packets(packets=packets, response=True)
+
+        # THEN
+        self.assertEqual(
+            [call(char_specifier=UUID_CHARACTERISTIC_WRITE_DATA, data=b'\x01\x02\x03', response=True)],
+            client.write_gatt_char.await_args_list,
+        )
+        client.read_gatt_char.assert_awaited_once()
+        self.assertEqual(TRANSFER_MODE_STRICT, under_test.last_transfer_stats.mode)
+
+    async def test_send_packets_pipelined_resumes_at_the_first_unacknowledged_packet(self):
+        # GIVEN
+        client = AsyncMock()
+        notification_callbacks = []
+        client.start_notify.side_effect = lambda uuid, callback: notification_callbacks.append(callback)
+
+        async def write_gatt_char(char_specifier, data, response):
+            # only the first packet is acknowledged
+            if client.write_gatt_char.await_count == 1:
+                notification_callbacks[0](None, bytearray(b'\x05\x00\x01\x00\x01'))
+
+        client.write_gatt_char.side_effect = write_gatt_char
+        under_test = self._create_connection_manager(client)
+        under_test.set_pipelined_transfer(True, window=1)
+        packets = [[b'\x01\x02'], [b'\x03\x04'], [b'\x05\x06']]
+
+        # WHEN
+        with patch("idotmatrix.connection_manager.PIPELINE_ACK_TIMEOUT_SECONDS", 0.01):
+            await under_test.send_packets(packets=packets, response=True)
+
+        # THEN
+        self.assertEqual(
+            [
+                call(char_specifier=UUID_CHARACTERISTIC_WRITE_DATA, data=b'\x01\x02', response=False),
+                call(char_specifier=UUID_CHARACTERISTIC_WRITE_DATA, data=b'\x03\x04', response=False),
+                call(char_specifier=UUID_CHARACTERISTIC_WRITE_DATA, data=b'\x03\x04', response=True),
+                call(char_specifier=UUID_CHARACTERISTIC_WRITE_DATA, data=b'\x05\x06', response=True),
+            ],
+            client.write_gatt_char.await_args_list,
+        )
+        self.assertEqual(TRANSFER_MODE_STRICT, under_test.last_transfer_stats.mode)
+
+    async def test_send_packets_rechunks_to_the_write_size(self):
+        # GIVEN
+        client = AsyncMock()
+        under_test = self._create_connection_manager(client, max_write_size=4)
+        packets = [[b'\x01\x02\x03', b'\x04\x05\x06', b'\x07']]
+
+        # WHEN
+        await under_test.send_packets(packets=packets, response=True)
+
+        # THEN
+        self.assertEqual(
+            [
+                call(char_specifier=UUID_CHARACTERISTIC_WRITE_DATA, data=b'\x01\x02\x03\x04', response=False),
+                call(char_specifier=UUID_CHARACTERISTIC_WRITE_DATA, data=b'\x05\x06\x07', response=True),
+            ],
+            client.write_gatt_char.await_args_list,
+        )
+
+    async def test_send_packets_steps_down_the_write_size_after_a_failed_write(self):
+        # GIVEN
+        client = AsyncMock()
+        written_data = []
+
+        async def write_gatt_char(char_specifier, data, response):
+            if len(data) > 244:
+                raise Exception("write too large")
+            written_data.append(bytes(data))
+
+        client.write_gatt_char.side_effect = write_gatt_char
+        under_test = self._create_connection_manager(client, max_write_size=514)
+        packet = bytes(range(256)) * 4
+
+        # WHEN
+        await under_test.send_packets(packets=[[packet[:509], packet[509:]]], response=False)
+
+        # THEN
+        self.assertEqual(packet, b"".join(written_data))
+        self.assertEqual([244, 244, 244, 244, 48], [len(data) for data in written_data])
+        self.assertEqual(244, await under_test.get_max_bytes_per_chunk(response=False))
+
+    async def test_devices_connect_concurrently(self):
+        # GIVEN
+        second_connected = asyncio.Event()
+
+        async def connect_first():
+            await second_connected.wait()
+
+        async def connect_second():
+            second_connected.set()
+
+        first_client = AsyncMock()
+        first_client.is_connected = False
+        first_client.connect.side_effect = connect_first
+        second_client = AsyncMock()
+        second_client.is_connected = False
+        second_client.connect.side_effect = connect_second
+        first = self._create_connection_manager(first_client)
+        second = self._create_connection_manager(second_client)
+        first._connected = second._connected = False
+        first.address, second.address = "00:11:22:33:44:55", "00:11:22:33:44:66"
+
+        # WHEN
+        # the first device only connects once the second one did, which requires them to connect concurrently
+        await asyncio.wait_for(asyncio.gather(first.connect(), second.connect()), timeout=1)
+
+        # THEN
+        self.assertTrue(first.is_connected())
+        self.assertTrue(second.is_connected())
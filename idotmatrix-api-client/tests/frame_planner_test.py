@@ -0,0 +1,96 @@
+from PIL import Image as PILImage, ImageSequence
+
+from idotmatrix.util.frame_planner import plan_frames, read_frame_durations
+from tests import TestBase
+
+
+class TestFramePlanner(TestBase):
+
+    async def test_durations_are_read_from_the_frame_headers(self):
+        # GIVEN
+        gif_file_path = self._test_data_folder / "demo.gif"
+
+        # WHEN
+        durations = read_frame_durations(gif_file_path.read_bytes())
+
+        # THEN
+        with PILImage.open(gif_file_path) as img:
+            expected_durations = [frame.info.get("duration") for frame in ImageSequence.Iterator(img)]
+        self.assertEqual(expected_durations, durations)
+
+    async def test_short_animation_is_kept(self):
+        # WHEN
+        plan = plan_frames([100, 300, 50, None])
+
+        # THEN
+        self.assertEqual([0, 1, 2, 3], plan.indices)
+        self.assertEqual([100, 300, 50, 200], plan.durations)
+
+    async def test_long_animation_is_played_faster(self):
+        # WHEN
+        plan = plan_frames([100] * 40)
+
+        # THEN
+        # twice as fast, all frames are kept
+        self.assertEqual(list(range(40)), plan.indices)
+        self.assertEqual([50] * 40, plan.durations)
+
+    async def test_frames_are_picked_by_timing(self):
+        # GIVEN
+        # a long pause, followed by a burst of short frames
+        durations = [2000] + [20] * 40
+
+        # WHEN
+        plan = plan_frames(durations)
+
+        # THEN
+        self.assertEqual(2000, plan.total_duration)
+        self.assertEqual(0, plan.indices[0])
+        self.assertEqual(1429, plan.durations[0])
+        # played faster, the frames of the burst would be too short, so every second one is skipped
+        self.assertEqual(list(range(1, 41, 2)), plan.indices[1:])
+
+    async def test_frame_count_is_limited(self):
+        # WHEN
+        plan = plan_frames([20] * 200)
+
+        # THEN
+        # twice as fast, every second frame is skipped as it would be too short, and at most 64 frames are kept
+        self.assertEqual(64, len(plan.indices))
+        self.assertEqual(0, plan.indices[0])
+        self.assertEqual(2000, plan.total_duration)
+        self.assertTrue(all(duration >= 20 for duration in plan.durations))
+
+    async def test_animation_just_over_the_frame_limit_skips_only_the_excess_frames(self):
+        # WHEN
+        plan = plan_frames([50] * 65)
+
+        # THEN
+        self.assertEqual(64, len(plan.indices))
+        self.assertEqual(0, plan.indices[0])
+        self.assertEqual(64, plan.indices[-1])
+        self.assertEqual(2000, plan.total_duration)
+
+    async def test_last_frame_is_kept_if_possible(self):
+        # WHEN
+        plan = plan_frames([1000] * 3)
+
+        # THEN
+        self.assertEqual([0, 1, 2], plan.indices)
+        self.assertEqual([667, 666, 667], plan.durations)
+
+    async def test_missing_durations_are_spread_over_the_default_duration(self):
+        # WHEN
+        plan = plan_frames([0] * 10)
+
+        # THEN
+        self.assertEqual(list(range(10)), plan.indices)
+        self.assertEqual([200] * 10, plan.durations)
+
+    async def test_duration_per_frame_overrides_the_durations(self):
+        # WHEN
+        plan = plan_frames([10, 20, 30], duration_per_frame_in_ms=500)
+
+        # THEN
+        self.assertEqual([0, 1, 2], plan.indices)
+        self.assertEqual([500, 500, 500], plan.durations)
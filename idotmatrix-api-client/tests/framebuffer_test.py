@@ -0,0 +1,67 @@
+from unittest.mock import AsyncMock, call
+
+from idotmatrix.client import IDotMatrixClient
+from idotmatrix.framebuffer import FrameBuffer, FrameUpdateMode
+from idotmatrix.screensize import ScreenSize
+from tests import TestBase
+
+
+class TestFrameBuffer(TestBase):
+
+    @staticmethod
+    def _create_client(connection_manager: AsyncMock) -> IDotMatrixClient:
+        client = IDotMatrixClient(screen_size=ScreenSize.SIZE_16x16)
+        client._connection_manager = connection_manager
+        return client
+
+    async def test_first_frame_is_uploaded_in_full(self):
+        # GIVEN
+        connection_manager = AsyncMock()
+        under_test = FrameBuffer(self._create_client(connection_manager))
+        frame = bytes(16 * 16 * 3)
+
+        # WHEN
+        result = await under_test.show(frame)
+
+        # THEN
+        self.assertEqual(FrameUpdateMode.FULL, result)
+        connection_manager.send_bytes.assert_awaited_once_with(data=bytearray([5, 0, 4, 1, 1]), response=True)
+        connection_manager.send_packets.assert_awaited_once()
+
+    async def test_changed_pixels_are_sent_as_graffiti(self):
+        # GIVEN
+        connection_manager = AsyncMock()
+        under_test = FrameBuffer(self._create_client(connection_manager))
+        frame = bytearray(16 * 16 * 3)
+        await under_test.show(frame)
+        connection_manager.reset_mock()
+
+        # WHEN
+        # pixel (1, 0) and (2, 3) turn red
+        frame[3:6] = b'\xff\x00\x00'
+        frame[(3 * 16 + 2) * 3:(3 * 16 + 3) * 3] = b'\xff\x00\x00'
+        result = await under_test.show(frame)
+
+        # THEN
+        self.assertEqual(FrameUpdateMode.DIFF, result)
+        connection_manager.send_packets.assert_not_awaited()
+        self.assertEqual(
+            [call(data=bytearray(b'\x0c\x00\x05\x01\x00\xff\x00\x00\x01\x00\x02\x03'), response=True)],
+            connection_manager.send_bytes.await_args_list,
+        )
+
+    async def test_unchanged_frame_is_not_sent(self):
+        # GIVEN
+        connection_manager = AsyncMock()
+        under_test = FrameBuffer(self._create_client(connection_manager))
+        frame = bytes(16 * 16 * 3)
+        await under_test.show(frame)
+        connection_manager.reset_mock()
+
+        # WHEN
+        result = await under_test.show(frame)
+
+        # THEN
+        self.assertEqual(FrameUpdateMode.NONE, result)
+        connection_manager.send_bytes.assert_not_awaited()
+        connection_manager.send_packets.assert_not_awaited()
@@ -0,0 +1,59 @@
+import io
+
+from PIL import Image as PILImage, ImageSequence
+
+from idotmatrix.util.gif_encoder import encode_gif_with_global_palette
+from tests import TestBase
+
+
+def _frame(color, changed_pixel=None, changed_color=(0, 0, 255)) -> PILImage.Image:
+    frame = PILImage.new("RGB", (16, 16), color)
+    if changed_pixel is not None:
+        frame.putpixel(changed_pixel, changed_color)
+    return frame
+
+
+class TestGifEncoder(TestBase):
+
+    async def test_frames_are_encoded_losslessly_with_few_colors(self):
+        # GIVEN
+        frames = [_frame((255, 0, 0)), _frame((255, 0, 0), (3, 4)), _frame((0, 255, 0), (5, 6))]
+
+        # WHEN
+        gif_data = encode_gif_with_global_palette(frames, durations=[100, 200, 300])
+
+        # THEN
+        with PILImage.open(io.BytesIO(gif_data)) as gif:
+            decoded = [(frame.convert("RGB").tobytes(), frame.info["duration"]) for frame in ImageSequence.Iterator(gif)]
+        self.assertEqual([(frame.tobytes(), duration) for frame, duration in zip(frames, [100, 200, 300])], decoded)
+
+    async def test_only_the_changed_rectangle_is_encoded(self):
+        # GIVEN
+        frames = [_frame((255, 0, 0)), _frame((255, 0, 0), (3, 4))]
+
+        # WHEN
+        gif_data = encode_gif_with_global_palette(frames, durations=100)
+
+        # THEN
+        with PILImage.open(io.BytesIO(gif_data)) as gif:
+            gif.seek(1)
+            self.assertEqual((3, 4, 4, 5), gif.tile[0][1])
+            self.assertEqual(1, gif.disposal_method)
+        # a global color table of 4 colors: red, blue and the transparent color
+        self.assertEqual(0xF1, gif_data[10])
+
+    async def test_unchanged_frames_are_merged(self):
+        # GIVEN
+        frames = [_frame((255, 0, 0)), _frame((255, 0, 0)), _frame((0, 255, 0))]
+
+        # WHEN
+        gif_data = encode_gif_with_global_palette(frames, durations=100)
+
+        # THEN
+        with PILImage.open(io.BytesIO(gif_data)) as gif:
+            self.assertEqual(2, gif.n_frames)
+            self.assertEqual(200, gif.info["duration"])
+
+    async def test_frames_of_different_sizes_are_rejected(self):
+        with self.assertRaises(ValueError):
+            encode_gif_with_global_palette([_frame((0, 0, 0)), PILImage.new("RGB", (8, 8))], durations=100)
@@ -1,7 +1,11 @@
+import io
 from unittest.mock import AsyncMock
 
+from PIL import Image as PILImage
+
 from idotmatrix.modules.gif import GifModule
 from idotmatrix.screensize import ScreenSize
+from idotmatrix.util.image_utils import ResizeMode
 from tests import TestBase
 
 
@@ -35,5 +39,28 @@ class TestGifModule(TestBase):
                 bytearray(
                     b'\x10\x19~z\xf9V\xeb\xdbw_\xda>\x02\xfe\xaa) \xa0\x02\x00\xca6 \x81\xf8\xcd\'Pd\x07\x16\x18\xe0\x80\x0e\x96\xd6`\x82\n2\x08!\x85\n\xd2\x17\x19\x86\x19j\x18a\x87 \x86(b\x87\x01\x01\x00!\xf9\x04\x08\n\x00\x00\x00,\x00\x00\x00\x00@\x00@\x00\x83\x00\x00\x00\xff\x95\x00>\'#mLA\xff\xc1\x07yUHijj\xfff\x00]@7YVRN4.\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x08\xff\x00\x01\x08\x1cH\xb0\xa0\xc1\x83\x08\x13*\\\xc8\xb0\xa1\xc3\x87\x10#J\x9cH\xb1\xa2\xc5\x8b\x183j\xdc\xc8\xb1\xa3\xc7\x8f C\x8a\x1cI\xb2\xa4\xc9\x93\x12\x0f\x1c@iQ%\xcb\x89*]\xbe\x8c\x18s\xe5L\x88*\x03\x04\x90y\x93a\xce\x9d6{&\xfc\xa9S\'O\xa1\x05\x89\x16=\x8a\x14\x80\xd2\xa2K\x83"}\n\x15hS\x81J\t\x10\x80\xca\xb4g\xd6\xadQ\x9bR\xd5\xaa\x95\xab\xd4\x97c\xc9\x9a\x15\xfa\x95\xac\xda\xb03\xdb\xba\x05k\xf4\xecI\xa8s\xf3\xd2\rp\x13\xaf^\xb7P\xfbV\xfd[\x95\xef\xcc\xc2\x84\xab\xde\x14 \xa0\x80\xe3\xc7\x90#\x17`\xbc\xb8\xb1\xe4\xcb\x8e)\xcfd\x8c\x19\xb3\xe6\x97\x9c;K\xfe\xbcY\xc0\x80\xd3\xa8S\x9f&]Y\xb5\xeb\x01\xacK\xbfV\x1d\x1b\xb4\xe9\xd9\xa8k\xb3d\x8c;\xb7\x80\xa6\xbc{\xc3\xfe=3\x81\xf1\x04\x06\x92+_\xce\xdc\xc0\xf1\x04(\x9f7\x9f\xae\xfcy\xf4\xe3\xd4\xa9[?)={\xf3\xed\x95\x11\x88K\x1f/^wx\xf2\xe3\xcd\x97F\x9f\x9e\xf8U\x00\x8c\xd9\x97w\x7f5\xbe|\xf5\xb6\xe5#\xc0_Z\x81\x7f\x05\xfcU\xf6\x1f\x80\xf4\xbd\'\x10c\x03\x06\xd8\xdf\x7f\n\xda\x96`\x81\x06"\xc8 \x84\x06\xc2\xc7\x18\x85\x15Z\xd8`\x86\x1cv\xe8a\x86\x01\x01\x00;')
             ]],
-            response=True
+            response=True,
+            job=None
+        )
+
+    async def test_global_palette_gif_is_smaller(self):
+        # GIVEN
+        under_test = GifModule(
+            connection_manager=AsyncMock(),
+            screen_size=ScreenSize.SIZE_64x64,
         )
+        gif_file_path = self._test_data_folder / "demo.gif"
+
+        # WHEN
+        gif_data = under_test._load_gif_and_adapt_to_canvas(
+            file_path=gif_file_path, canvas_size=64, resize_mode=ResizeMode.FIT,
+        )
+        global_palette_gif_data = under_test._load_gif_and_adapt_to_canvas(
+            file_path=gif_file_path, canvas_size=64, resize_mode=ResizeMode.FIT, global_palette=True,
+        )
+
+        # THEN
+        with PILImage.open(io.BytesIO(global_palette_gif_data)) as gif:
+            self.assertEqual((64, 64), gif.size)
+            self.assertEqual(6, gif.n_frames)
+        self.assertLess(len(global_palette_gif_data), len(gif_data))
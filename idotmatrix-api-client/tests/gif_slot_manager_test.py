@@ -0,0 +1,80 @@
+import tempfile
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+from idotmatrix.modules.common import CommonModule
+from idotmatrix.modules.gif import GifModule
+from idotmatrix.screensize import ScreenSize
+from idotmatrix.util.gif_slots import GifSlotManager, DEFAULT_GIF_SLOT
+from tests import TestBase
+
+DEVICE = "00:11:22:33:44:55"
+
+
+class TestGifSlotManager(TestBase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._state_file = Path(self._temp_dir.name) / "gif_slots.json"
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    @staticmethod
+    def _create_connection_manager() -> AsyncMock:
+        connection_manager = AsyncMock()
+        connection_manager.address = DEVICE
+        connection_manager.send_count = 0
+        return connection_manager
+
+    async def test_upload_is_skipped_while_gif_is_shown(self):
+        # GIVEN
+        connection_manager = self._create_connection_manager()
+        under_test = GifModule(
+            connection_manager=connection_manager,
+            screen_size=ScreenSize.SIZE_64x64,
+            slot_manager=GifSlotManager(),
+        )
+        gif_file_path = self._test_data_folder / "demo.gif"
+
+        # WHEN
+        first_upload = await under_test.upload_gif_file(file_path=gif_file_path)
+        second_upload = await under_test.upload_gif_file(file_path=gif_file_path)
+        # something else is sent to the device
+        connection_manager.send_count += 1
+        third_upload = await under_test.upload_gif_file(file_path=gif_file_path)
+
+        # THEN
+        self.assertEqual([True, False, True], [first_upload, second_upload, third_upload])
+        self.assertEqual(2, connection_manager.send_packets.await_count)
+
+    async def test_slots_are_persisted(self):
+        # GIVEN
+        packets = [[b'\x00' * 15 + bytes([DEFAULT_GIF_SLOT]) + b'\x01\x02']]
+        content_hash = GifSlotManager.content_hash(packets)
+        GifSlotManager(state_file=self._state_file).record_upload(
+            device=DEVICE, slot=GifSlotManager.slot_of(packets), content_hash=content_hash, send_count=1,
+        )
+
+        # WHEN
+        under_test = GifSlotManager(state_file=self._state_file)
+
+        # THEN
+        self.assertEqual(DEFAULT_GIF_SLOT, under_test.find_slot(DEVICE, content_hash))
+        self.assertFalse(under_test.is_showing(DEVICE, content_hash, send_count=1))
+
+    async def test_reset_invalidates_slots(self):
+        # GIVEN
+        slot_manager = GifSlotManager(state_file=self._state_file)
+        slot_manager.record_upload(device=DEVICE, slot=DEFAULT_GIF_SLOT, content_hash="abc", send_count=1)
+        under_test = CommonModule(
+            connection_manager=self._create_connection_manager(),
+            gif_slot_manager=slot_manager,
+        )
+
+        # WHEN
+        await under_test.reset()
+
+        # THEN
+        self.assertIsNone(slot_manager.find_slot(DEVICE, "abc"))
+        self.assertIsNone(GifSlotManager(state_file=self._state_file).find_slot(DEVICE, "abc"))
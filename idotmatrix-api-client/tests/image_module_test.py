@@ -59,5 +59,58 @@ class TestImageModule(TestBase):
                     b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
                 ]
             ],
-            response=True
+            response=True,
+            job=None
         )
+
+    async def test_upload_image_rgb_data_matches_pixeldata(self):
+        # GIVEN
+        connection_manager = AsyncMock()
+        under_test = ImageModule(
+            connection_manager=connection_manager,
+            screen_size=ScreenSize.SIZE_16x16,
+        )
+        pixel_colors = [(x % 256, (x * 7) % 256, 255 - x % 256) for x in range(16 * 16)]
+        rgb_data = bytes(component for color in pixel_colors for component in color)
+
+        # WHEN
+        await under_test.upload_image_pixeldata(pixel_colors=pixel_colors)
+        await under_test.upload_image_rgb_data(rgb_data=memoryview(rgb_data).cast("B", (16, 16, 3)))
+
+        # THEN
+        list_call, buffer_call = connection_manager.send_packets.await_args_list
+        self.assertEqual(list_call, buffer_call)
+
+    async def test_rgb_data_packets_can_be_uploaded_later(self):
+        # GIVEN
+        connection_manager = AsyncMock()
+        under_test = ImageModule(
+            connection_manager=connection_manager,
+            screen_size=ScreenSize.SIZE_16x16,
+        )
+        rgb_data = bytes(range(256)) * 3
+
+        # WHEN
+        packets = under_test.create_image_rgb_data_packets(rgb_data)
+        await under_test.upload_image_packets(packets)
+        await under_test.upload_image_rgb_data(rgb_data)
+
+        # THEN
+        prebuilt_call, direct_call = connection_manager.send_packets.await_args_list
+        self.assertEqual(prebuilt_call, direct_call)
+        with self.assertRaises(ValueError):
+            under_test.create_image_rgb_data_packets(rgb_data[:-3])
+
+    async def test_upload_image_pixeldata_rejects_invalid_color(self):
+        # GIVEN
+        connection_manager = AsyncMock()
+        under_test = ImageModule(
+            connection_manager=connection_manager,
+            screen_size=ScreenSize.SIZE_16x16,
+        )
+        pixel_colors = [(0, 0, 0)] * (16 * 16 - 1) + [(0, 256, 0)]
+
+        # WHEN / THEN
+        with self.assertRaises(ValueError):
+            await under_test.upload_image_pixeldata(pixel_colors=pixel_colors)
+        connection_manager.send_packets.assert_not_awaited()
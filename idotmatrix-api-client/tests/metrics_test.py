@@ -0,0 +1,65 @@
+from idotmatrix.connection_manager import ConnectionManager, TRANSFER_MODE_STRICT
+from idotmatrix.metrics import InMemoryMetrics, LabeledMetricsRecorder, METRIC_TRANSFERS, METRIC_TRANSFER_BYTES, \
+    METRIC_TRANSFER_CHUNKS, METRIC_TRANSFER_ERRORS, METRIC_WRITE_LATENCY, METRIC_CONNECTS
+from idotmatrix.simulator import SimulatedPeripheral
+from tests import TestBase
+
+
+class TestMetrics(TestBase):
+
+    async def test_transfers_are_recorded_per_command_type(self):
+        # GIVEN
+        metrics = InMemoryMetrics()
+        peripheral = SimulatedPeripheral(mtu=4)
+        connection_manager = peripheral.attach(ConnectionManager(metrics=metrics))
+        await connection_manager.connect()
+        packets = [[b'\x06\x00\x05\x01', b'\x03\x04'], [b'\x03\x00\x05']]
+
+        # WHEN
+        await connection_manager.send_packets(packets=packets, response=False)
+
+        # THEN
+        labels = {"command": "0501", "mode": TRANSFER_MODE_STRICT}
+        self.assertEqual(1, metrics.get_counter(METRIC_CONNECTS))
+        self.assertEqual(1, metrics.get_counter(METRIC_TRANSFERS, labels))
+        self.assertEqual(9, metrics.get_counter(METRIC_TRANSFER_BYTES, labels))
+        self.assertEqual(3, metrics.get_counter(METRIC_TRANSFER_CHUNKS, labels))
+        self.assertEqual(3, metrics.get_histogram(METRIC_WRITE_LATENCY, {"command": "0501"}).count)
+
+    async def test_failed_transfers_are_counted(self):
+        # GIVEN
+        metrics = InMemoryMetrics()
+        peripheral = SimulatedPeripheral()
+        connection_manager = peripheral.attach(ConnectionManager(metrics=metrics))
+        await connection_manager.connect()
+        # the writes fail even after stepping down to the minimum write size
+        peripheral.mtu = 4
+
+        # WHEN
+        with self.assertRaises(Exception):
+            await connection_manager.send_packets(packets=[[b'\x05\x00\x01\x02\x03']], response=False)
+
+        # THEN
+        self.assertEqual(1, metrics.get_counter(METRIC_TRANSFER_ERRORS, {"command": "0102"}))
+
+    def test_prometheus_export(self):
+        # GIVEN
+        metrics = InMemoryMetrics(buckets=(0.01, 0.1))
+        recorder = LabeledMetricsRecorder(metrics, {"device": "AA:BB"})
+
+        # WHEN
+        recorder.increment(METRIC_TRANSFERS, labels={"command": "0501"})
+        recorder.observe(METRIC_WRITE_LATENCY, 0.05)
+
+        # THEN
+        self.assertEqual(
+            "# TYPE idotmatrix_transfers_total counter\n"
+            'idotmatrix_transfers_total{command="0501",device="AA:BB"} 1\n'
+            "# TYPE idotmatrix_write_latency_seconds histogram\n"
+            'idotmatrix_write_latency_seconds_bucket{device="AA:BB",le="0.01"} 0\n'
+            'idotmatrix_write_latency_seconds_bucket{device="AA:BB",le="0.1"} 1\n'
+            'idotmatrix_write_latency_seconds_bucket{device="AA:BB",le="+Inf"} 1\n'
+            'idotmatrix_write_latency_seconds_sum{device="AA:BB"} 0.05\n'
+            'idotmatrix_write_latency_seconds_count{device="AA:BB"} 1\n',
+            metrics.to_prometheus(),
+        )
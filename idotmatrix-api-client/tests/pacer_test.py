@@ -0,0 +1,57 @@
+import time
+
+from idotmatrix.connection_manager import ConnectionManager
+from idotmatrix.metrics import command_type
+from idotmatrix.modules.effect import EffectModule
+from idotmatrix.simulator import SimulatedPeripheral
+from tests import TestBase
+
+
+class TestAdaptivePacer(TestBase):
+
+    async def _connect(self, peripheral: SimulatedPeripheral) -> ConnectionManager:
+        connection_manager = peripheral.attach(ConnectionManager())
+        await connection_manager.connect()
+        return connection_manager
+
+    async def test_gap_is_learned_from_acknowledgements(self):
+        # GIVEN
+        peripheral = SimulatedPeripheral(acknowledgement_delay_seconds=0.01)
+        connection_manager = await self._connect(peripheral)
+        effect_module = EffectModule(connection_manager=connection_manager)
+
+        # WHEN
+        start = time.perf_counter()
+        for _ in range(10):
+            await effect_module.show(style=0, colors=[(255, 0, 0), (0, 255, 0)])
+        elapsed = time.perf_counter() - start
+
+        # THEN
+        self.assertEqual(10, len(peripheral.packets))
+        command = command_type(peripheral.packets[0])
+        self.assertTrue(connection_manager.pacer.has_learned_gap(command))
+        learned_gap = connection_manager.pacer.learned_gaps[command]
+        self.assertGreater(learned_gap, 0.01)
+        self.assertLess(learned_gap, 0.5)
+        # the fixed pacing of 0.5 seconds per command would take 5 seconds
+        self.assertLess(elapsed, 2)
+
+    async def test_default_gap_is_used_without_acknowledgements(self):
+        # GIVEN
+        peripheral = SimulatedPeripheral(acknowledge=False)
+        connection_manager = await self._connect(peripheral)
+        data = bytearray([5, 0, 4, 1, 1])
+
+        # WHEN
+        for _ in range(4):
+            await connection_manager.send_bytes(data=data)
+            await connection_manager.pace(data=data, default_gap=0.05)
+        start = time.perf_counter()
+        await connection_manager.send_bytes(data=data)
+        elapsed = time.perf_counter() - start
+
+        # THEN
+        self.assertEqual({}, connection_manager.pacer.learned_gaps)
+        self.assertFalse(connection_manager.pacer.expects_acknowledgement(command_type(data)))
+        # the next command is delayed by the default gap of the previous one
+        self.assertGreaterEqual(elapsed, 0.04)
@@ -0,0 +1,38 @@
+import struct
+
+from idotmatrix.util.packet_builder import build_framed_packets
+from tests import TestBase
+
+
+class TestPacketBuilder(TestBase):
+
+    async def test_frames_are_single_buffers_with_the_header_in_place(self):
+        # GIVEN
+        data = bytes(range(250)) * 4
+
+        def write_header(frame: bytearray, index: int, payload_size: int):
+            struct.pack_into("<HB", frame, 0, payload_size, index)
+
+        # WHEN
+        packets = build_framed_packets(data, header_size=3, write_header=write_header, chunk_size=400,
+                                       ble_packet_size=100)
+
+        # THEN
+        self.assertEqual([5, 5, 3], [len(packet) for packet in packets])
+        for index, packet in enumerate(packets):
+            # all BLE packets of a frame are slices of the same buffer
+            self.assertTrue(all(isinstance(chunk, memoryview) and chunk.obj is packet[0].obj for chunk in packet))
+            frame = b"".join(packet)
+            payload = data[index * 400:(index + 1) * 400]
+            self.assertEqual(struct.pack("<HB", len(payload), index) + payload, frame)
+
+    async def test_memoryview_of_other_formats_is_accepted(self):
+        # GIVEN
+        data = memoryview(bytearray(range(8))).cast("H")
+
+        # WHEN
+        packets = build_framed_packets(data, header_size=0, write_header=lambda *_: None, chunk_size=4,
+                                       ble_packet_size=4)
+
+        # THEN
+        self.assertEqual([[bytes(range(4))], [bytes(range(4, 8))]], [[bytes(chunk) for chunk in packet] for packet in packets])
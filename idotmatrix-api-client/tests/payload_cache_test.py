@@ -0,0 +1,111 @@
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+from idotmatrix.modules.gif import GifModule
+from idotmatrix.screensize import ScreenSize
+from idotmatrix.util.payload_cache import PayloadCache
+from tests import TestBase
+
+
+class TestPayloadCache(TestBase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._cache_dir = Path(self._temp_dir.name)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    async def test_gif_upload_uses_cached_packets(self):
+        # GIVEN
+        connection_manager = AsyncMock()
+        payload_cache = PayloadCache()
+        under_test = GifModule(
+            connection_manager=connection_manager,
+            screen_size=ScreenSize.SIZE_64x64,
+            payload_cache=payload_cache,
+        )
+        gif_file_path = self._test_data_folder / "demo.gif"
+
+        # WHEN
+        await under_test.upload_gif_file(file_path=gif_file_path)
+        await under_test.upload_gif_file(file_path=gif_file_path)
+
+        # THEN
+        self.assertEqual(1, payload_cache.misses)
+        self.assertEqual(1, payload_cache.hits)
+        first_call, second_call = connection_manager.send_packets.await_args_list
+        self.assertEqual(first_call, second_call)
+
+    async def test_key_depends_on_parameters(self):
+        # GIVEN
+        under_test = PayloadCache()
+        gif_file_path = self._test_data_folder / "demo.gif"
+
+        # WHEN
+        key_64 = under_test.create_key(gif_file_path, "gif", 64)
+        key_32 = under_test.create_key(gif_file_path, "gif", 32)
+
+        # THEN
+        self.assertNotEqual(key_64, key_32)
+        self.assertEqual(key_64, under_test.create_key(gif_file_path, "gif", 64))
+
+    async def test_entries_are_persisted_to_disk(self):
+        # GIVEN
+        packets = [[b'\x01\x02\x03', b'\x04'], [b'\x05']]
+        PayloadCache(cache_dir=self._cache_dir).put("key", packets)
+        under_test = PayloadCache(cache_dir=self._cache_dir)
+
+        # WHEN
+        result = under_test.get("key")
+
+        # THEN
+        self.assertEqual(packets, result)
+        self.assertEqual(1, under_test.hits)
+
+    async def test_memory_is_bounded(self):
+        # GIVEN
+        under_test = PayloadCache(max_memory_bytes=8)
+
+        # WHEN
+        under_test.put("first", [[b'\x00' * 4]])
+        under_test.put("second", [[b'\x00' * 4]])
+        under_test.put("third", [[b'\x00' * 4]])
+
+        # THEN
+        self.assertIsNone(under_test.get("first"))
+        self.assertIsNotNone(under_test.get("second"))
+        self.assertIsNotNone(under_test.get("third"))
+
+    def test_lookups_are_not_blocked_by_disk_writes(self):
+        # GIVEN
+        under_test = PayloadCache(cache_dir=self._cache_dir)
+        under_test.put("cached", [[b"\x01\x02"]])
+        write_started = threading.Event()
+        write_released = threading.Event()
+        write_finished = threading.Event()
+        write_to_disk = under_test._write_to_disk
+
+        def slow_write_to_disk(key, packets):
+            write_started.set()
+            write_released.wait(timeout=2)
+            write_to_disk(key, packets)
+            write_finished.set()
+
+        under_test._write_to_disk = slow_write_to_disk
+        writer = threading.Thread(target=under_test.put, args=("new", [[b"\x03"]]))
+
+        # WHEN
+        writer.start()
+        write_started.wait(timeout=5)
+        packets = under_test.get("cached")
+        is_write_finished = write_finished.is_set()
+        write_released.set()
+        writer.join(timeout=5)
+
+        # THEN
+        self.assertEqual([[b"\x01\x02"]], packets)
+        self.assertFalse(is_write_finished)
+        self.assertEqual([[b"\x03"]], PayloadCache(cache_dir=self._cache_dir).get("new"))
@@ -0,0 +1,84 @@
+from idotmatrix.connection_manager import ConnectionManager, TRANSFER_MODE_PIPELINED
+from idotmatrix.simulator import SimulatedPeripheral
+from tests import TestBase
+
+
+class TestSimulatedPeripheral(TestBase):
+
+    async def _connect(self, peripheral: SimulatedPeripheral) -> ConnectionManager:
+        connection_manager = peripheral.attach(ConnectionManager())
+        await connection_manager.connect()
+        return connection_manager
+
+    async def test_packets_are_reassembled(self):
+        # GIVEN
+        peripheral = SimulatedPeripheral(mtu=4)
+        connection_manager = await self._connect(peripheral)
+        packets = [[b'\x06\x00\x01\x02', b'\x03\x04'], [b'\x03\x00\x05']]
+
+        # WHEN
+        await connection_manager.send_packets(packets=packets, response=True)
+        await connection_manager.send_bytes(data=b'\x05\x00\x04\x01\x01', response=False)
+
+        # THEN
+        self.assertEqual(
+            [b'\x06\x00\x01\x02\x03\x04', b'\x03\x00\x05', b'\x05\x00\x04\x01\x01'],
+            peripheral.packets,
+        )
+        # send_bytes splits the data by the MTU
+        self.assertEqual(5, peripheral.write_count)
+
+    async def test_commands_with_mismatching_length_header_are_one_packet(self):
+        # GIVEN
+        peripheral = SimulatedPeripheral()
+        connection_manager = await self._connect(peripheral)
+        # the length header of effect commands doesn't include the colors
+        effect = bytes([8, 0, 3, 2, 0, 90, 2, 255, 0, 0, 0, 255, 0])
+
+        # WHEN
+        await connection_manager.send_bytes(data=effect, response=False)
+        await connection_manager.send_bytes(data=effect, response=False)
+
+        # THEN
+        self.assertEqual([effect, effect], peripheral.packets)
+
+    async def test_pipelined_transfer_is_acknowledged_by_notifications(self):
+        # GIVEN
+        peripheral = SimulatedPeripheral(acknowledgement_delay_seconds=0.001)
+        connection_manager = await self._connect(peripheral)
+        connection_manager.set_pipelined_transfer(True, window=2)
+        packets = [[b'\x04\x00', b'\x01\x02'] for _ in range(5)]
+
+        # WHEN
+        await connection_manager.send_packets(packets=packets, response=True)
+
+        # THEN
+        self.assertEqual(5, len(peripheral.packets))
+        self.assertEqual(TRANSFER_MODE_PIPELINED, connection_manager.last_transfer_stats.mode)
+
+    async def test_write_size_is_stepped_down_to_the_supported_mtu(self):
+        # GIVEN
+        peripheral = SimulatedPeripheral()
+        connection_manager = await self._connect(peripheral)
+        # the link supports a smaller MTU than the one reported by the BLE stack
+        peripheral.mtu = 244
+        packet = (1000).to_bytes(2, byteorder="little") + bytes(998)
+
+        # WHEN
+        await connection_manager.send_packets(packets=[[packet[:509], packet[509:]]], response=False)
+
+        # THEN
+        self.assertEqual([packet], peripheral.packets)
+        self.assertEqual(244, connection_manager.chunk_planner.get_write_size(peripheral.address))
+
+    async def test_writes_exceeding_the_mtu_are_rejected(self):
+        # GIVEN
+        peripheral = SimulatedPeripheral()
+        connection_manager = await self._connect(peripheral)
+        # not even the minimum write size is supported by the link
+        peripheral.mtu = 4
+
+        # WHEN / THEN
+        with self.assertRaises(Exception):
+            await connection_manager.send_packets(packets=[[b'\x05\x00\x01\x02\x03']], response=False)
+        self.assertEqual([], peripheral.packets)
@@ -1,8 +1,11 @@
+from pathlib import Path
 from unittest.mock import AsyncMock
 
 from idotmatrix.modules.text import TextModule, TextColorMode, TextMode
 from tests import TestBase
 
+FONT_PATH = str(Path(__file__).parent.parent / "fonts" / "Rain-DRM3.otf")
+
 
 class TestTextModule(TestBase):
 
@@ -22,7 +25,7 @@ class TestTextModule(TestBase):
             text_color_mode=TextColorMode.WHITE,
             text_color=(255, 0, 0),
             text_bg_color=(0, 20, 0),
-            font_path="../fonts/Rain-DRM3.otf",
+            font_path=FONT_PATH,
         )
 
         # THEN
@@ -32,3 +35,19 @@ class TestTextModule(TestBase):
             ),
             response=False,
         )
+
+    async def test_characters_are_rendered_once(self):
+        # GIVEN
+        under_test = TextModule(
+            connection_manager=AsyncMock(),
+        )
+        under_test.glyph_cache.clear()
+
+        # WHEN
+        bitmaps = under_test._string_to_bitmaps(text="ABAB", font_size=16, font_path=FONT_PATH)
+
+        # THEN
+        self.assertEqual(2, under_test.glyph_cache.misses)
+        self.assertEqual(2, under_test.glyph_cache.hits)
+        self.assertEqual(4 * (len(under_test.separator) + 64), len(bitmaps))
+        self.assertEqual(bitmaps[:68], bitmaps[136:204])
@@ -0,0 +1,153 @@
+import asyncio
+
+from idotmatrix import commands
+from idotmatrix.connection_manager import ConnectionManager
+from idotmatrix.modules.common import CommonModule
+from idotmatrix.simulator import SimulatedPeripheral
+from idotmatrix.transaction import Transaction, WAIT_ACKNOWLEDGEMENT, WAIT_PACED
+from idotmatrix.util.gif_slots import GifSlotManager, DEFAULT_GIF_SLOT
+from tests import TestBase
+
+
+class ReadCountingPeripheral(SimulatedPeripheral):
+    """Counts the reads of the response of the device."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.read_count = 0
+
+    async def read_gatt_char(self, char_specifier: str) -> bytearray:
+        self.read_count += 1
+        return await super().read_gatt_char(char_specifier)
+
+
+class TestTransaction(TestBase):
+
+    async def _connect(self, peripheral: SimulatedPeripheral) -> ConnectionManager:
+        connection_manager = peripheral.attach(ConnectionManager())
+        await connection_manager.connect()
+        return connection_manager
+
+    async def test_steps_are_sent_without_other_commands_in_between(self):
+        # GIVEN
+        peripheral = SimulatedPeripheral(write_latency_seconds=0.005)
+        connection_manager = await self._connect(peripheral)
+        connection_manager.set_command_coalescing(True)
+        image_packets = [[bytes([6, 0, 1, 0, i, 0])] for i in range(3)]
+        transaction = (
+            Transaction()
+            .add_command(commands.IMAGE_MODE.encode(1))
+            .add_packets(image_packets)
+        )
+        turn_off = commands.SCREEN_OFF.frame
+
+        async def turn_off_during_transaction():
+            await asyncio.sleep(0.005)
+            await connection_manager.send_bytes(data=turn_off, response=True)
+
+        # WHEN
+        timings, _ = await asyncio.gather(
+            connection_manager.run_transaction(transaction),
+            turn_off_during_transaction(),
+        )
+
+        # THEN
+        self.assertEqual(
+            [commands.IMAGE_MODE.encode(1)] + [packet[0] for packet in image_packets] + [turn_off],
+            peripheral.packets,
+        )
+        self.assertEqual(["0401", "0100"], [timing.name for timing in timings])
+        self.assertTrue(all(timing.send_seconds > 0 for timing in timings))
+
+    async def test_next_step_is_sent_once_acknowledged(self):
+        # GIVEN
+        peripheral = SimulatedPeripheral(acknowledgement_delay_seconds=0.02)
+        connection_manager = await self._connect(peripheral)
+        transaction = (
+            Transaction()
+            .add_command(commands.IMAGE_MODE.encode(1), wait=WAIT_ACKNOWLEDGEMENT, gap=1.0)
+            .add_command(commands.FULLSCREEN_COLOR.encode(0, 0, 0))
+        )
+
+        # WHEN
+        timings = await connection_manager.run_transaction(transaction)
+
+        # THEN
+        self.assertEqual(2, len(peripheral.packets))
+        self.assertTrue(timings[0].acknowledged)
+        self.assertIsNone(timings[1].acknowledged)
+        self.assertGreaterEqual(timings[1].wait_seconds, 0.015)
+        self.assertLess(timings[1].wait_seconds, 0.5)
+
+    async def test_gap_is_waited_without_acknowledgements(self):
+        # GIVEN
+        peripheral = SimulatedPeripheral(acknowledge=False)
+        connection_manager = await self._connect(peripheral)
+        connection_manager.set_adaptive_pacing(False)
+        transaction = (
+            Transaction()
+            .add_command(commands.IMAGE_MODE.encode(1), wait=WAIT_ACKNOWLEDGEMENT, gap=0.05)
+            .add_command(commands.FULLSCREEN_COLOR.encode(0, 0, 0), wait=WAIT_PACED, gap=0.05)
+            .add_command(commands.RESET.frame)
+        )
+
+        # WHEN
+        timings = await connection_manager.run_transaction(transaction)
+
+        # THEN
+        self.assertEqual(3, len(peripheral.packets))
+        self.assertFalse(timings[0].acknowledged)
+        self.assertGreaterEqual(timings[1].wait_seconds, 0.04)
+        self.assertGreaterEqual(timings[2].wait_seconds, 0.04)
+
+    async def test_response_is_read_for_response_steps(self):
+        # GIVEN
+        peripheral = ReadCountingPeripheral()
+        connection_manager = await self._connect(peripheral)
+        transaction = (
+            Transaction()
+            .add_command(commands.FULLSCREEN_COLOR.encode(0, 0, 0), response=False)
+            .add_command(commands.IMAGE_MODE.encode(0))
+            .add_packets([[commands.RESET.frame]])
+        )
+
+        # WHEN
+        await connection_manager.run_transaction(transaction)
+
+        # THEN
+        self.assertEqual(3, len(peripheral.packets))
+        self.assertEqual(2, peripheral.read_count)
+
+    def test_invalid_wait_conditions_are_rejected(self):
+        # GIVEN
+        under_test = Transaction()
+        data = commands.IMAGE_MODE.encode(1)
+
+        # THEN
+        self.assertRaises(ValueError, under_test.add_command, data, wait="forever")
+        self.assertRaises(ValueError, under_test.add_command, data, wait=WAIT_PACED)
+        self.assertRaises(ValueError, under_test.add_packets, [])
+        self.assertEqual(0, len(under_test))
+
+    async def test_reset_runs_after_the_given_transaction(self):
+        # GIVEN
+        peripheral = SimulatedPeripheral()
+        connection_manager = await self._connect(peripheral)
+        slot_manager = GifSlotManager()
+        slot_manager.record_upload(device=peripheral.address, slot=DEFAULT_GIF_SLOT, content_hash="abc", send_count=1)
+        under_test = CommonModule(connection_manager=connection_manager, gif_slot_manager=slot_manager)
+        transaction = (
+            Transaction()
+            .add_command(commands.IMAGE_MODE.encode(0))
+            .add_command(commands.FULLSCREEN_COLOR.encode(0, 0, 0))
+        )
+
+        # WHEN
+        await under_test.reset(transaction=transaction)
+
+        # THEN
+        self.assertEqual(
+            [commands.IMAGE_MODE.encode(0), commands.FULLSCREEN_COLOR.encode(0, 0, 0), commands.RESET.frame],
+            peripheral.packets,
+        )
+        self.assertIsNone(slot_manager.find_slot(peripheral.address, "abc"))
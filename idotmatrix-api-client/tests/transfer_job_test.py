@@ -0,0 +1,132 @@
+from typing import Set
+
+from bleak.exc import BleakError
+
+from idotmatrix.connection_manager import ConnectionManager
+from idotmatrix.simulator import SimulatedPeripheral
+from idotmatrix.transfer_job import TransferJob, TransferCancelledError, JOB_STATE_COMPLETED, JOB_STATE_CANCELLED
+from tests import TestBase
+
+
+class FlakyPeripheral(SimulatedPeripheral):
+    """Fails the writes with the given (1-based) numbers once, optionally losing the connection."""
+
+    def __init__(self, failing_writes: Set[int], lose_connection: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.failing_writes = failing_writes
+        self.lose_connection = lose_connection
+        self.attempt_count = 0
+
+    async def write_gatt_char(self, char_specifier: str, data, response: bool = False):
+        self.attempt_count += 1
+        if self.attempt_count in self.failing_writes:
+            if self.lose_connection:
+                await self.disconnect()
+            raise BleakError("write failed")
+        await super().write_gatt_char(char_specifier, data, response)
+
+
+def _packet(length: int, marker: int) -> bytes:
+    return length.to_bytes(2, byteorder="little") + bytes([marker]) * (length - 2)
+
+
+class TestTransferJob(TestBase):
+
+    async def _connect(self, peripheral: SimulatedPeripheral) -> ConnectionManager:
+        connection_manager = peripheral.attach(ConnectionManager())
+        await connection_manager.connect()
+        return connection_manager
+
+    async def test_progress_is_reported(self):
+        # GIVEN
+        connection_manager = await self._connect(SimulatedPeripheral())
+        packets = [[_packet(100, 1)], [_packet(100, 2)], [_packet(50, 3)]]
+        job = TransferJob()
+        progress = []
+        job.add_listener(lambda j: progress.append((j.state, j.packets_sent, j.bytes_sent)))
+
+        # WHEN
+        await connection_manager.send_packets(packets=packets, response=True, job=job)
+
+        # THEN
+        self.assertEqual(JOB_STATE_COMPLETED, job.state)
+        self.assertEqual((3, 250), (job.packet_count, job.byte_count))
+        self.assertEqual(1.0, job.progress)
+        self.assertEqual([(1, 100), (2, 200), (3, 250)], [(p[1], p[2]) for p in progress[1:-1]])
+
+    async def test_cancel_stops_at_a_packet_boundary(self):
+        # GIVEN
+        peripheral = SimulatedPeripheral()
+        connection_manager = await self._connect(peripheral)
+        packets = [[_packet(100, i)] for i in range(5)]
+        job = TransferJob()
+        job.add_listener(lambda j: j.cancel() if j.packets_sent == 2 else None)
+
+        # WHEN
+        with self.assertRaises(TransferCancelledError):
+            await connection_manager.send_packets(packets=packets, response=True, job=job)
+
+        # THEN
+        self.assertEqual(JOB_STATE_CANCELLED, job.state)
+        self.assertEqual([_packet(100, 0), _packet(100, 1)], peripheral.packets)
+
+    async def test_failed_write_is_retried_at_the_failed_chunk(self):
+        # GIVEN
+        # no smaller write size to step down to
+        peripheral = FlakyPeripheral(failing_writes={2}, mtu=19)
+        connection_manager = await self._connect(peripheral)
+        packet = _packet(60, 1)
+        job = TransferJob(retry_delay_seconds=0)
+
+        # WHEN
+        await connection_manager.send_packets(packets=[[packet]], response=False, job=job)
+
+        # THEN
+        self.assertEqual([packet], peripheral.packets)
+        self.assertEqual(1, job.retry_count)
+        self.assertEqual(JOB_STATE_COMPLETED, job.state)
+
+    async def test_failed_write_without_job_is_not_retried(self):
+        # GIVEN
+        peripheral = FlakyPeripheral(failing_writes={2}, mtu=19)
+        connection_manager = await self._connect(peripheral)
+
+        # WHEN / THEN
+        with self.assertRaises(BleakError):
+            await connection_manager.send_packets(packets=[[_packet(60, 1)]], response=False)
+
+    async def test_transfer_starts_over_after_reconnecting(self):
+        # GIVEN
+        # the connection is lost during the second packet
+        peripheral = FlakyPeripheral(failing_writes={3}, lose_connection=True, mtu=100)
+        connection_manager = await self._connect(peripheral)
+        packets = [[_packet(100, 1)], [_packet(150, 2)]]
+        job = TransferJob(retry_delay_seconds=0)
+
+        # WHEN
+        await connection_manager.send_packets(packets=packets, response=False, job=job)
+
+        # THEN
+        self.assertTrue(peripheral.is_connected)
+        self.assertEqual([_packet(100, 1), _packet(100, 1), _packet(150, 2)], peripheral.packets)
+        self.assertEqual(1, job.retry_count)
+        self.assertEqual(2, job.packets_sent)
+
+    async def test_transfer_starts_over_after_reconnecting_in_pipeline_fallback(self):
+        # GIVEN
+        # the connection is lost while pipelining the second packet, and reconnecting fails on the first try
+        peripheral = FlakyPeripheral(failing_writes={2, 3}, lose_connection=True, mtu=200)
+        connection_manager = await self._connect(peripheral)
+        connection_manager.set_pipelined_transfer(True, window=1)
+        packets = [[_packet(100, 1)], [_packet(150, 2)]]
+        job = TransferJob(retry_delay_seconds=0)
+
+        # WHEN
+        await connection_manager.send_packets(packets=packets, response=True, job=job)
+
+        # THEN
+        # the device discarded the first packet, so the strict fallback starts over with it
+        self.assertEqual([_packet(100, 1), _packet(100, 1), _packet(150, 2)], peripheral.packets)
+        self.assertEqual(1, job.retry_count)
+        self.assertEqual(2, job.packets_sent)
+        self.assertEqual(JOB_STATE_COMPLETED, job.state)
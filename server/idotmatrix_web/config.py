@@ -5,6 +5,7 @@ class Settings(BaseSettings):
     model_config = {"env_prefix": "IDOTMATRIX_"}
 
     MAC_ADDRESS: str | None = None
+    MAC_ADDRESSES: str | None = None  # comma-separated, for running several devices
     SCREEN_SIZE: int = 64
     HOST: str = "0.0.0.0"
     PORT: int = 8080
@@ -12,7 +13,21 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     AUTO_RECONNECT: bool = True
     AUTO_CONNECT: bool = True
+    COMMAND_COALESCING: bool = True
+    PREEMPT_BULK_TRANSFERS: bool = True
+    GIF_GLOBAL_PALETTE: bool = False  # encode GIFs with one palette and delta frames
     GIPHY_API_KEY: str | None = None
+    PROCESSING_WORKERS: int | None = None
+    PROCESSING_MAX_CONCURRENT: int = 4
+    PROCESSING_MAX_QUEUED: int = 16
+
+    @property
+    def mac_addresses(self) -> list[str]:
+        """All configured MAC addresses, MAC_ADDRESS first, without duplicates."""
+        addresses = [self.MAC_ADDRESS] if self.MAC_ADDRESS else []
+        if self.MAC_ADDRESSES:
+            addresses += [a.strip() for a in self.MAC_ADDRESSES.split(",") if a.strip()]
+        return list(dict.fromkeys(a.upper() for a in addresses))
 
 
 settings = Settings()
@@ -1,11 +1,20 @@
 import asyncio
 import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
+from idotmatrix import commands
 from idotmatrix.client import IDotMatrixClient
+from idotmatrix.command_queue import CommandQueue, WaitStats
 from idotmatrix.connection_manager import ConnectionManager, ConnectionListener
+from idotmatrix.metrics import LabeledMetricsRecorder
 from idotmatrix.screensize import ScreenSize
+from idotmatrix.transaction import Transaction, WAIT_PACED
+from idotmatrix.transfer_job import TransferJob
 
 from .config import settings
+from .metrics import transport_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -14,14 +23,21 @@ SCREEN_SIZE_MAP = {
     32: ScreenSize.SIZE_32x32,
     64: ScreenSize.SIZE_64x64,
 }
+# upper bound of the time the device needs to enter DIY mode, the gap learned from its acknowledgements is used once known
+DIY_MODE_SWITCH_SECONDS = 0.3
 
 
 class DeviceManager:
-    def __init__(self) -> None:
+    """Connection and send state of a single device."""
+
+    def __init__(self, mac_address: str | None = None, screen_size: int | None = None) -> None:
         self._client: IDotMatrixClient | None = None
-        self._screen_size = settings.SCREEN_SIZE
+        self._mac_address = mac_address
+        self._screen_size = screen_size or settings.SCREEN_SIZE
         self._connection_lock = asyncio.Lock()
         self._send_lock = asyncio.Lock()
+        self._queued_jobs = 0
+        self._job_wait_stats = WaitStats()
         self._connected = False
         self._reconnecting = False
         self._has_ever_connected = False
@@ -30,10 +46,11 @@ class DeviceManager:
 
     def _ensure_client(self) -> IDotMatrixClient:
         if self._client is None:
-            screen_size = SCREEN_SIZE_MAP.get(settings.SCREEN_SIZE, ScreenSize.SIZE_64x64)
+            screen_size = SCREEN_SIZE_MAP.get(self._screen_size, ScreenSize.SIZE_64x64)
             self._client = IDotMatrixClient(
                 screen_size=screen_size,
-                mac_address=settings.MAC_ADDRESS,
+                mac_address=self._mac_address,
+                metrics=LabeledMetricsRecorder(transport_metrics, {"device": self._name}),
             )
             self._client.add_connection_listener(ConnectionListener(
                 on_connected=self._on_connected,
@@ -41,6 +58,9 @@ class DeviceManager:
             ))
             if settings.AUTO_RECONNECT:
                 self._client.set_auto_reconnect(True)
+            if settings.COMMAND_COALESCING:
+                self._client.set_command_coalescing(True)
+                self._client.set_bulk_preemption(settings.PREEMPT_BULK_TRANSFERS)
         return self._client
 
     @property
@@ -55,6 +75,19 @@ class DeviceManager:
     def reconnecting(self) -> bool:
         return self._reconnecting
 
+    @property
+    def queued_jobs(self) -> int:
+        """Number of uploads and other exclusive sends waiting for the send lock."""
+        return self._queued_jobs
+
+    @property
+    def job_wait_stats(self) -> WaitStats:
+        return self._job_wait_stats
+
+    @property
+    def command_queue(self) -> CommandQueue | None:
+        return self._client._connection_manager.command_queue if self._client is not None else None
+
     @property
     def screen_size(self) -> int:
         return self._screen_size
@@ -62,9 +95,13 @@ class DeviceManager:
     @property
     def mac_address(self) -> str | None:
         if self._client is None:
-            return settings.MAC_ADDRESS
+            return self._mac_address
         return self._client.mac_address
 
+    @property
+    def _name(self) -> str:
+        return self.mac_address or "(auto-discover)"
+
     @property
     def auto_connect(self) -> bool:
         return self._auto_connect
@@ -90,20 +127,20 @@ class DeviceManager:
         retry_delay = 5
         while self._auto_connect and not self._connected:
             try:
-                logger.info("Auto-connect: attempting to connect...")
+                logger.info("Auto-connect %s: attempting to connect...", self._name)
                 await self.connect()
                 if self._connected:
-                    logger.info("Auto-connect: connected successfully")
+                    logger.info("Auto-connect %s: connected successfully", self._name)
                     return
             except Exception as e:
-                logger.warning("Auto-connect: failed (%s), retrying in %ds", e, retry_delay)
+                logger.warning("Auto-connect %s: failed (%s), retrying in %ds", self._name, e, retry_delay)
             await asyncio.sleep(retry_delay)
 
     async def _on_connected(self) -> None:
         self._connected = True
         self._reconnecting = False
         self._has_ever_connected = True
-        logger.info("Device connected")
+        logger.info("Device %s connected", self._name)
 
     async def _on_disconnected(self) -> None:
         was_connected = self._connected
@@ -111,14 +148,14 @@ class DeviceManager:
 
         if was_connected and settings.AUTO_RECONNECT and self._has_ever_connected:
             self._reconnecting = True
-            logger.info("Device disconnected — auto-reconnect active, will retry")
+            logger.info("Device %s disconnected — auto-reconnect active, will retry", self._name)
         elif was_connected and self._auto_connect:
             self._reconnecting = True
-            logger.info("Device disconnected — auto-connect will retry")
+            logger.info("Device %s disconnected — auto-connect will retry", self._name)
             self.start_auto_connect()
         else:
             self._reconnecting = False
-            logger.info("Device disconnected")
+            logger.info("Device %s disconnected", self._name)
 
     async def scan(self) -> list[str]:
         return await ConnectionManager.discover_devices()
@@ -132,6 +169,7 @@ class DeviceManager:
                 client.screen_size = SCREEN_SIZE_MAP[screen_size]
 
             if mac_address:
+                self._mac_address = mac_address
                 client.mac_address = mac_address
                 client._connection_manager.set_address(mac_address)
 
@@ -149,13 +187,56 @@ class DeviceManager:
             if self._client:
                 await self._client.disconnect()
 
+    @asynccontextmanager
+    async def _exclusive_send(self) -> AsyncIterator[None]:
+        """Hold the send lock for a job of one or more commands, e.g. an upload, recording its wait time."""
+        enqueued_at = time.perf_counter()
+        self._queued_jobs += 1
+        try:
+            await self._send_lock.acquire()
+        finally:
+            self._queued_jobs -= 1
+        self._job_wait_stats.record(time.perf_counter() - enqueued_at)
+        try:
+            yield
+        finally:
+            self._send_lock.release()
+
     async def send_bytes(self, data: bytes, with_response: bool = False) -> None:
-        async with self._send_lock:
-            await self.client._connection_manager.send_bytes(data, response=with_response)
+        connection_manager = self.client._connection_manager
+        command_queue = connection_manager.command_queue
+        if command_queue is not None and command_queue.get_coalescing_key(data) is not None:
+            # state changes (brightness, color, ...) don't wait for the send lock, so bursts of them
+            # are coalesced by the command queue while another send is in progress. Control commands
+            # (brightness, screen on/off, ...) are even sent between the packets of a running upload.
+            await connection_manager.send_bytes(data, response=with_response)
+            return
+        async with self._exclusive_send():
+            await connection_manager.send_bytes(data, response=with_response)
 
     async def send_packets(self, packets: list[list[bytes]], with_response: bool = False) -> None:
-        async with self._send_lock:
+        async with self._exclusive_send():
             await self.client._connection_manager.send_packets(packets, response=with_response)
 
+    async def upload_image_packets(self, packets: list[list[bytes]], switch_mode: bool = True) -> None:
+        """Switch the device to DIY mode and send pre-built DIY image packets.
+
+        Streams of frames only need to switch the mode before their first frame (switch_mode=False after).
+        The mode switch and the image are sent as one transaction, waiting only until the device is ready.
+        """
+        async with self._exclusive_send():
+            if not switch_mode:
+                await self.client.image.upload_image_packets(packets)
+                return
+            transaction = (
+                Transaction()
+                .add_command(commands.IMAGE_MODE.encode(1), wait=WAIT_PACED, gap=DIY_MODE_SWITCH_SECONDS)
+                .add_packets(packets)
+            )
+            timings = await self.client.run_transaction(transaction)
+            logger.debug("Image upload %s: %s", self._name, ", ".join(str(timing) for timing in timings))
 
-device_manager = DeviceManager()
+    async def upload_gif_packets(self, packets: list[list[bytes]], job: TransferJob | None = None) -> None:
+        """Send pre-built GIF packets, reporting the progress to the job if given."""
+        async with self._exclusive_send():
+            await self.client.gif.upload_gif_packets(packets, job=job)
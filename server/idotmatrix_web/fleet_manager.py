@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException
+
+from .config import settings
+from .device_manager import DeviceManager
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(mac_address: str | None) -> str | None:
+    return mac_address.upper() if mac_address else None
+
+
+class FleetManager:
+    """Pool of devices driven by this server, each with its own connection and send lock.
+
+    The first device is the default device, which is used by requests that don't select any
+    devices. Without configured MAC addresses it is a single device that is auto-discovered.
+    """
+
+    def __init__(self) -> None:
+        self._devices: list[DeviceManager] = [
+            DeviceManager(mac_address=mac_address) for mac_address in settings.mac_addresses
+        ] or [DeviceManager()]
+
+    @property
+    def devices(self) -> list[DeviceManager]:
+        return list(self._devices)
+
+    @property
+    def default(self) -> DeviceManager:
+        return self._devices[0]
+
+    def get(self, mac_address: str) -> DeviceManager | None:
+        mac_address = _normalize(mac_address)
+        for device in self._devices:
+            if _normalize(device.mac_address) == mac_address:
+                return device
+        return None
+
+    def add_device(self, mac_address: str, screen_size: int | None = None) -> DeviceManager:
+        device = self.get(mac_address)
+        if device is not None:
+            return device
+        device = DeviceManager(mac_address=_normalize(mac_address), screen_size=screen_size)
+        self._devices.append(device)
+        device.start_auto_connect()
+        logger.info("Added device %s to the fleet", device.mac_address)
+        return device
+
+    async def remove_device(self, mac_address: str) -> None:
+        device = self._require(mac_address)
+        if len(self._devices) == 1:
+            raise HTTPException(status_code=400, detail="Cannot remove the last device")
+        await device.disconnect()
+        device.set_auto_connect(False)
+        self._devices.remove(device)
+        logger.info("Removed device %s from the fleet", device.mac_address)
+
+    def select(self, mac_addresses: list[str] | None = None, all_devices: bool = False) -> list[DeviceManager]:
+        """Resolve the devices a request is addressed to.
+
+        Args:
+            mac_addresses: MAC addresses of the selected devices. None selects the default device.
+            all_devices: Select all devices of the fleet, ignoring mac_addresses.
+        """
+        if all_devices:
+            return self.devices
+        if not mac_addresses:
+            return [self.default]
+        return list(dict.fromkeys(self._require(mac_address) for mac_address in mac_addresses))
+
+    def _require(self, mac_address: str) -> DeviceManager:
+        device = self.get(mac_address)
+        if device is None:
+            raise HTTPException(status_code=404, detail=f"Unknown device {mac_address}")
+        return device
+
+    def start_auto_connect(self) -> None:
+        for device in self._devices:
+            device.start_auto_connect()
+
+    async def connect_all(self) -> None:
+        """Connect all devices concurrently. Failures are logged, see the device status."""
+        results = await asyncio.gather(
+            *(device.connect() for device in self._devices if not device.connected),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning("Failed to connect device: %s", result)
+
+    async def disconnect_all(self) -> None:
+        await asyncio.gather(
+            *(device.disconnect() for device in self._devices if device.connected),
+            return_exceptions=True,
+        )
+
+    async def broadcast(
+        self,
+        devices: list[DeviceManager],
+        send: Callable[[DeviceManager], Awaitable[None]],
+    ) -> None:
+        """Run send for all given devices in parallel.
+
+        Each device only waits for its own send lock, so a slow device doesn't delay the others.
+        Raises an HTTPException naming the failed devices if sending failed for any of them.
+        """
+        if len(devices) == 1:
+            await send(devices[0])
+            return
+
+        results = await asyncio.gather(*(send(device) for device in devices), return_exceptions=True)
+        failures = [
+            f"{device.mac_address}: {result}"
+            for device, result in zip(devices, results)
+            if isinstance(result, BaseException)
+        ]
+        if failures:
+            logger.warning("Broadcast failed on %d of %d devices: %s", len(failures), len(devices), failures)
+            raise HTTPException(
+                status_code=502,
+                detail=f"Failed on {len(failures)} of {len(devices)} devices: " + "; ".join(failures),
+            )
+
+
+fleet_manager = FleetManager()
@@ -0,0 +1,179 @@
+"""Pillow based image and GIF processing for uploads.
+
+These functions are executed in worker processes (see processing.py), so they must
+only depend on their arguments and stay importable without the rest of the server.
+"""
+import io
+import logging
+
+from PIL import Image as PILImage, ImageOps
+
+from idotmatrix.util.frame_planner import plan_frames, read_frame_durations
+from idotmatrix.util.gif_encoder import encode_gif_with_global_palette
+from idotmatrix.util.image_utils import ResizeMode
+
+logger = logging.getLogger(__name__)
+
+
+def _crop_and_resize_image(
+    img: PILImage.Image,
+    canvas_size: int,
+    resize_mode: ResizeMode,
+    crop_x: float,
+    crop_y: float,
+) -> PILImage.Image:
+    """Resize and crop an image to canvas_size x canvas_size.
+
+    For FILL mode with custom crop offsets: scale along the shorter side
+    to canvas_size, then crop a canvas_size square at the given offset
+    (0.0 = top/left, 0.5 = center, 1.0 = bottom/right).
+    """
+    img = ImageOps.exif_transpose(img)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+
+    if resize_mode == ResizeMode.FILL:
+        ratio = max(canvas_size / img.width, canvas_size / img.height)
+        new_w = int(img.width * ratio)
+        new_h = int(img.height * ratio)
+        img = img.resize((new_w, new_h), PILImage.Resampling.LANCZOS)
+
+        max_x = new_w - canvas_size
+        max_y = new_h - canvas_size
+        left = int(max_x * crop_x)
+        top = int(max_y * crop_y)
+        img = img.crop((left, top, left + canvas_size, top + canvas_size))
+    elif resize_mode == ResizeMode.STRETCH:
+        img = img.resize((canvas_size, canvas_size), PILImage.Resampling.LANCZOS)
+    else:  # FIT
+        ratio = min(canvas_size / img.width, canvas_size / img.height)
+        new_w = int(img.width * ratio)
+        new_h = int(img.height * ratio)
+        img = img.resize((new_w, new_h), PILImage.Resampling.LANCZOS)
+        bg = PILImage.new("RGB", (canvas_size, canvas_size), (0, 0, 0))
+        bg.paste(img, ((canvas_size - new_w) // 2, (canvas_size - new_h) // 2))
+        img = bg
+
+    return img
+
+
+def process_image(
+    contents: bytes,
+    canvas_size: int,
+    resize_mode: ResizeMode,
+    crop_x: float,
+    crop_y: float,
+) -> bytearray:
+    """Load an image, resize/crop it to the canvas and return its raw RGB pixel data."""
+    with PILImage.open(io.BytesIO(contents)) as img:
+        logger.info("Image upload: original %dx%d, resizing to %dx%d (mode=%s, crop=%.2f,%.2f)",
+                     img.width, img.height, canvas_size, canvas_size, resize_mode.value, crop_x, crop_y)
+        img = _crop_and_resize_image(img, canvas_size, resize_mode, crop_x, crop_y)
+        return bytearray(img.tobytes())
+
+
+def process_gif(
+    contents: bytes,
+    canvas_size: int,
+    resize_mode: ResizeMode,
+    crop_x: float,
+    crop_y: float,
+    global_palette: bool = False,
+) -> bytes:
+    """Load a GIF, resize/crop each frame, re-encode as GIF bytes.
+
+    With global_palette, all frames share one palette and are encoded as delta frames, which is
+    faster and smaller than palettizing every frame on its own.
+    """
+    from PIL import GifImagePlugin
+    GifImagePlugin.LOADING_STRATEGY = GifImagePlugin.LoadingStrategy.RGB_AFTER_DIFFERENT_PALETTE_ONLY
+
+    # Choose the frames to keep by their durations up front (max. 64 frames and 2 seconds, device
+    # constraints), so only those are resized and palettized
+    plan = plan_frames(read_frame_durations(contents))
+
+    with PILImage.open(io.BytesIO(contents)) as img:
+        logger.info("GIF upload: original %dx%d, %d frames, keeping %d",
+                     img.width, img.height, plan.source_frame_count, len(plan.indices))
+
+        processed = []
+        durations = []
+        for index, duration in zip(plan.indices, plan.durations):
+            try:
+                img.seek(index)
+            except EOFError:
+                break
+            frame = img.copy()
+            if frame.mode not in ("RGB", "RGBA"):
+                frame = frame.convert("RGBA")
+            frame = _crop_and_resize_frame(frame, canvas_size, resize_mode, crop_x, crop_y)
+            if global_palette and frame.mode == "RGBA":
+                # The shared palette is built from the RGB data, so transparent pixels must show the background
+                frame = _flatten_frame(frame)
+            if not global_palette:
+                # Palettize to 256 colors — critical for keeping GIF size small
+                frame = frame.convert("P", palette=PILImage.Palette.ADAPTIVE, colors=256)
+            processed.append(frame)
+            durations.append(duration)
+
+        logger.info("GIF: %d frames at %dx%d, re-encoding...", len(processed), canvas_size, canvas_size)
+
+        if global_palette:
+            gif_bytes = encode_gif_with_global_palette(processed, durations)
+            logger.info("GIF encoded with global palette: %d bytes (%.1f KB)", len(gif_bytes), len(gif_bytes) / 1024)
+            return gif_bytes
+
+        # Re-encode as GIF
+        buf = io.BytesIO()
+        processed[0].save(
+            buf,
+            format="GIF",
+            save_all=True,
+            optimize=True,
+            append_images=processed[1:],
+            loop=0,
+            duration=durations,
+            disposal=2,
+        )
+        buf.seek(0)
+        gif_bytes = buf.getvalue()
+        logger.info("GIF encoded: %d bytes (%.1f KB)", len(gif_bytes), len(gif_bytes) / 1024)
+        return gif_bytes
+
+
+def _crop_and_resize_frame(
+    img: PILImage.Image,
+    canvas_size: int,
+    resize_mode: ResizeMode,
+    crop_x: float,
+    crop_y: float,
+) -> PILImage.Image:
+    """Resize/crop a single GIF frame. Uses NEAREST for pixel-art quality."""
+    if resize_mode == ResizeMode.FILL:
+        ratio = max(canvas_size / img.width, canvas_size / img.height)
+        new_w = int(img.width * ratio)
+        new_h = int(img.height * ratio)
+        img = img.resize((new_w, new_h), PILImage.Resampling.NEAREST)
+        max_x = new_w - canvas_size
+        max_y = new_h - canvas_size
+        left = int(max_x * crop_x)
+        top = int(max_y * crop_y)
+        img = img.crop((left, top, left + canvas_size, top + canvas_size))
+    elif resize_mode == ResizeMode.STRETCH:
+        img = img.resize((canvas_size, canvas_size), PILImage.Resampling.NEAREST)
+    else:  # FIT
+        ratio = min(canvas_size / img.width, canvas_size / img.height)
+        new_w = int(img.width * ratio)
+        new_h = int(img.height * ratio)
+        img = img.resize((new_w, new_h), PILImage.Resampling.NEAREST)
+        bg = PILImage.new("RGBA", (canvas_size, canvas_size), (0, 0, 0, 255))
+        bg.paste(img, ((canvas_size - new_w) // 2, (canvas_size - new_h) // 2))
+        img = bg
+
+    return img
+
+
+def _flatten_frame(img: PILImage.Image) -> PILImage.Image:
+    """Composite an RGBA frame onto an opaque black background, like GifModule does for transparent pixels."""
+    bg = PILImage.new("RGBA", img.size, (0, 0, 0, 255))
+    return PILImage.alpha_composite(bg, img).convert("RGB")
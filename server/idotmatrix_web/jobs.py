@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable
+
+from idotmatrix.transfer_job import TransferJob, TransferCancelledError
+
+from .device_manager import DeviceManager
+
+logger = logging.getLogger(__name__)
+
+# number of finished jobs that are kept for status requests
+MAX_FINISHED_JOBS = 50
+
+
+class JobEntry:
+    """A transfer job together with the device and the kind of upload it belongs to."""
+
+    def __init__(self, job: TransferJob, device: str, kind: str) -> None:
+        self.job = job
+        self.device = device
+        self.kind = kind
+
+
+class JobRegistry:
+    """Keeps track of the bulk transfers (uploads) of all devices.
+
+    Every upload to a device is a TransferJob with an ID, which can be used to follow its progress
+    (see subscribe) and to cancel it.
+    """
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[str, JobEntry] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def entries(self) -> list[JobEntry]:
+        return list(self._entries.values())
+
+    def get(self, job_id: str) -> JobEntry | None:
+        return self._entries.get(job_id)
+
+    def create(self, device: DeviceManager, kind: str) -> TransferJob:
+        job = TransferJob()
+        self._entries[job.id] = JobEntry(job, device.mac_address or "(auto-discover)", kind)
+        self._evict_finished()
+        return job
+
+    def _evict_finished(self) -> None:
+        finished = [job_id for job_id, entry in self._entries.items() if entry.job.is_finished]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._entries[job_id]
+
+    async def run(self, job: TransferJob, upload: Callable[[], Awaitable[object]]) -> None:
+        """Run an upload of a job. Cancelling the job is not an error, it is only logged."""
+        try:
+            await upload()
+        except TransferCancelledError:
+            logger.info("Transfer job %s cancelled after %d of %d packets", job.id, job.packets_sent, job.packet_count)
+
+    def run_in_background(self, coroutine: Awaitable[object]) -> None:
+        """Run an upload without waiting for it, e.g. so the request returns the job IDs right away."""
+
+        async def run() -> None:
+            try:
+                await coroutine
+            except Exception as e:
+                logger.warning("Background upload failed: %s", e)
+
+        task = asyncio.create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def subscribe(self, job: TransferJob) -> AsyncIterator[TransferJob]:
+        """Yield the job whenever its progress or state changes, until it is finished."""
+        updates: asyncio.Queue[None] = asyncio.Queue()
+
+        def on_update(_: TransferJob) -> None:
+            updates.put_nowait(None)
+
+        job.add_listener(on_update)
+        try:
+            yield job
+            while not job.is_finished:
+                await updates.get()
+                # several updates may have piled up, only the latest state is of interest
+                while not updates.empty():
+                    updates.get_nowait()
+                yield job
+        finally:
+            job.remove_listener(on_update)
+
+
+job_registry = JobRegistry()
@@ -8,8 +8,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from .config import settings
-from .device_manager import device_manager
-from .routes import device, giphy, send, upload
+from .fleet_manager import fleet_manager
+from .processing import processing_pool
+from .routes import device, giphy, jobs, metrics, send, stream, upload
 
 
 @asynccontextmanager
@@ -18,12 +19,12 @@ async def lifespan(app: FastAPI):
     logging.getLogger(__name__).info(
         "iDotMatrix Web Server starting on %s:%d", settings.HOST, settings.PORT
     )
-    # Start auto-connect background loop if enabled
-    device_manager.start_auto_connect()
+    # Start auto-connect background loops if enabled
+    fleet_manager.start_auto_connect()
     yield
     # Disconnect on shutdown
-    if device_manager.connected:
-        await device_manager.disconnect()
+    await fleet_manager.disconnect_all()
+    processing_pool.shutdown()
 
 
 app = FastAPI(title="iDotMatrix Web Server", lifespan=lifespan)
@@ -39,6 +40,9 @@ app.include_router(device.router)
 app.include_router(send.router)
 app.include_router(upload.router)
 app.include_router(giphy.router)
+app.include_router(metrics.router)
+app.include_router(jobs.router)
+app.include_router(stream.router)
 
 # Mount static files last so API routes take priority
 dist_path = Path(settings.WEB_DIST_PATH)
@@ -0,0 +1,29 @@
+from typing import TYPE_CHECKING
+
+from idotmatrix.metrics import InMemoryMetrics
+
+from .processing import ProcessingPool
+
+if TYPE_CHECKING:
+    # device_manager records into transport_metrics
+    from .device_manager import DeviceManager
+
+# Transport metrics of all devices, every sample is labelled with the MAC address of its device
+transport_metrics = InMemoryMetrics()
+
+
+def render_metrics(devices: list["DeviceManager"], pool: ProcessingPool) -> str:
+    """Render the transport metrics, device states and processing pool in the Prometheus text format."""
+    lines = [transport_metrics.to_prometheus().rstrip("\n")]
+
+    lines.append("# TYPE idotmatrix_device_connected gauge")
+    for device in devices:
+        lines.append(f'idotmatrix_device_connected{{device="{device.mac_address or ""}"}} {int(device.connected)}')
+
+    for name, value in (("active", pool.active), ("queued", pool.queued)):
+        lines.append(f"# TYPE idotmatrix_processing_{name} gauge")
+        lines.append(f"idotmatrix_processing_{name} {value}")
+    for name, value in (("completed", pool.completed), ("failed", pool.failed), ("rejected", pool.rejected)):
+        lines.append(f"# TYPE idotmatrix_processing_{name}_total counter")
+        lines.append(f"idotmatrix_processing_{name}_total {value}")
+    return "\n".join(line for line in lines if line) + "\n"
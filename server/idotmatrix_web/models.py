@@ -6,14 +6,35 @@ class ConnectRequest(BaseModel):
     screenSize: int | None = None
 
 
+class AddDeviceRequest(BaseModel):
+    macAddress: str
+    screenSize: int | None = None
+
+
 class SendRequest(BaseModel):
     data: str  # base64-encoded bytes
     withResponse: bool = False
+    devices: list[str] | None = None  # MAC addresses, default device if empty
+    allDevices: bool = False
 
 
 class SendPacketsRequest(BaseModel):
     packets: list[list[str]]  # outer: packets, inner: base64-encoded BLE chunks
     withResponse: bool = False
+    devices: list[str] | None = None  # MAC addresses, default device if empty
+    allDevices: bool = False
+
+
+class QueueStatus(BaseModel):
+    queuedJobs: int  # uploads and other exclusive sends waiting for the device
+    averageJobWaitMs: float
+    maxJobWaitMs: float
+    pendingControlCommands: int = 0
+    pendingCommands: int = 0
+    averageControlWaitMs: float = 0.0
+    maxControlWaitMs: float = 0.0
+    preemptedCommands: int = 0  # control commands sent during an upload
+    coalescedCommands: int = 0
 
 
 class DeviceStatus(BaseModel):
@@ -22,7 +43,41 @@ class DeviceStatus(BaseModel):
     autoConnect: bool = True
     macAddress: str | None = None
     screenSize: int
+    queue: QueueStatus | None = None
 
 
 class ScanResult(BaseModel):
     devices: list[str]
+
+
+class ProcessingStatus(BaseModel):
+    workers: int
+    maxConcurrent: int
+    maxQueued: int
+    active: int
+    queued: int
+    completed: int
+    failed: int
+    rejected: int
+    averageWaitMs: float
+    averageRunMs: float
+
+
+class TransferJobStatus(BaseModel):
+    id: str
+    device: str
+    kind: str  # e.g. "gif"
+    state: str  # pending, running, completed, cancelled or failed
+    bytesSent: int
+    totalBytes: int
+    chunksSent: int  # 4K protocol packets
+    totalChunks: int
+    retries: int
+    elapsedSeconds: float
+    etaSeconds: float | None = None
+    error: str | None = None
+
+
+class UploadResult(BaseModel):
+    ok: bool
+    jobs: list[TransferJobStatus] = []
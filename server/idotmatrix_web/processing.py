@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from fastapi import HTTPException
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ProcessingPool:
+    """Runs CPU-bound image/GIF processing in a bounded pool of worker processes.
+
+    At most `max_concurrent` jobs are handed to the workers at once; further jobs wait
+    in a queue of at most `max_queued` entries, beyond which requests are rejected.
+    """
+
+    def __init__(self, workers: int | None, max_concurrent: int, max_queued: int) -> None:
+        self._workers = workers or os.cpu_count() or 1
+        self._max_concurrent = max_concurrent
+        self._max_queued = max_queued
+        self._executor: ProcessPoolExecutor | None = None
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._total_wait_seconds = 0.0
+        self._total_run_seconds = 0.0
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @property
+    def max_concurrent(self) -> int:
+        return self._max_concurrent
+
+    @property
+    def max_queued(self) -> int:
+        return self._max_queued
+
+    @property
+    def average_wait_ms(self) -> float:
+        finished = self.completed + self.failed
+        return self._total_wait_seconds * 1000 / finished if finished else 0.0
+
+    @property
+    def average_run_ms(self) -> float:
+        finished = self.completed + self.failed
+        return self._total_run_seconds * 1000 / finished if finished else 0.0
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn instead of fork: the server process runs BLE/D-Bus threads that must not be forked
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info("Started processing pool with %d worker(s)", self._workers)
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run `fn(*args)` in a worker process. `fn` and its arguments must be picklable."""
+        if self.queued >= self._max_queued:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Too many uploads are being processed, try again later")
+
+        enqueued_at = time.perf_counter()
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        started_at = time.perf_counter()
+        self._total_wait_seconds += started_at - enqueued_at
+        self.active += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._ensure_executor(), fn, *args)
+            self.completed += 1
+            return result
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.active -= 1
+            self._total_run_seconds += time.perf_counter() - started_at
+            self._semaphore.release()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+processing_pool = ProcessingPool(
+    workers=settings.PROCESSING_WORKERS,
+    max_concurrent=settings.PROCESSING_MAX_CONCURRENT,
+    max_queued=settings.PROCESSING_MAX_QUEUED,
+)
@@ -1,19 +1,41 @@
 from pydantic import BaseModel
 from fastapi import APIRouter
+from idotmatrix.command_queue import PRIORITY_CONTROL
 
-from ..device_manager import device_manager
-from ..models import ConnectRequest, DeviceStatus, ScanResult
+from ..device_manager import DeviceManager
+from ..fleet_manager import fleet_manager
+from ..models import AddDeviceRequest, ConnectRequest, DeviceStatus, QueueStatus, ScanResult
 
 router = APIRouter(prefix="/api")
 
 
-def _device_status() -> DeviceStatus:
+def _queue_status(device_manager: DeviceManager) -> QueueStatus:
+    status = QueueStatus(
+        queuedJobs=device_manager.queued_jobs,
+        averageJobWaitMs=device_manager.job_wait_stats.average_seconds * 1000,
+        maxJobWaitMs=device_manager.job_wait_stats.max_seconds * 1000,
+    )
+    command_queue = device_manager.command_queue
+    if command_queue is not None:
+        control_wait_stats = command_queue.wait_stats[PRIORITY_CONTROL]
+        status.pendingControlCommands = command_queue.get_pending_count(PRIORITY_CONTROL)
+        status.pendingCommands = command_queue.pending_count - status.pendingControlCommands
+        status.averageControlWaitMs = control_wait_stats.average_seconds * 1000
+        status.maxControlWaitMs = control_wait_stats.max_seconds * 1000
+        status.preemptedCommands = command_queue.preempted_count
+        status.coalescedCommands = command_queue.coalesced_count
+    return status
+
+
+def _device_status(device_manager: DeviceManager | None = None) -> DeviceStatus:
+    device_manager = device_manager or fleet_manager.default
     return DeviceStatus(
         connected=device_manager.connected,
         reconnecting=device_manager.reconnecting,
         autoConnect=device_manager.auto_connect,
         macAddress=device_manager.mac_address,
         screenSize=device_manager.screen_size,
+        queue=_queue_status(device_manager),
     )
 
 
@@ -29,7 +51,7 @@ async def status() -> DeviceStatus:
 
 @router.post("/device/scan")
 async def scan() -> ScanResult:
-    devices = await device_manager.scan()
+    devices = await fleet_manager.default.scan()
     return ScanResult(devices=devices)
 
 
@@ -37,13 +59,13 @@ async def scan() -> ScanResult:
 async def connect(req: ConnectRequest | None = None) -> DeviceStatus:
     mac = req.macAddress if req else None
     size = req.screenSize if req else None
-    await device_manager.connect(mac_address=mac, screen_size=size)
+    await fleet_manager.default.connect(mac_address=mac, screen_size=size)
     return _device_status()
 
 
 @router.post("/device/disconnect")
 async def disconnect() -> DeviceStatus:
-    await device_manager.disconnect()
+    await fleet_manager.default.disconnect()
     return _device_status()
 
 
@@ -53,5 +75,33 @@ class AutoConnectRequest(BaseModel):
 
 @router.post("/device/auto-connect")
 async def set_auto_connect(req: AutoConnectRequest) -> DeviceStatus:
-    device_manager.set_auto_connect(req.enabled)
+    fleet_manager.default.set_auto_connect(req.enabled)
     return _device_status()
+
+
+@router.get("/devices")
+async def list_devices() -> list[DeviceStatus]:
+    return [_device_status(device) for device in fleet_manager.devices]
+
+
+@router.post("/devices")
+async def add_device(req: AddDeviceRequest) -> DeviceStatus:
+    return _device_status(fleet_manager.add_device(req.macAddress, req.screenSize))
+
+
+@router.delete("/devices/{mac_address}")
+async def remove_device(mac_address: str) -> list[DeviceStatus]:
+    await fleet_manager.remove_device(mac_address)
+    return await list_devices()
+
+
+@router.post("/devices/connect")
+async def connect_all() -> list[DeviceStatus]:
+    await fleet_manager.connect_all()
+    return await list_devices()
+
+
+@router.post("/devices/disconnect")
+async def disconnect_all() -> list[DeviceStatus]:
+    await fleet_manager.disconnect_all()
+    return await list_devices()
@@ -5,8 +5,8 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from ..config import settings
-from ..device_manager import device_manager
-from .upload import RESIZE_MODE_MAP, process_gif, send_gif_to_device
+from ..fleet_manager import fleet_manager
+from .upload import RESIZE_MODE_MAP, send_gif_to_devices
 
 from idotmatrix.util.image_utils import ResizeMode
 
@@ -39,6 +39,8 @@ class GiphySendRequest(BaseModel):
     resize_mode: str = "fill"
     crop_x: float = 0.5
     crop_y: float = 0.5
+    devices: list[str] | None = None
+    all_devices: bool = False
 
 
 class GiphySendUrlRequest(BaseModel):
@@ -46,6 +48,8 @@ class GiphySendUrlRequest(BaseModel):
     resize_mode: str = "fill"
     crop_x: float = 0.5
     crop_y: float = 0.5
+    devices: list[str] | None = None
+    all_devices: bool = False
 
 
 async def _search_giphy(api_key: str, query: str, limit: int = 24) -> list[dict]:
@@ -83,12 +87,14 @@ def _parse_giphy_results(data: list[dict]) -> list[GiphySearchResult]:
     return results
 
 
-async def _process_and_send(gif_bytes: bytes, resize_mode: str, crop_x: float, crop_y: float) -> None:
-    mode = RESIZE_MODE_MAP.get(resize_mode, ResizeMode.FILL)
-    canvas_size = device_manager.screen_size
-    gif_data = process_gif(gif_bytes, canvas_size, mode, crop_x, crop_y)
-    logger.info("Giphy GIF processed: %d bytes, sending to device...", len(gif_data))
-    await send_gif_to_device(gif_data)
+async def _process_and_send(
+    gif_bytes: bytes,
+    req: GiphySendRequest | GiphySendUrlRequest,
+) -> None:
+    mode = RESIZE_MODE_MAP.get(req.resize_mode, ResizeMode.FILL)
+    devices = fleet_manager.select(req.devices, req.all_devices)
+    logger.info("Giphy GIF downloaded: %d bytes", len(gif_bytes))
+    await send_gif_to_devices(devices, gif_bytes, mode, req.crop_x, req.crop_y)
 
 
 @router.get("/search")
@@ -108,7 +114,7 @@ async def send(req: GiphySendRequest) -> dict:
     if not original_url:
         raise HTTPException(status_code=404, detail="No downloadable GIF found")
     gif_bytes = await _download_gif(original_url)
-    await _process_and_send(gif_bytes, req.resize_mode, req.crop_x, req.crop_y)
+    await _process_and_send(gif_bytes, req)
     return {"ok": True}
 
 
@@ -116,5 +122,5 @@ async def send(req: GiphySendRequest) -> dict:
 async def send_url(req: GiphySendUrlRequest) -> dict:
     _require_api_key()
     gif_bytes = await _download_gif(req.url)
-    await _process_and_send(gif_bytes, req.resize_mode, req.crop_x, req.crop_y)
+    await _process_and_send(gif_bytes, req)
     return {"ok": True}
@@ -0,0 +1,67 @@
+from typing import AsyncIterator
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from ..jobs import JobEntry, job_registry
+from ..models import TransferJobStatus
+
+router = APIRouter(prefix="/api")
+
+
+def job_status(entry: JobEntry) -> TransferJobStatus:
+    job = entry.job
+    return TransferJobStatus(
+        id=job.id,
+        device=entry.device,
+        kind=entry.kind,
+        state=job.state,
+        bytesSent=job.bytes_sent,
+        totalBytes=job.byte_count,
+        chunksSent=job.packets_sent,
+        totalChunks=job.packet_count,
+        retries=job.retry_count,
+        elapsedSeconds=job.elapsed_seconds,
+        etaSeconds=job.eta_seconds,
+        error=job.error,
+    )
+
+
+def _require(job_id: str) -> JobEntry:
+    entry = job_registry.get(job_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return entry
+
+
+@router.get("/jobs")
+async def list_jobs() -> list[TransferJobStatus]:
+    return [job_status(entry) for entry in job_registry.entries]
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> TransferJobStatus:
+    return job_status(_require(job_id))
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str) -> TransferJobStatus:
+    entry = _require(job_id)
+    entry.job.cancel()
+    return job_status(entry)
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str) -> StreamingResponse:
+    """Server-Sent Events with the status of the job after every packet, until the job is finished."""
+    entry = _require(job_id)
+
+    async def events() -> AsyncIterator[str]:
+        async for _ in job_registry.subscribe(entry.job):
+            yield f"event: progress\ndata: {job_status(entry).model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
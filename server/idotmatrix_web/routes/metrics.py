@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..fleet_manager import fleet_manager
+from ..metrics import render_metrics
+from ..processing import processing_pool
+
+router = APIRouter(prefix="/api")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        render_metrics(fleet_manager.devices, processing_pool),
+        media_type=PROMETHEUS_CONTENT_TYPE,
+    )
@@ -2,7 +2,7 @@ import base64
 
 from fastapi import APIRouter
 
-from ..device_manager import device_manager
+from ..fleet_manager import fleet_manager
 from ..models import SendRequest, SendPacketsRequest
 
 router = APIRouter(prefix="/api")
@@ -11,7 +11,8 @@ router = APIRouter(prefix="/api")
 @router.post("/send")
 async def send(req: SendRequest) -> dict:
     data = base64.b64decode(req.data)
-    await device_manager.send_bytes(data, with_response=req.withResponse)
+    devices = fleet_manager.select(req.devices, req.allDevices)
+    await fleet_manager.broadcast(devices, lambda device: device.send_bytes(data, with_response=req.withResponse))
     return {"ok": True}
 
 
@@ -21,5 +22,6 @@ async def send_packets(req: SendPacketsRequest) -> dict:
         [base64.b64decode(chunk) for chunk in packet]
         for packet in req.packets
     ]
-    await device_manager.send_packets(packets, with_response=req.withResponse)
+    devices = fleet_manager.select(req.devices, req.allDevices)
+    await fleet_manager.broadcast(devices, lambda device: device.send_packets(packets, with_response=req.withResponse))
     return {"ok": True}
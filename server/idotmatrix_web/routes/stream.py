@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException, WebSocket, status
+
+from ..fleet_manager import fleet_manager
+from ..streaming import DEFAULT_STREAM_WINDOW, StreamSession
+from .upload import parse_device_list
+
+router = APIRouter(prefix="/api")
+
+
+@router.websocket("/stream")
+async def stream(
+    websocket: WebSocket,
+    devices: str | None = None,
+    allDevices: bool = False,
+    withResponse: bool = False,
+    window: int = DEFAULT_STREAM_WINDOW,
+) -> None:
+    """Binary stream of commands, packets and RGB frames to the selected devices, see API.md."""
+    await websocket.accept()
+    try:
+        targets = fleet_manager.select(parse_device_list(devices), allDevices)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+    await StreamSession(websocket, targets, with_response=withResponse, window=window).run()
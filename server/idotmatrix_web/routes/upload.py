@@ -1,13 +1,19 @@
 import asyncio
-import io
 import logging
+from typing import Awaitable, Callable
 
 from fastapi import APIRouter, UploadFile, Form
-from PIL import Image as PILImage, ImageOps
 
 from idotmatrix.util.image_utils import ResizeMode
 
-from ..device_manager import device_manager
+from ..config import settings
+from ..device_manager import DeviceManager
+from ..fleet_manager import fleet_manager
+from ..imaging import process_gif, process_image
+from ..jobs import job_registry
+from ..models import ProcessingStatus, TransferJobStatus, UploadResult
+from ..processing import processing_pool
+from .jobs import job_status
 
 logger = logging.getLogger(__name__)
 
@@ -20,46 +26,28 @@ RESIZE_MODE_MAP = {
 }
 
 
-def _crop_and_resize_image(
-    img: PILImage.Image,
-    canvas_size: int,
-    resize_mode: ResizeMode,
-    crop_x: float,
-    crop_y: float,
-) -> PILImage.Image:
-    """Resize and crop an image to canvas_size x canvas_size.
+def parse_device_list(devices: str | None) -> list[str] | None:
+    """Parse a comma-separated list of MAC addresses from a form field."""
+    if not devices:
+        return None
+    return [d.strip() for d in devices.split(",") if d.strip()]
+
+
+def _group_by_screen_size(devices: list[DeviceManager]) -> dict[int, list[DeviceManager]]:
+    groups: dict[int, list[DeviceManager]] = {}
+    for device in devices:
+        groups.setdefault(device.screen_size, []).append(device)
+    return groups
 
-    For FILL mode with custom crop offsets: scale along the shorter side
-    to canvas_size, then crop a canvas_size square at the given offset
-    (0.0 = top/left, 0.5 = center, 1.0 = bottom/right).
-    """
-    img = ImageOps.exif_transpose(img)
-    if img.mode != "RGB":
-        img = img.convert("RGB")
-
-    if resize_mode == ResizeMode.FILL:
-        ratio = max(canvas_size / img.width, canvas_size / img.height)
-        new_w = int(img.width * ratio)
-        new_h = int(img.height * ratio)
-        img = img.resize((new_w, new_h), PILImage.Resampling.LANCZOS)
-
-        max_x = new_w - canvas_size
-        max_y = new_h - canvas_size
-        left = int(max_x * crop_x)
-        top = int(max_y * crop_y)
-        img = img.crop((left, top, left + canvas_size, top + canvas_size))
-    elif resize_mode == ResizeMode.STRETCH:
-        img = img.resize((canvas_size, canvas_size), PILImage.Resampling.LANCZOS)
-    else:  # FIT
-        ratio = min(canvas_size / img.width, canvas_size / img.height)
-        new_w = int(img.width * ratio)
-        new_h = int(img.height * ratio)
-        img = img.resize((new_w, new_h), PILImage.Resampling.LANCZOS)
-        bg = PILImage.new("RGB", (canvas_size, canvas_size), (0, 0, 0))
-        bg.paste(img, ((canvas_size - new_w) // 2, (canvas_size - new_h) // 2))
-        img = bg
-
-    return img
+
+async def _encode_per_screen_size(
+    devices: list[DeviceManager],
+    encode: Callable[[int, DeviceManager], Awaitable[list[list[bytes]]]],
+) -> dict[int, list[list[bytes]]]:
+    """Encode the payload once per distinct screen size, in parallel."""
+    groups = _group_by_screen_size(devices)
+    packets = await asyncio.gather(*(encode(size, members[0]) for size, members in groups.items()))
+    return dict(zip(groups.keys(), packets))
 
 
 @router.post("/upload/image")
@@ -68,24 +56,23 @@ async def upload_image(
     resize_mode: str = Form("fill"),
     crop_x: float = Form(0.5),
     crop_y: float = Form(0.5),
+    devices: str | None = Form(None),
+    all_devices: bool = Form(False),
 ) -> dict:
     contents = await file.read()
     mode = RESIZE_MODE_MAP.get(resize_mode, ResizeMode.FILL)
-    canvas_size = device_manager.screen_size
-
-    with PILImage.open(io.BytesIO(contents)) as img:
-        logger.info("Image upload: original %dx%d, resizing to %dx%d (mode=%s, crop=%.2f,%.2f)",
-                     img.width, img.height, canvas_size, canvas_size, resize_mode, crop_x, crop_y)
-        img = _crop_and_resize_image(img, canvas_size, mode, crop_x, crop_y)
-        pixel_data = bytearray(img.tobytes())
+    targets = fleet_manager.select(parse_device_list(devices), all_devices)
 
-    logger.info("Image data: %d bytes (%dx%d RGB), sending to device...",
-                len(pixel_data), canvas_size, canvas_size)
+    async def encode(canvas_size: int, device: DeviceManager) -> list[list[bytes]]:
+        pixel_data = await processing_pool.run(process_image, contents, canvas_size, mode, crop_x, crop_y)
+        logger.info("Image data: %d bytes (%dx%d RGB)", len(pixel_data), canvas_size, canvas_size)
+        return device.client.image.create_image_rgb_data_packets(pixel_data)
 
-    async with device_manager._send_lock:
-        await device_manager.client.image.set_mode(1)
-        await asyncio.sleep(0.3)
-        await device_manager.client.image._send_diy_image_data(pixel_data)
+    packets_by_size = await _encode_per_screen_size(targets, encode)
+    logger.info("Sending image to %d device(s)...", len(targets))
+    await fleet_manager.broadcast(
+        targets, lambda device: device.upload_image_packets(packets_by_size[device.screen_size])
+    )
 
     logger.info("Image upload complete")
     return {"ok": True}
@@ -97,130 +84,77 @@ async def upload_gif(
     resize_mode: str = Form("fill"),
     crop_x: float = Form(0.5),
     crop_y: float = Form(0.5),
-) -> dict:
+    devices: str | None = Form(None),
+    all_devices: bool = Form(False),
+    background: bool = Form(False),
+) -> UploadResult:
     contents = await file.read()
     mode = RESIZE_MODE_MAP.get(resize_mode, ResizeMode.FILL)
-    canvas_size = device_manager.screen_size
-
-    gif_data = process_gif(contents, canvas_size, mode, crop_x, crop_y)
-    logger.info("GIF processed: %d bytes, sending to device...", len(gif_data))
+    targets = fleet_manager.select(parse_device_list(devices), all_devices)
 
-    await send_gif_to_device(gif_data)
+    jobs = await send_gif_to_devices(targets, contents, mode, crop_x, crop_y, background=background)
 
-    logger.info("GIF upload complete")
-    return {"ok": True}
-
-
-async def send_gif_to_device(gif_data: bytes) -> None:
-    """Send processed GIF bytes to the device."""
-    gif_module = device_manager.client.gif
-    packets = gif_module.create_gif_data_packets(gif_data, gif_type=12, time_sign=1)
-    async with device_manager._send_lock:
-        await gif_module._send_packets(packets=packets, response=True)
+    if not background:
+        logger.info("GIF upload complete")
+    return UploadResult(ok=True, jobs=jobs)
 
 
-def process_gif(
-    contents: bytes,
-    canvas_size: int,
-    resize_mode: ResizeMode,
+async def send_gif_to_devices(
+    devices: list[DeviceManager],
+    gif_bytes: bytes,
+    mode: ResizeMode,
     crop_x: float,
     crop_y: float,
-) -> bytes:
-    """Load a GIF, resize/crop each frame, re-encode as GIF bytes."""
-    from PIL import GifImagePlugin
-    GifImagePlugin.LOADING_STRATEGY = GifImagePlugin.LoadingStrategy.RGB_AFTER_DIFFERENT_PALETTE_ONLY
+    background: bool = False,
+) -> list[TransferJobStatus]:
+    """Process a GIF once per screen size and send it to all given devices in parallel.
 
-    with PILImage.open(io.BytesIO(contents)) as img:
-        logger.info("GIF upload: original %dx%d, %s frames",
-                     img.width, img.height, getattr(img, 'n_frames', '?'))
+    Every device's upload is a transfer job, see /api/jobs. With background=True this returns the
+    (pending) jobs right away instead of waiting for the uploads.
+    """
+    jobs = {device: job_registry.create(device, "gif") for device in devices}
 
-        frames = []
-        durations = []
-        try:
-            while True:
-                frame = img.copy()
-                duration = img.info.get("duration", 200)
-                durations.append(duration if duration > 0 else 200)
-                frames.append(frame)
-                img.seek(img.tell() + 1)
-        except EOFError:
-            pass
-
-        # Limit to 64 frames
-        if len(frames) > 64:
-            step = len(frames) / 64
-            indices = [int(i * step) for i in range(64)]
-            frames = [frames[i] for i in indices]
-            durations = [durations[i] for i in indices]
-
-        # Limit total animation duration to 2 seconds (device constraint)
-        total_duration = sum(durations[:len(frames)])
-        if total_duration > 2000 and len(frames) > 1:
-            target_frames = max(2, int(2000 / max(durations[0], 16)))
-            target_frames = min(target_frames, 64)
-            if target_frames < len(frames):
-                step = len(frames) / target_frames
-                indices = [int(i * step) for i in range(target_frames)]
-                frames = [frames[i] for i in indices]
-                durations = [durations[i] for i in indices]
-
-        # Resize/crop and palettize each frame
-        processed = []
-        for frame in frames:
-            if frame.mode not in ("RGB", "RGBA"):
-                frame = frame.convert("RGBA")
-            frame = _crop_and_resize_frame(frame, canvas_size, resize_mode, crop_x, crop_y)
-            # Palettize to 256 colors — critical for keeping GIF size small
-            frame = frame.convert("P", palette=PILImage.Palette.ADAPTIVE, colors=256)
-            processed.append(frame)
-
-        logger.info("GIF: %d frames at %dx%d, re-encoding...", len(processed), canvas_size, canvas_size)
-
-        # Re-encode as GIF
-        buf = io.BytesIO()
-        processed[0].save(
-            buf,
-            format="GIF",
-            save_all=True,
-            optimize=True,
-            append_images=processed[1:],
-            loop=0,
-            duration=durations[:len(processed)],
-            disposal=2,
+    async def encode(canvas_size: int, device: DeviceManager) -> list[list[bytes]]:
+        gif_data = await processing_pool.run(
+            process_gif, gif_bytes, canvas_size, mode, crop_x, crop_y, settings.GIF_GLOBAL_PALETTE
         )
-        buf.seek(0)
-        gif_bytes = buf.getvalue()
-        logger.info("GIF encoded: %d bytes (%.1f KB)", len(gif_bytes), len(gif_bytes) / 1024)
-        return gif_bytes
+        logger.info("GIF processed for %dx%d: %d bytes", canvas_size, canvas_size, len(gif_data))
+        return device.client.gif.create_gif_data_packets(gif_data, gif_type=12, time_sign=1)
 
+    async def encode_and_send() -> None:
+        try:
+            packets_by_size = await _encode_per_screen_size(devices, encode)
+        except Exception as e:
+            for job in jobs.values():
+                job.fail(e)
+            raise
+        logger.info("Sending GIF to %d device(s)...", len(devices))
+        await fleet_manager.broadcast(
+            devices,
+            lambda device: job_registry.run(
+                jobs[device],
+                lambda: device.upload_gif_packets(packets_by_size[device.screen_size], job=jobs[device]),
+            ),
+        )
 
-def _crop_and_resize_frame(
-    img: PILImage.Image,
-    canvas_size: int,
-    resize_mode: ResizeMode,
-    crop_x: float,
-    crop_y: float,
-) -> PILImage.Image:
-    """Resize/crop a single GIF frame. Uses NEAREST for pixel-art quality."""
-    if resize_mode == ResizeMode.FILL:
-        ratio = max(canvas_size / img.width, canvas_size / img.height)
-        new_w = int(img.width * ratio)
-        new_h = int(img.height * ratio)
-        img = img.resize((new_w, new_h), PILImage.Resampling.NEAREST)
-        max_x = new_w - canvas_size
-        max_y = new_h - canvas_size
-        left = int(max_x * crop_x)
-        top = int(max_y * crop_y)
-        img = img.crop((left, top, left + canvas_size, top + canvas_size))
-    elif resize_mode == ResizeMode.STRETCH:
-        img = img.resize((canvas_size, canvas_size), PILImage.Resampling.NEAREST)
-    else:  # FIT
-        ratio = min(canvas_size / img.width, canvas_size / img.height)
-        new_w = int(img.width * ratio)
-        new_h = int(img.height * ratio)
-        img = img.resize((new_w, new_h), PILImage.Resampling.NEAREST)
-        bg = PILImage.new("RGBA", (canvas_size, canvas_size), (0, 0, 0, 255))
-        bg.paste(img, ((canvas_size - new_w) // 2, (canvas_size - new_h) // 2))
-        img = bg
-
-    return img
+    if background:
+        job_registry.run_in_background(encode_and_send())
+    else:
+        await encode_and_send()
+    return [job_status(job_registry.get(job.id)) for job in jobs.values()]
+
+
+@router.get("/upload/processing")
+async def processing_status() -> ProcessingStatus:
+    return ProcessingStatus(
+        workers=processing_pool.workers,
+        maxConcurrent=processing_pool.max_concurrent,
+        maxQueued=processing_pool.max_queued,
+        active=processing_pool.active,
+        queued=processing_pool.queued,
+        completed=processing_pool.completed,
+        failed=processing_pool.failed,
+        rejected=processing_pool.rejected,
+        averageWaitMs=processing_pool.average_wait_ms,
+        averageRunMs=processing_pool.average_run_ms,
+    )
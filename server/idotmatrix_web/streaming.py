@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+
+from fastapi import HTTPException, WebSocket
+
+from .device_manager import DeviceManager
+from .fleet_manager import fleet_manager
+
+logger = logging.getLogger(__name__)
+
+# message types, the first byte of every binary WebSocket message
+MESSAGE_COMMAND = 0x01  # raw command bytes
+MESSAGE_PACKETS = 0x02  # pre-built packets, each prefixed with its length (uint32, little endian)
+MESSAGE_FRAME = 0x03  # full RGB frame of screen size x screen size pixels
+
+# number of messages that may wait for the devices before the server stops reading
+DEFAULT_STREAM_WINDOW = 4
+
+PACKET_LENGTH_SIZE = 4
+
+
+class StreamMessage:
+    """A binary message received over the stream WebSocket, decoded into the payload to send."""
+
+    def __init__(self, seq: int, kind: int, payload: bytes | memoryview | list[list[memoryview]]) -> None:
+        self.seq = seq
+        self.kind = kind
+        self.payload = payload
+
+
+def parse_packets(data: memoryview) -> list[list[memoryview]]:
+    """Split length-prefixed packets, every packet is sent as one chunk, a slice of the message."""
+    packets = []
+    offset = 0
+    while offset < len(data):
+        if offset + PACKET_LENGTH_SIZE > len(data):
+            raise ValueError("Truncated packet length")
+        length = int.from_bytes(data[offset:offset + PACKET_LENGTH_SIZE], byteorder="little")
+        offset += PACKET_LENGTH_SIZE
+        if length == 0 or offset + length > len(data):
+            raise ValueError(f"Invalid packet length {length} at offset {offset - PACKET_LENGTH_SIZE}")
+        packets.append([data[offset:offset + length]])
+        offset += length
+    if not packets:
+        raise ValueError("No packets")
+    return packets
+
+
+def parse_message(seq: int, data: bytes) -> StreamMessage:
+    if not data:
+        raise ValueError("Empty message")
+    kind = data[0]
+    payload = memoryview(data)[1:]
+    if kind == MESSAGE_COMMAND:
+        if not payload:
+            raise ValueError("Empty command")
+        return StreamMessage(seq, kind, bytes(payload))
+    if kind == MESSAGE_PACKETS:
+        return StreamMessage(seq, kind, parse_packets(payload))
+    if kind == MESSAGE_FRAME:
+        # the packets of the frame are built from the message without copying it first
+        return StreamMessage(seq, kind, payload)
+    raise ValueError(f"Unknown message type {kind:#04x}")
+
+
+class StreamSession:
+    """Feeds the binary messages of one WebSocket connection to the selected devices.
+
+    Messages are sent in order. While a message is being sent, at most `window` further messages are
+    buffered; the server then stops reading from the socket, so a fast client is slowed down to the
+    rate of the BLE link. RGB frames are never buffered behind each other: a frame that is still
+    waiting is replaced by a newer one and reported as dropped, so live drawing always shows the latest
+    frame instead of lagging behind.
+
+    Every message is answered with a JSON text message `{"type": "ack" | "dropped" | "error", "seq": n}`,
+    where seq counts the binary messages from 0. Acks include the time to send the message and the
+    number of messages still waiting.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        devices: list[DeviceManager],
+        with_response: bool = False,
+        window: int = DEFAULT_STREAM_WINDOW,
+    ) -> None:
+        self._websocket = websocket
+        self._devices = devices
+        self._with_response = with_response
+        self._window = max(1, window)
+        self._pending: deque[StreamMessage] = deque()
+        self._changed = asyncio.Condition()
+        self._send_lock = asyncio.Lock()
+        # devices that have been switched to DIY mode for the frames of this stream
+        self._diy_mode_devices: set[DeviceManager] = set()
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+
+    async def run(self) -> None:
+        """Serve the connection until the client disconnects."""
+        sender = asyncio.create_task(self._send_messages())
+        try:
+            await self._reply({
+                "type": "ready",
+                "window": self._window,
+                "screenSizes": sorted({device.screen_size for device in self._devices}),
+            })
+            await self._receive_messages()
+        finally:
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+            logger.info(
+                "Stream closed: %d messages sent, %d frames dropped, %d failed", self.sent, self.dropped, self.failed
+            )
+
+    async def _receive_messages(self) -> None:
+        seq = 0
+        while True:
+            message = await self._websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            data = message.get("bytes")
+            if data is None:
+                await self._reply({"type": "error", "seq": None, "detail": "Only binary messages are accepted"})
+                continue
+            try:
+                await self._enqueue(parse_message(seq, data))
+            except ValueError as e:
+                self.failed += 1
+                await self._reply({"type": "error", "seq": seq, "detail": str(e)})
+            seq += 1
+
+    async def _enqueue(self, message: StreamMessage) -> None:
+        async with self._changed:
+            if message.kind == MESSAGE_FRAME and self._pending and self._pending[-1].kind == MESSAGE_FRAME:
+                superseded = self._pending.pop()
+                self.dropped += 1
+                await self._reply({"type": "dropped", "seq": superseded.seq})
+            await self._changed.wait_for(lambda: len(self._pending) < self._window)
+            self._pending.append(message)
+            self._changed.notify_all()
+
+    async def _send_messages(self) -> None:
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self._pending) > 0)
+                message = self._pending.popleft()
+                self._changed.notify_all()
+
+            started_at = time.perf_counter()
+            try:
+                await fleet_manager.broadcast(self._devices, lambda device: self._send(device, message))
+            except Exception as e:
+                self.failed += 1
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                await self._reply({"type": "error", "seq": message.seq, "detail": detail})
+                continue
+            self.sent += 1
+            await self._reply({
+                "type": "ack",
+                "seq": message.seq,
+                "elapsedMs": round((time.perf_counter() - started_at) * 1000, 1),
+                "queued": len(self._pending),
+            })
+
+    async def _send(self, device: DeviceManager, message: StreamMessage) -> None:
+        if message.kind == MESSAGE_COMMAND:
+            await device.send_bytes(message.payload, with_response=self._with_response)
+        elif message.kind == MESSAGE_PACKETS:
+            await device.send_packets(message.payload, with_response=self._with_response)
+        else:
+            await self._send_frame(device, message.payload)
+
+    async def _send_frame(self, device: DeviceManager, pixel_data: bytes | memoryview) -> None:
+        expected_size = device.screen_size * device.screen_size * 3
+        if len(pixel_data) != expected_size:
+            raise ValueError(
+                f"Frame of {len(pixel_data)} bytes, expected {expected_size} for {device.screen_size}x{device.screen_size}"
+            )
+        packets = device.client.image.create_image_rgb_data_packets(pixel_data)
+        # the mode switch (and its settle time) is only needed before the first frame of the stream
+        switch_mode = device not in self._diy_mode_devices
+        await device.upload_image_packets(packets, switch_mode=switch_mode)
+        self._diy_mode_devices.add(device)
+
+    async def _reply(self, message: dict) -> None:
+        async with self._send_lock:
+            await self._websocket.send_text(json.dumps(message))